@@ -0,0 +1,152 @@
+import streamlit as st
+from config import METRICS_CONFIG
+from eval_cache import get_evaluation_cache
+from metrics import get_metrics
+from prescorer import stats as prescorer_stats
+from scheduler import get_scheduler
+
+
+def _spend(values) -> float:
+    prices = METRICS_CONFIG["token_prices"]
+    return (values.get("prompt_tokens", 0) * prices["prompt"] + values.get("response_tokens", 0) * prices["response"]) / 1e6
+
+
+@st.fragment(run_every=2)
+def _live_metrics():
+    """Stage percentiles and token spend, refreshed every two seconds."""
+    metrics = get_metrics()
+    stages = metrics.stages()
+    if not stages:
+        st.info("No traced activity yet.")
+        return
+
+    st.subheader("Stages")
+    st.dataframe(
+        [
+            {
+                "stage": stage,
+                "count": int(values["count"]),
+                "p50 (s)": round(values["p50"], 3),
+                "p95 (s)": round(values["p95"], 3),
+                "p99 (s)": round(values["p99"], 3),
+                "errors": int(values.get("errors", 0)),
+                "retries": int(values.get("retries", 0)),
+                "LLM calls": int(values.get("llm_calls", 0)),
+                "prompt tokens": int(values.get("prompt_tokens", 0)),
+                "response tokens": int(values.get("response_tokens", 0)),
+                "request KB": round(values.get("request_bytes", 0) / 1024, 1),
+                "response KB": round(values.get("response_bytes", 0) / 1024, 1),
+            }
+            for stage, values in stages.items()
+        ],
+        use_container_width=True,
+        hide_index=True
+    )
+
+    interviews = metrics.interviews()
+    total = {name: sum(values.get(name, 0) for values in interviews.values()) for name in ("prompt_tokens", "response_tokens")}
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Interviews", len(interviews))
+    col2.metric("Tokens", f"{int(total['prompt_tokens'] + total['response_tokens']):,}")
+    col3.metric("Estimated spend", f"${_spend(total):.4f}")
+
+    scheduler = get_scheduler().stats()
+    st.subheader("Gemini request queue")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("In flight", scheduler["in_flight"])
+    col2.metric("Admitted", f"{scheduler['admitted']:,}")
+    col3.metric("Coalesced", f"{scheduler['coalesced']:,}")
+    st.dataframe(
+        [
+            {
+                "priority": name,
+                "queued": depth,
+                "wait p50 (s)": round(scheduler["wait_seconds"][name]["p50"], 3),
+                "wait p95 (s)": round(scheduler["wait_seconds"][name]["p95"], 3),
+                "wait max (s)": round(scheduler["wait_seconds"][name]["max"], 3),
+            }
+            for name, depth in scheduler["queue_depth"].items()
+        ],
+        use_container_width=True,
+        hide_index=True
+    )
+
+    prescored = prescorer_stats()
+    st.subheader("Local prescoring")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Answers checked", f"{prescored['checked']:,}")
+    col2.metric("Scored locally", f"{prescored['scored_locally']:,}")
+    col3.metric("LLM calls avoided", f"{prescored['llm_calls_avoided']:.1%}")
+
+    cache = get_evaluation_cache()
+    if cache is not None:
+        cached = cache.stats()
+        lookups = cached["hits"] + cached["disk_hits"] + cached["misses"]
+        st.subheader("Evaluation cache")
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Hit rate", f"{(cached['hits'] + cached['disk_hits']) / lookups if lookups else 0.0:.1%}")
+        col2.metric("Hits (memory / disk)", f"{cached['hits']:,} / {cached['disk_hits']:,}")
+        col3.metric("Misses", f"{cached['misses']:,}")
+        col4.metric("Evictions", f"{cached['evictions']:,}")
+
+    st.subheader("Token spend per interview")
+    st.dataframe(
+        [
+            {
+                "interview": interview_id[:8],
+                "LLM calls": int(values.get("llm_calls", 0)),
+                "prompt tokens": int(values.get("prompt_tokens", 0)),
+                "response tokens": int(values.get("response_tokens", 0)),
+                "spend ($)": round(_spend(values), 5),
+            }
+            for interview_id, values in reversed(list(interviews.items()))
+        ],
+        use_container_width=True,
+        hide_index=True
+    )
+
+
+def admin_screen():
+    """Hidden operator page with live pipeline metrics"""
+    st.markdown('<div class="main-header"><h2>Interview Pipeline Metrics</h2></div>', unsafe_allow_html=True)
+    st.caption("Percentiles cover the most recent samples of each stage; counts are totals since the server started.")
+    _live_metrics()
+
+
+def analytics_screen():
+    """Hidden cohort analytics page for the hiring team"""
+    # pandas and plotly are only loaded when this page is opened
+    import plotly.express as px
+    from analytics import load_answers, interview_scores, percentile_ranks, score_distribution, question_difficulty
+
+    st.markdown('<div class="main-header"><h2>Candidate Cohort Analytics</h2></div>', unsafe_allow_html=True)
+    answers = load_answers()
+    if answers.empty:
+        st.info("No completed interviews have been recorded yet.")
+        return
+    scores = percentile_ranks(interview_scores(answers))
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Interviews", f"{len(scores):,}")
+    col2.metric("Answers", f"{len(answers):,}")
+    col3.metric("Median interview score", f"{scores['score'].median():.0f}%")
+
+    tab1, tab2, tab3 = st.tabs(["Score Distributions", "Candidates", "Question Difficulty"])
+    with tab1:
+        fig = px.box(scores.reset_index(), x="band", y="score", points=False,
+                     labels={"band": "Experience band", "score": "Interview score (%)"})
+        fig.update_layout(height=400, paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font_color='white')
+        st.plotly_chart(fig, use_container_width=True)
+        st.subheader("Answer scores by category and experience band")
+        st.dataframe(score_distribution(answers).round(1), use_container_width=True, hide_index=True)
+    with tab2:
+        query = st.text_input("Search candidates by name:")
+        shown = scores if not query else scores[scores["candidate"].str.contains(query, case=False, regex=False)]
+        shown = shown.sort_values("completed_at", ascending=False).head(500)
+        st.dataframe(
+            shown[["candidate", "band", "years_of_experience", "completed_at", "score", "percentile", "band_percentile"]].round(1),
+            use_container_width=True
+        )
+    with tab3:
+        st.caption("Difficulty is 1 - mean score / 100. Discrimination is how strongly a question's score follows the candidate's overall score.")
+        st.dataframe(question_difficulty(answers).round(3), use_container_width=True, hide_index=True)
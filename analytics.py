@@ -0,0 +1,210 @@
+import glob
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import ANALYTICS_CONFIG
+from question_bank import experience_band
+from records import Answer
+
+_CATEGORICAL = ("band", "category")
+
+_lock = threading.Lock()
+_cache: Dict[str, Tuple[Tuple, pd.DataFrame]] = {}
+
+
+def interview_frame(interview_id: str, candidate: str, years_of_experience: int, answers: Sequence[Answer],
+                    completed_at: Optional[float] = None) -> pd.DataFrame:
+    """One row per answer of a completed interview.
+
+    `recorded_at` is when the rows were written: the latest write of an answer wins on load.
+    """
+    completed_at = completed_at or time.time()
+    return pd.DataFrame({
+        "interview_id": interview_id,
+        "candidate": candidate,
+        "completed_at": pd.Timestamp(completed_at, unit="s", tz="UTC"),
+        "recorded_at": pd.Timestamp(time.time_ns(), unit="ns", tz="UTC"),
+        "years_of_experience": years_of_experience,
+        "band": experience_band(years_of_experience)["name"],
+        "question_index": np.arange(len(answers), dtype=np.int16),
+        "question": [a.question.question for a in answers],
+        "category": [a.category for a in answers],
+        "score": np.array([a.evaluation.score for a in answers], dtype=np.float32),
+        "matches": np.array([a.evaluation.matches for a in answers], dtype=np.int16),
+        "total_points": np.array([a.evaluation.total_points for a in answers], dtype=np.int16),
+        "failed": np.array([bool(a.evaluation.error) for a in answers], dtype=bool),
+        "audio": [a.audio for a in answers],
+    })
+
+
+def _partition(path: str, completed_at: float) -> str:
+    day = datetime.fromtimestamp(completed_at, tz=timezone.utc).strftime("%Y-%m-%d")
+    return os.path.join(path, f"date={day}")
+
+
+def record_interview(interview_id: str, candidate: str, years_of_experience: int, answers: Sequence[Answer],
+                     path: str = ANALYTICS_CONFIG["path"], completed_at: Optional[float] = None) -> str:
+    """Append a completed interview to the Parquet dataset. Re-recording an interview replaces it."""
+    completed_at = completed_at or time.time()
+    frame = interview_frame(interview_id, candidate, years_of_experience, answers, completed_at)
+    partition = _partition(path, completed_at)
+    os.makedirs(partition, exist_ok=True)
+    target = os.path.join(partition, f"interview-{interview_id}.parquet")
+    tmp = target + ".tmp"
+    frame.to_parquet(tmp, index=False)
+    os.replace(tmp, target)
+    if len(glob.glob(os.path.join(partition, "interview-*.parquet"))) >= ANALYTICS_CONFIG["compact_threshold"]:
+        compact(partition)
+    return target
+
+
+def _latest(frame: pd.DataFrame) -> pd.DataFrame:
+    """Keep the most recently written row of each answer, whatever order its files were read in."""
+    if "recorded_at" in frame:
+        # Rows written before recorded_at existed count as the oldest
+        frame = frame.sort_values("recorded_at", kind="stable", na_position="first")
+    return frame.drop_duplicates(["interview_id", "question_index"], keep="last")
+
+
+def compact(partition: str) -> Optional[str]:
+    """Merge a partition's per-interview files into one Parquet file.
+
+    Readers keep working throughout: the merged file is renamed into place
+    before the inputs are removed, and duplicates are dropped on load.
+    """
+    with _lock:
+        files = sorted(glob.glob(os.path.join(partition, "*.parquet")))
+        if len(files) < 2:
+            return None
+        merged = pd.concat([pd.read_parquet(f) for f in files], ignore_index=True)
+        merged = _latest(merged)
+        target = os.path.join(partition, f"part-{uuid.uuid4().hex}.parquet")
+        merged.to_parquet(target + ".tmp", index=False)
+        os.replace(target + ".tmp", target)
+        for f in files:
+            os.remove(f)
+    return target
+
+
+def _signature(path: str) -> Tuple:
+    files = glob.glob(os.path.join(path, "date=*", "*.parquet"))
+    return tuple(sorted((f, os.path.getmtime(f)) for f in files if os.path.exists(f)))
+
+
+def _read(signature: Tuple) -> pd.DataFrame:
+    if not signature:
+        frame = interview_frame("", "", 0, []).iloc[0:0]
+    else:
+        frame = pd.concat([pd.read_parquet(f) for f, _ in signature], ignore_index=True)
+        # A compaction in progress can briefly leave an interview in two files
+        frame = _latest(frame)
+    for column in _CATEGORICAL:
+        frame[column] = frame[column].astype("category")
+    return frame.reset_index(drop=True)
+
+
+def load_answers(path: str = ANALYTICS_CONFIG["path"], include_failed: bool = False, retries: int = 3) -> pd.DataFrame:
+    """All recorded answers, cached in memory until the dataset changes on disk."""
+    for attempt in range(retries + 1):
+        signature = _signature(path)
+        with _lock:
+            cached = _cache.get(path)
+        if cached is not None and cached[0] == signature:
+            break
+        try:
+            frame = _read(signature)
+        except FileNotFoundError:
+            # A compaction removed one of the files after it was listed; list them again
+            if attempt == retries:
+                raise
+            continue
+        cached = (signature, frame)
+        with _lock:
+            _cache[path] = cached
+        break
+    frame = cached[1]
+    return frame if include_failed else frame[~frame["failed"].to_numpy()]
+
+
+def interview_scores(answers: pd.DataFrame) -> pd.DataFrame:
+    """Overall score per interview, with candidate details."""
+    grouped = answers.groupby("interview_id", sort=False, observed=True)
+    return pd.DataFrame({
+        "candidate": grouped["candidate"].first(),
+        "band": grouped["band"].first(),
+        "years_of_experience": grouped["years_of_experience"].first(),
+        "completed_at": grouped["completed_at"].first(),
+        "score": grouped["score"].mean(),
+        "answers": grouped["score"].size(),
+    })
+
+
+def score_distribution(answers: pd.DataFrame, by: Sequence[str] = ("category", "band")) -> pd.DataFrame:
+    """Count, mean and quartiles of answer scores for each group."""
+    grouped = answers.groupby(list(by), observed=True)["score"]
+    return pd.DataFrame({
+        "answers": grouped.size(),
+        "mean": grouped.mean(),
+        "p25": grouped.quantile(0.25),
+        "median": grouped.median(),
+        "p75": grouped.quantile(0.75),
+    }).reset_index()
+
+
+def percentile_rank(scores: pd.DataFrame, score: float, band: Optional[str] = None) -> float:
+    """Percentage of interviews (optionally within one band) scoring below `score`, counting ties as half."""
+    values = scores["score"].to_numpy() if band is None else scores.loc[scores["band"] == band, "score"].to_numpy()
+    if len(values) == 0:
+        return 0.0
+    ordered = np.sort(values)
+    below = np.searchsorted(ordered, score, side="left")
+    at_or_below = np.searchsorted(ordered, score, side="right")
+    return float(100.0 * (below + 0.5 * (at_or_below - below)) / len(ordered))
+
+
+def percentile_ranks(scores: pd.DataFrame) -> pd.DataFrame:
+    """Percentile rank of every interview, overall and within its experience band."""
+    ranked = scores.copy()
+    ranked["percentile"] = scores["score"].rank(pct=True, method="average") * 100
+    ranked["band_percentile"] = scores.groupby("band", observed=True)["score"].rank(pct=True, method="average") * 100
+    return ranked
+
+
+def question_difficulty(answers: pd.DataFrame, min_attempts: int = ANALYTICS_CONFIG["min_attempts"]) -> pd.DataFrame:
+    """Per-question attempts, mean score, difficulty and discrimination.
+
+    Discrimination is the correlation between a question's score and the
+    candidate's overall score: questions that strong candidates pass and weak
+    ones fail score close to 1.
+    """
+    totals = answers.groupby("interview_id", sort=False)["score"].transform("mean").to_numpy(dtype=np.float64)
+    x = answers["score"].to_numpy(dtype=np.float64)
+    work = pd.DataFrame({
+        "question": answers["question"].to_numpy(),
+        "category": answers["category"].to_numpy(),
+        "x": x, "y": totals, "xx": x * x, "yy": totals * totals, "xy": x * totals,
+        "full": (answers["matches"].to_numpy() >= answers["total_points"].to_numpy()),
+    })
+    grouped = work.groupby(["question", "category"], sort=False, observed=True)
+    sums = grouped[["x", "y", "xx", "yy", "xy", "full"]].sum()
+    n = grouped.size().to_numpy(dtype=np.float64)
+    cov = sums["xy"].to_numpy() - sums["x"].to_numpy() * sums["y"].to_numpy() / n
+    var_x = sums["xx"].to_numpy() - sums["x"].to_numpy() ** 2 / n
+    var_y = sums["yy"].to_numpy() - sums["y"].to_numpy() ** 2 / n
+    denom = np.sqrt(np.clip(var_x, 0, None) * np.clip(var_y, 0, None))
+    mean = sums["x"].to_numpy() / n
+    result = pd.DataFrame({
+        "attempts": n.astype(np.int64),
+        "mean_score": mean,
+        "difficulty": 1.0 - mean / 100.0,
+        "full_marks_rate": sums["full"].to_numpy() / n,
+        "discrimination": np.divide(cov, denom, out=np.full_like(cov, np.nan), where=denom > 0),
+    }, index=sums.index).reset_index()
+    return result[result["attempts"] >= min_attempts].sort_values("difficulty", ascending=False, ignore_index=True)
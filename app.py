@@ -1,12 +1,16 @@
+import startup_profile
+startup_profile.start()
+
 import streamlit as st
-import google.generativeai as genai
-from config import GOOGLE_API_KEY
-from ui import welcome_screen, loading_screen, interview_screen, results_screen
+from config import ANALYTICS_CONFIG, METRICS_CONFIG
+from ui import welcome_screen, loading_screen, interview_screen, results_screen, resume_interview
+from admin import admin_screen, analytics_screen
 from styles import STYLES
+from question_bank import start_refill_worker
+from metrics import interview, trace, start_metrics_server
+from session_store import restore
 
-# Configure APIs
-if GOOGLE_API_KEY:
-    genai.configure(api_key=GOOGLE_API_KEY)
+# Gemini is imported and configured once per process by llm.get_client() on first use
 
 def init_session_state():
     """Initialize session state variables."""
@@ -22,14 +26,27 @@ def init_session_state():
         st.session_state.answers = []
     if 'interview_questions' not in st.session_state:
         st.session_state.interview_questions = []
+    if 'question_stream' not in st.session_state:
+        st.session_state.question_stream = None
     if 'start_recording' not in st.session_state:
         st.session_state.start_recording = False
-    if 'last_answer' not in st.session_state:
-        st.session_state.last_answer = ""
+    if 'answer_jobs' not in st.session_state:
+        st.session_state.answer_jobs = []
     if 'show_transition' not in st.session_state:
         st.session_state.show_transition = False
-    if 'transition_answer' not in st.session_state:
-        st.session_state.transition_answer = ""
+    if 'transition_deadline' not in st.session_state:
+        st.session_state.transition_deadline = None
+    if 'prepare_deadline' not in st.session_state:
+        st.session_state.prepare_deadline = None
+    if 'interview_id' not in st.session_state:
+        st.session_state.interview_id = None
+        # A new browser session pointing at a saved interview picks up where it left off
+        session_id = st.query_params.get("session")
+        if session_id:
+            if restore(st.session_state, session_id):
+                resume_interview()
+            else:
+                del st.query_params["session"]
 
 def main():
     """Main function to run the Streamlit app."""
@@ -43,16 +60,29 @@ def main():
     st.markdown(STYLES, unsafe_allow_html=True)
     
     init_session_state()
+    start_refill_worker()
+    start_metrics_server()
+
+    # Hidden metrics page for operators
+    if METRICS_CONFIG["admin_token"] and st.query_params.get("admin") == METRICS_CONFIG["admin_token"]:
+        admin_screen()
+        return
+    if ANALYTICS_CONFIG["token"] and st.query_params.get("analytics") == ANALYTICS_CONFIG["token"]:
+        analytics_screen()
+        return
 
     # Navigation based on stage
-    if st.session_state.stage == 'welcome':
-        welcome_screen()
-    elif st.session_state.stage == 'loading_questions':
-        loading_screen()
-    elif st.session_state.stage == 'interview':
-        interview_screen()
-    elif st.session_state.stage == 'results':
-        results_screen()
+    stage = st.session_state.stage
+    with interview(st.session_state.interview_id), trace(f"render.{stage}"):
+        if stage == 'welcome':
+            welcome_screen()
+        elif stage == 'loading_questions':
+            loading_screen()
+        elif stage == 'interview':
+            interview_screen()
+        elif stage == 'results':
+            results_screen()
+    startup_profile.finish(stage)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,96 @@
+import io
+from typing import List, Tuple
+
+import numpy as np
+from pydub import AudioSegment
+
+from config import AUDIO_CONFIG
+
+
+class SilentAudioError(ValueError):
+    """Raised when a recording holds no usable speech."""
+
+
+def decode_wav(audio_bytes: bytes) -> Tuple[np.ndarray, int]:
+    """Decode WAV bytes to 16-bit mono samples and their sample rate."""
+    segment = AudioSegment.from_wav(io.BytesIO(audio_bytes)).set_channels(1).set_sample_width(2)
+    return np.frombuffer(segment.raw_data, dtype=np.int16), segment.frame_rate
+
+
+def encode_wav(samples: np.ndarray, sample_rate: int, target_rate: int = AUDIO_CONFIG["target_sample_rate"]) -> bytes:
+    """Encode 16-bit mono samples as WAV, downsampling to target_rate if needed."""
+    segment = AudioSegment(samples.astype(np.int16).tobytes(), frame_rate=sample_rate, sample_width=2, channels=1)
+    if sample_rate > target_rate:
+        segment = segment.set_frame_rate(target_rate)
+    return segment.export(format="wav").read()
+
+
+def frame_energies(samples: np.ndarray, frame_len: int) -> np.ndarray:
+    """RMS energy of each full frame, on a 0..1 scale."""
+    n_frames = len(samples) // frame_len
+    frames = samples[:n_frames * frame_len].reshape(n_frames, frame_len).astype(np.float32) / 32768.0
+    return np.sqrt(np.mean(frames * frames, axis=1))
+
+
+def voiced_frames(energies: np.ndarray) -> np.ndarray:
+    """Energy-based voice activity: frames well above both the noise floor and the absolute floor."""
+    noise_floor = np.percentile(energies, 10)
+    threshold = max(AUDIO_CONFIG["energy_floor"], noise_floor * AUDIO_CONFIG["noise_factor"])
+    return energies > threshold
+
+
+def preprocess_audio(audio_bytes: bytes) -> bytes:
+    """Trim silence, shorten long pauses, convert to mono and downsample before recognition.
+
+    Raises SilentAudioError for empty or near-silent recordings.
+    """
+    samples, sample_rate = decode_wav(audio_bytes)
+    frame_ms = AUDIO_CONFIG["frame_ms"]
+    frame_len = sample_rate * frame_ms // 1000
+    if len(samples) < frame_len:
+        raise SilentAudioError("recording is empty")
+
+    voiced = voiced_frames(frame_energies(samples, frame_len))
+    if voiced.sum() * frame_ms < AUDIO_CONFIG["min_speech_ms"]:
+        raise SilentAudioError("no speech detected")
+
+    # Keep `padding_ms` around every voiced frame; this trims leading/trailing silence
+    # and collapses any pause longer than twice the padding
+    pad = AUDIO_CONFIG["padding_ms"] // frame_ms
+    keep = np.convolve(voiced.astype(np.int32), np.ones(2 * pad + 1, dtype=np.int32), mode="same") > 0
+    kept = samples[:len(keep) * frame_len][np.repeat(keep, frame_len)]
+    return encode_wav(kept, sample_rate)
+
+
+def split_at_pauses(audio_bytes: bytes, max_seconds: float, min_seconds: float, overlap_ms: int) -> List[bytes]:
+    """Split a long recording into segments of at most max_seconds, cutting at the quietest point.
+
+    Each segment is extended by overlap_ms on both sides so words near a cut are
+    not clipped; stitch the transcripts with speech.stitch_transcripts.
+    """
+    samples, sample_rate = decode_wav(audio_bytes)
+    if len(samples) <= max_seconds * sample_rate:
+        return [audio_bytes]
+
+    frame_ms = AUDIO_CONFIG["frame_ms"]
+    frame_len = sample_rate * frame_ms // 1000
+    energies = frame_energies(samples, frame_len)
+    # Smooth over ~300 ms so a cut lands inside a pause rather than between two syllables
+    window = max(1, 300 // frame_ms)
+    smoothed = np.convolve(energies, np.ones(window) / window, mode="same")
+
+    max_frames = int(max_seconds * 1000 // frame_ms)
+    min_frames = int(min_seconds * 1000 // frame_ms)
+    cuts = [0]
+    while len(energies) - cuts[-1] > max_frames:
+        low, high = cuts[-1] + min_frames, cuts[-1] + max_frames
+        cuts.append(low + int(np.argmin(smoothed[low:high])))
+    cuts.append(len(energies))
+
+    overlap = sample_rate * overlap_ms // 1000
+    segments = []
+    for start, end in zip(cuts[:-1], cuts[1:]):
+        first = max(0, start * frame_len - overlap)
+        last = len(samples) if end == len(energies) else min(len(samples), end * frame_len + overlap)
+        segments.append(encode_wav(samples[first:last], sample_rate))
+    return segments
@@ -0,0 +1,126 @@
+import hashlib
+import io
+import mmap
+import os
+import threading
+from contextlib import contextmanager
+from typing import BinaryIO, Optional, Tuple
+
+from config import AUDIO_STORE_CONFIG
+from metrics import annotate
+
+# Container format, pydub export options and MIME type per codec
+CODECS = {
+    "opus": {"format": "ogg", "codec": "libopus", "mime": "audio/ogg"},
+    "mp3": {"format": "mp3", "codec": None, "mime": "audio/mpeg"},
+    "wav": {"format": "wav", "codec": None, "mime": "audio/wav"},
+}
+_EXTENSIONS = {codec["format"]: name for name, codec in CODECS.items()}
+
+
+def audio_digest(audio_bytes: bytes) -> str:
+    """Content address of a recording: the SHA-256 of the bytes as recorded."""
+    return hashlib.sha256(audio_bytes).hexdigest()
+
+
+class AudioStore:
+    """Content-addressed directory of compressed answer recordings.
+
+    Each distinct recording is encoded once (mono, downsampled) and written to
+    <path>/<first two hex digits>/<digest>.<ext>; storing it again is a no-op.
+    Answer records keep only the digest.
+    """
+
+    def __init__(self, path: str = AUDIO_STORE_CONFIG["path"], codec: str = AUDIO_STORE_CONFIG["codec"],
+                 bitrate: str = AUDIO_STORE_CONFIG["bitrate"], sample_rate: int = AUDIO_STORE_CONFIG["sample_rate"]):
+        self.path = path
+        self.codec = codec
+        self.bitrate = bitrate
+        self.sample_rate = sample_rate
+
+    def _base(self, digest: str) -> str:
+        return os.path.join(self.path, digest[:2], digest)
+
+    def locate(self, digest: str) -> Optional[str]:
+        """Path of a stored recording, or None if it is not in the store."""
+        base = self._base(digest)
+        for extension in _EXTENSIONS:
+            if os.path.exists(f"{base}.{extension}"):
+                return f"{base}.{extension}"
+        return None
+
+    def mime_type(self, digest: str) -> Optional[str]:
+        path = self.locate(digest)
+        return CODECS[_EXTENSIONS[path.rsplit(".", 1)[1]]]["mime"] if path else None
+
+    def _encode(self, audio_bytes: bytes) -> Tuple[bytes, str]:
+        """Encoded recording and the container format it ended up in."""
+        from pydub import AudioSegment
+        from pydub.exceptions import CouldntEncodeError
+
+        segment = AudioSegment.from_wav(io.BytesIO(audio_bytes)).set_channels(1).set_sample_width(2)
+        if segment.frame_rate > self.sample_rate:
+            segment = segment.set_frame_rate(self.sample_rate)
+        codec = self.codec
+        if codec != "wav":
+            options = CODECS[codec]
+            try:
+                return segment.export(format=options["format"], codec=options["codec"], bitrate=self.bitrate).read(), options["format"]
+            except (CouldntEncodeError, FileNotFoundError):
+                # No ffmpeg (or no encoder for the codec): keep storing, as downsampled WAV
+                annotate(codec_fallbacks=1)
+                self.codec = "wav"
+        return segment.export(format="wav").read(), "wav"
+
+    def put(self, audio_bytes: bytes, digest: Optional[str] = None) -> str:
+        """Store a WAV recording unless an identical one is already stored. Returns its digest."""
+        digest = digest or audio_digest(audio_bytes)
+        if self.locate(digest):
+            return digest
+        encoded, extension = self._encode(audio_bytes)
+        target = f"{self._base(digest)}.{extension}"
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # A unique temporary name lets concurrent writers of the same recording race harmlessly
+        tmp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(encoded)
+        os.replace(tmp, target)
+        return digest
+
+    def open(self, digest: str) -> BinaryIO:
+        """The stored file, opened for streaming. Raises FileNotFoundError if it is not stored."""
+        path = self.locate(digest)
+        if path is None:
+            raise FileNotFoundError(f"no recording {digest} in {self.path}")
+        return open(path, "rb")
+
+    @contextmanager
+    def wav(self, digest: str):
+        """The recording as WAV bytes, for re-transcription.
+
+        WAV files are memory-mapped for the duration of the block rather than
+        read; compressed files are decoded by ffmpeg straight from disk.
+        """
+        with self.open(digest) as f:
+            if f.name.endswith(".wav"):
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    yield data
+                return
+            from pydub import AudioSegment
+            yield AudioSegment.from_file(f.name).export(format="wav").read()
+
+
+_store: Optional[AudioStore] = None
+_store_lock = threading.Lock()
+
+
+def get_audio_store() -> Optional[AudioStore]:
+    """Return the process-wide audio store, or None when storing recordings is disabled."""
+    global _store
+    if not AUDIO_STORE_CONFIG["enabled"]:
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = AudioStore()
+    return _store
@@ -0,0 +1,114 @@
+"""Payload size and transcription latency before and after audio preprocessing.
+
+For every WAV clip, reports the raw and preprocessed payload size and duration,
+the time spent preprocessing and, with --backend, the recognition latency on
+the raw and the preprocessed audio. Without a clips directory, --synthetic N
+generates recorder-like clips (44.1 kHz stereo, long leading/trailing silence).
+
+    python benchmarks/audio_preprocessing.py --clips recordings/ --backend vosk --output preprocessing.json
+    python benchmarks/audio_preprocessing.py --synthetic 20
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import speech_recognition as sr
+
+from common import summarize, synthetic_clip, write_results
+
+import speech
+from audio_processing import SilentAudioError, decode_wav, preprocess_audio
+
+
+def _duration(audio_bytes: bytes) -> float:
+    samples, rate = decode_wav(audio_bytes)
+    return len(samples) / rate
+
+
+def _timed_transcribe(audio_bytes: bytes, backend: str) -> Tuple[float, bool]:
+    """Recognition latency and whether the recognizer failed (so failures are not read as fast calls)."""
+    started = time.perf_counter()
+    try:
+        speech.transcribe(audio_bytes, backend)
+        failed = False
+    except sr.UnknownValueError:
+        failed = False
+    except Exception:
+        failed = True
+    return time.perf_counter() - started, failed
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clips", help="directory of .wav recordings")
+    parser.add_argument("--synthetic", type=int, default=0, help="generate this many synthetic clips")
+    parser.add_argument("--backend", choices=list(speech.BACKENDS), help="also time transcription with this backend")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    clips: List[bytes] = []
+    if args.clips:
+        for path in sorted(glob.glob(os.path.join(args.clips, "*.wav"))):
+            with open(path, "rb") as f:
+                clips.append(f.read())
+    rng = np.random.default_rng(args.seed)
+    clips.extend(synthetic_clip(rng) for _ in range(args.synthetic))
+    if not clips:
+        print("No clips: pass --clips DIR and/or --synthetic N")
+        return 1
+
+    raw_bytes, processed_bytes, raw_seconds, processed_seconds, preprocess_seconds = [], [], [], [], []
+    raw_latency, processed_latency = [], []
+    rejected = errors = 0
+    for clip in clips:
+        started = time.perf_counter()
+        try:
+            processed = preprocess_audio(clip)
+        except SilentAudioError:
+            rejected += 1
+            continue
+        preprocess_seconds.append(time.perf_counter() - started)
+        raw_bytes.append(len(clip))
+        processed_bytes.append(len(processed))
+        raw_seconds.append(_duration(clip))
+        processed_seconds.append(_duration(processed))
+        if args.backend:
+            for latencies, audio in ((raw_latency, clip), (processed_latency, processed)):
+                seconds, failed = _timed_transcribe(audio, args.backend)
+                latencies.append(seconds)
+                errors += failed
+
+    results: Dict[str, Any] = {
+        "params": vars(args),
+        "clips": len(clips),
+        "rejected_as_silent": rejected,
+        "payload_bytes": {"raw": summarize(raw_bytes), "processed": summarize(processed_bytes)},
+        "audio_seconds": {"raw": summarize(raw_seconds), "processed": summarize(processed_seconds)},
+        "preprocess_seconds": summarize(preprocess_seconds),
+    }
+    if args.backend:
+        results["transcription_seconds"] = {"raw": summarize(raw_latency), "processed": summarize(processed_latency)}
+        results["transcription_errors"] = errors
+
+    if raw_bytes:
+        print(f"Clips: {len(clips)} ({rejected} rejected as silent)")
+        print(f"Payload:  {sum(raw_bytes) / 1e6:.1f} MB -> {sum(processed_bytes) / 1e6:.1f} MB "
+              f"({100 * (1 - sum(processed_bytes) / sum(raw_bytes)):.0f}% smaller)")
+        print(f"Audio:    {sum(raw_seconds):.0f} s -> {sum(processed_seconds):.0f} s")
+        print(f"Preprocess p50 {results['preprocess_seconds']['p50'] * 1000:.1f} ms, "
+              f"p95 {results['preprocess_seconds']['p95'] * 1000:.1f} ms")
+        if args.backend:
+            raw, processed = results["transcription_seconds"]["raw"], results["transcription_seconds"]["processed"]
+            print(f"Transcription p50 {raw['p50']:.3f} s -> {processed['p50']:.3f} s, "
+                  f"p95 {raw['p95']:.3f} s -> {processed['p95']:.3f} s ({errors} recognizer errors)")
+    write_results(args.output, results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
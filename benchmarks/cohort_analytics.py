@@ -0,0 +1,130 @@
+"""Query latency of the cohort analytics module on a synthetic dataset.
+
+Writes --interviews synthetic interviews (10 answers each) spread over --days
+date partitions. Most are written in bulk as compacted partitions and a sample
+goes through record_interview to time the append path. The script then times
+each analytics query, cold (first load from Parquet) and warm (in-memory).
+
+    python benchmarks/cohort_analytics.py --interviews 10000 --output analytics.json
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict
+
+import numpy as np
+import pandas as pd
+
+from common import summarize, write_results
+
+import analytics
+from config import EXPERIENCE_BANDS
+from records import Answer, Evaluation, Question
+
+CATEGORIES = ["Basic Functions", "Lookup Functions", "Data Analysis", "PivotTables", "Charts", "Formatting"]
+
+
+def synthetic_answers(rng: np.random.Generator, interviews: int, questions: int, day: pd.Timestamp) -> pd.DataFrame:
+    """Answers whose scores depend on candidate skill and question difficulty."""
+    rows = interviews * 10
+    interview = np.repeat(np.arange(interviews), 10)
+    years = rng.integers(0, 30, interviews)
+    skill = np.clip(years / 15 + rng.normal(0, 0.3, interviews), 0, 2)
+    question = rng.integers(0, questions, rows)
+    difficulty = (question % 7) / 7
+    score = np.clip(40 + 30 * skill[interview] - 40 * difficulty + rng.normal(0, 12, rows), 0, 100).round()
+    bands = np.array([next(b["name"] for b in EXPERIENCE_BANDS if b["min_years"] <= y <= b["max_years"]) for y in years])
+    ids = np.array([f"{day:%Y%m%d}-{i}" for i in range(interviews)])
+    return pd.DataFrame({
+        "interview_id": ids[interview],
+        "candidate": np.char.add("Candidate ", ids[interview]),
+        "completed_at": day + pd.to_timedelta(rng.integers(0, 86400, rows), unit="s"),
+        "recorded_at": day + pd.Timedelta(days=1),
+        "years_of_experience": years[interview],
+        "band": bands[interview],
+        "question_index": np.tile(np.arange(10, dtype=np.int16), interviews),
+        "question": np.char.add("Question ", question.astype(str)),
+        "category": np.array(CATEGORIES)[question % len(CATEGORIES)],
+        "score": score.astype(np.float32),
+        "matches": (score // 34).astype(np.int16),
+        "total_points": np.full(rows, 3, dtype=np.int16),
+        "failed": rng.random(rows) < 0.01,
+    })
+
+
+def timed(func: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--interviews", type=int, default=10000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--questions", type=int, default=400, help="distinct questions in the pool")
+    parser.add_argument("--appends", type=int, default=50, help="interviews written through record_interview")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--path", help="dataset directory (default: a temporary directory)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    path = args.path or tempfile.mkdtemp(prefix="analytics-")
+    rng = np.random.default_rng(args.seed)
+    start = pd.Timestamp("2026-01-01", tz="UTC")
+    per_day = max(1, args.interviews // args.days)
+    for d in range(args.days):
+        day = start + pd.Timedelta(days=d)
+        partition = os.path.join(path, f"date={day:%Y-%m-%d}")
+        os.makedirs(partition, exist_ok=True)
+        synthetic_answers(rng, per_day, args.questions, day).to_parquet(os.path.join(partition, "part-bulk.parquet"), index=False)
+
+    answers = [
+        Answer(Question(f"Question {i}", CATEGORIES[i % len(CATEGORIES)], ("a", "b", "c")), "answer",
+               Evaluation(float(rng.integers(0, 100)), "fair", "", 1, 3))
+        for i in range(10)
+    ]
+    append_samples = []
+    for i in range(args.appends):
+        started = time.perf_counter()
+        analytics.record_interview(f"append-{i}", "Appended", int(rng.integers(0, 30)), answers, path=path)
+        append_samples.append(time.perf_counter() - started)
+
+    cold = time.perf_counter()
+    frame = analytics.load_answers(path)
+    cold = time.perf_counter() - cold
+    scores = analytics.interview_scores(frame)
+    queries = {
+        "load_answers_warm": lambda: analytics.load_answers(path),
+        "interview_scores": lambda: analytics.interview_scores(frame),
+        "score_distribution": lambda: analytics.score_distribution(frame),
+        "percentile_ranks": lambda: analytics.percentile_ranks(scores),
+        "percentile_rank": lambda: analytics.percentile_rank(scores, 72.5, band="advanced"),
+        "question_difficulty": lambda: analytics.question_difficulty(frame),
+    }
+    results = {
+        "params": dict(vars(args), path=path),
+        "answers": len(frame),
+        "interviews": len(scores),
+        "record_interview": summarize(append_samples),
+        "load_answers_cold_seconds": cold,
+        "queries": {name: timed(query, args.repeat) for name, query in queries.items()},
+    }
+
+    print(f"{len(frame):,} answers from {len(scores):,} interviews in {path}")
+    print(f"  record_interview           p50 {results['record_interview']['p50'] * 1000:7.1f} ms")
+    print(f"  load_answers (cold)        {cold * 1000:9.1f} ms")
+    for name, summary in results["queries"].items():
+        print(f"  {name:<26} p50 {summary['p50'] * 1000:7.1f} ms  max {summary['max'] * 1000:7.1f} ms")
+    write_results(args.output, results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
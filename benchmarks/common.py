@@ -0,0 +1,62 @@
+"""Helpers shared by the benchmark scripts."""
+import io
+import json
+import os
+import sys
+import wave
+from typing import Any, Dict, List
+
+import numpy as np
+
+# Make the app modules importable when a script is run as `python benchmarks/<script>.py`
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile; 0.0 for an empty list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    """Count, mean and tail percentiles of a list of measurements."""
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values) if values else 0.0,
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values) if values else 0.0,
+    }
+
+
+def write_results(path: str, results: Dict[str, Any]):
+    """Write benchmark results as JSON so runs can be compared."""
+    if not path:
+        return
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, default=str)
+
+
+def synthetic_clip(rng: np.random.Generator, rate: int = 44100) -> bytes:
+    """A stereo clip of speech-like bursts between long stretches of room noise."""
+    parts = [rng.standard_normal(int(rate * rng.uniform(2, 6))) * 60]
+    for _ in range(rng.integers(3, 8)):
+        n = int(rate * rng.uniform(0.5, 3))
+        envelope = np.abs(np.sin(np.linspace(0, np.pi * rng.integers(2, 8), n)))
+        tone = np.sin(np.arange(n) * 2 * np.pi * rng.uniform(120, 300) / rate)
+        parts.append((tone * 8000 + rng.standard_normal(n) * 1500) * envelope)
+        parts.append(rng.standard_normal(int(rate * rng.uniform(0.2, 2.5))) * 60)
+    parts.append(rng.standard_normal(int(rate * rng.uniform(3, 10))) * 60)
+    mono = np.clip(np.concatenate(parts), -32768, 32767).astype(np.int16)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(2)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(np.repeat(mono[:, None], 2, axis=1).tobytes())
+    return buffer.getvalue()
@@ -0,0 +1,123 @@
+"""Tail latency of LLM calls with and without hedging, and answers degraded by the deadline.
+
+A stub backend answers most calls in --latency seconds (plus jitter) but
+stalls a --slow-rate fraction of them for an extra --slow-latency seconds,
+like an overloaded upstream. The same workload runs with hedging off and on,
+first with no scheduler limits and then under a --rate-limit requests/minute
+quota, where hedges and queueing compete for the same admissions; the report
+compares latency percentiles and how many extra backend requests hedging
+cost. A second run evaluates answers under a per-answer budget
+against a backend that always stalls, to show they finish within the budget
+as provisional local estimates instead of hanging.
+
+    python benchmarks/hedged_requests.py --calls 400 --slow-rate 0.05 --slow-latency 5 --output hedging.json
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict
+
+from common import summarize, write_results
+
+os.environ.setdefault("EVALUATION_CACHE_PATH", "")
+
+import llm  # noqa: E402
+from config import DEADLINE_CONFIG  # noqa: E402
+from deadlines import deadline  # noqa: E402
+from scheduler import Scheduler  # noqa: E402
+
+QUESTION = {
+    "question": "How would you find a product's price in another sheet using its product code?",
+    "category": "Lookup Functions",
+    "expected_points": ["Use VLOOKUP or XLOOKUP", "Exact match lookup", "Reference the other sheet's range"],
+}
+
+
+def run_calls(args, hedge: bool, rate_limited: bool = False) -> Dict[str, Any]:
+    backend = llm.StubBackend(latency=args.latency, jitter=args.jitter, slow_rate=args.slow_rate,
+                              slow_latency=args.slow_latency, seed=args.seed)
+    if rate_limited:
+        scheduler = Scheduler(requests_per_minute=args.rate_limit, tokens_per_minute=0, burst_seconds=1,
+                              max_concurrent=args.max_concurrent, coalesce=False)
+    else:
+        # No quota or concurrency limits: queueing would hide the backend latency being measured
+        scheduler = Scheduler(requests_per_minute=1e6, tokens_per_minute=0, max_concurrent=256, coalesce=False)
+    client = llm.LLMClient(backend, scheduler=scheduler, hedge=hedge, max_retries=0)
+    # Warm-up calls give the client the latency samples its hedge delay is based on
+    for i in range(DEADLINE_CONFIG["hedge_min_samples"]):
+        client.generate(f"warm-up {i}", "evaluation")
+    warm_calls = backend.calls
+
+    def one(i: int) -> float:
+        started = time.perf_counter()
+        client.generate(f"prompt {i}", "evaluation")
+        return time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        latencies = list(executor.map(one, range(args.calls)))
+    return {
+        "latency": summarize(latencies),
+        "backend_calls_per_request": (backend.calls - warm_calls) / args.calls,
+        "hedge_delay": client._hedge_delay("evaluation"),
+        "scheduler_wait_p95": scheduler.stats()["wait_seconds"]["live"]["p95"],
+    }
+
+
+def run_deadline(args) -> Dict[str, Any]:
+    from utils import evaluate_answer_with_gemini
+
+    llm.set_backend(llm.StubBackend(latency=args.budget * 4))
+    latencies, provisional = [], 0
+
+    def one(i: int):
+        answer = f"I would use XLOOKUP with the product code on the prices sheet, exact match, attempt {i}."
+        started = time.perf_counter()
+        with deadline(args.budget):
+            evaluation = evaluate_answer_with_gemini(QUESTION, answer)
+        return time.perf_counter() - started, bool(evaluation.get("provisional"))
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        for seconds, is_provisional in executor.map(one, range(args.deadline_answers)):
+            latencies.append(seconds)
+            provisional += is_provisional
+    return {"budget_seconds": args.budget, "latency": summarize(latencies),
+            "provisional_rate": provisional / len(latencies) if latencies else 0.0}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.3, help="typical backend latency (seconds)")
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--slow-rate", type=float, default=0.05, help="fraction of calls that stall")
+    parser.add_argument("--slow-latency", type=float, default=5.0, help="extra seconds a stalled call takes")
+    parser.add_argument("--rate-limit", type=float, default=2400, help="requests/minute for the rate-limited runs")
+    parser.add_argument("--max-concurrent", type=int, default=16, help="scheduler concurrency cap for the rate-limited runs")
+    parser.add_argument("--budget", type=float, default=2.0, help="per-answer evaluation budget for the deadline run")
+    parser.add_argument("--deadline-answers", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    results = {"params": vars(args), "no_hedge": run_calls(args, hedge=False), "hedge": run_calls(args, hedge=True),
+               "limited_no_hedge": run_calls(args, hedge=False, rate_limited=True),
+               "limited_hedge": run_calls(args, hedge=True, rate_limited=True)}
+    results["deadline"] = run_deadline(args)
+
+    for name in ("no_hedge", "hedge", "limited_no_hedge", "limited_hedge"):
+        r = results[name]
+        print(f"{name:<16} p50 {r['latency']['p50']:.3f}s  p95 {r['latency']['p95']:.3f}s  p99 {r['latency']['p99']:.3f}s  "
+              f"max {r['latency']['max']:.3f}s  backend calls/request {r['backend_calls_per_request']:.2f}  "
+              f"queue p95 {r['scheduler_wait_p95']:.3f}s")
+    d = results["deadline"]
+    print(f"deadline         budget {d['budget_seconds']:.1f}s against a stalled backend: max {d['latency']['max']:.3f}s, "
+          f"{d['provisional_rate']:.0%} provisional")
+    write_results(args.output, results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,337 @@
+"""End-to-end load and latency benchmark of the interview flow with stubbed Gemini and speech recognition.
+
+Drives app.py headlessly with Streamlit's AppTest for N concurrent simulated
+candidates: welcome -> loading_screen -> every question in interview_screen ->
+results_screen. Gemini and the recognizer are replaced by local stand-ins
+(llm.StubBackend, speech.StubBackend) with configurable latency and failure
+rates, and the audio recorder component returns a synthetic clip.
+
+Reports p50/p95/p99 per stage (question generation, transcription,
+evaluation, report render, script runs), server thread occupancy and traced
+memory per session, and writes everything as JSON for run-to-run comparison.
+
+    python benchmarks/load_test.py --candidates 20 --llm-latency 1.5 --stt-latency 0.8 --output load.json
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+from common import ROOT, summarize, synthetic_clip, write_results
+
+# The stand-ins must be selected before the app modules read their configuration
+os.environ["LLM_BACKEND"] = "stub"
+os.environ["SPEECH_BACKEND"] = "stub"
+os.environ.setdefault("QUESTION_BANK_PATH", os.path.join(tempfile.mkdtemp(), "question_bank.db"))
+os.environ.setdefault("EVALUATION_CACHE_PATH", "")
+os.environ.setdefault("AUDIO_STORE_PATH", os.path.join(tempfile.mkdtemp(), "audio_store"))
+
+from streamlit.runtime.runtime import Runtime  # noqa: E402
+from streamlit.runtime.scriptrunner import magic  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+import config  # noqa: E402
+import llm  # noqa: E402
+import pipeline  # noqa: E402
+import prescorer  # noqa: E402
+import speech  # noqa: E402
+import audio_recorder_streamlit  # noqa: E402
+
+APP_PATH = os.path.join(ROOT, "app.py")
+
+# Every AppTest compiles the script itself, and CPython 3.11's parser is not
+# safe to run from several threads at once
+_parse_lock = threading.Lock()
+_add_magic = magic.add_magic
+
+
+def _locked_add_magic(*args, **kwargs):
+    with _parse_lock:
+        return _add_magic(*args, **kwargs)
+
+
+magic.add_magic = _locked_add_magic
+
+# AppTest installs a mock Runtime for the length of each run and clears it
+# afterwards, which would pull it out from under the other sessions' runs.
+# Keep serving the last mock instead so sessions can run concurrently.
+_last_runtime = []
+
+
+def _shared_instance(cls):
+    if cls._instance is not None:
+        _last_runtime[:] = [cls._instance]
+        return cls._instance
+    if _last_runtime:
+        return _last_runtime[0]
+    raise RuntimeError("Runtime hasn't been created!")
+
+
+Runtime.instance = classmethod(_shared_instance)
+Runtime.exists = classmethod(lambda cls: cls._instance is not None or bool(_last_runtime))
+
+
+class Recorder:
+    """Thread-safe collection of stage timings and script-thread occupancy."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.timings: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.running_scripts = 0
+        self.peak_running_scripts = 0
+        self.script_busy_seconds = 0.0
+
+    def record(self, stage: str, seconds: float):
+        with self._lock:
+            self.timings[stage].append(seconds)
+
+    def error(self, stage: str):
+        with self._lock:
+            self.errors[stage] += 1
+
+    def timed(self, stage: str, func: Callable) -> Callable:
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - started)
+        return wrapper
+
+    def run_script(self, at: AppTest) -> AppTest:
+        """Run one script execution, counting it as a busy server thread."""
+        with self._lock:
+            self.running_scripts += 1
+            self.peak_running_scripts = max(self.peak_running_scripts, self.running_scripts)
+        started = time.perf_counter()
+        try:
+            return at.run()
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.running_scripts -= 1
+                self.script_busy_seconds += elapsed
+                self.timings["script_run"].append(elapsed)
+
+
+def install_stand_ins(args, recorder: Recorder, clip: bytes):
+    """Swap in stub backends, a scripted recorder component and timing wrappers."""
+    llm.set_backend(llm.StubBackend(latency=args.llm_latency, jitter=args.llm_jitter,
+                                    failure_rate=args.llm_failure_rate, seed=args.seed))
+    speech.set_backend(speech.StubBackend(latency=args.stt_latency, jitter=args.stt_jitter,
+                                          failure_rate=args.stt_failure_rate, seed=args.seed))
+
+    def fake_recorder(*_args, **_kwargs):
+        # Returns audio once per answer the simulated candidate "records"
+        import streamlit as st
+        if st.session_state.get("_bench_answer"):
+            st.session_state["_bench_answer"] = False
+            return clip
+        return None
+
+    # ui imports the component when an interview reaches recording, so patch it at the source
+    audio_recorder_streamlit.audio_recorder = fake_recorder
+    pipeline.transcribe_audio = recorder.timed("transcription", pipeline.transcribe_audio)
+    pipeline.evaluate_answer_with_gemini = recorder.timed("evaluation", pipeline.evaluate_answer_with_gemini)
+    pipeline.evaluate_answers_batch_with_gemini = recorder.timed(
+        "evaluation_batch", pipeline.evaluate_answers_batch_with_gemini
+    )
+
+    stream_questions = pipeline.stream_questions_with_gemini
+
+    def timed_stream(*a, **kw):
+        started = time.perf_counter()
+        first = True
+        for question in stream_questions(*a, **kw):
+            if first:
+                recorder.record("question_generation_first", time.perf_counter() - started)
+                first = False
+            yield question
+        recorder.record("question_generation_full", time.perf_counter() - started)
+
+    pipeline.stream_questions_with_gemini = timed_stream
+
+    config.INTERVIEW_CONFIG["prepare_seconds"] = 0
+    config.INTERVIEW_CONFIG["transition_seconds"] = 0
+    config.QUESTION_BANK_CONFIG["enabled"] = args.question_bank
+    config.EVALUATION_CACHE_CONFIG["enabled"] = args.evaluation_cache
+    config.EVALUATION_CONFIG["mode"] = args.evaluation_mode
+
+
+# Interval of ui._next_question_wait
+NEXT_QUESTION_POLL_SECONDS = 1.0
+
+
+def _button(at: AppTest, label: str):
+    for button in at.button:
+        if button.label == label:
+            return button
+    return None
+
+
+def run_candidate(index: int, args, recorder: Recorder) -> Dict[str, Any]:
+    """Walk one simulated candidate through the whole interview."""
+    started = time.perf_counter()
+    at = AppTest.from_file(APP_PATH, default_timeout=args.timeout)
+    recorder.run_script(at)
+    at.text_input[0].input(f"Candidate {index}")
+    at.number_input[0].set_value(index % 15)
+    at.button[0].click()
+    t0 = time.perf_counter()
+    recorder.run_script(at)
+    recorder.record("loading_screen", time.perf_counter() - t0)
+
+    for _ in range(args.max_steps):
+        if at.exception:
+            recorder.error("script_exception")
+            break
+        if at.session_state.stage != "interview":
+            break
+        view_results = _button(at, "View Results")
+        if view_results is not None:
+            view_results.click()
+        elif _button(at, "Restart") is not None:
+            recorder.error("no_questions")
+            break
+        elif any(info.value == "Preparing your next question..." for info in at.info):
+            # The page polls from a fragment until the question streams in, like a browser would
+            time.sleep(NEXT_QUESTION_POLL_SECONDS)
+        else:
+            at.session_state["_bench_answer"] = True
+        recorder.run_script(at)
+        time.sleep(args.think_time)
+
+    t0 = time.perf_counter()
+    for _ in range(args.max_steps):
+        if at.exception or (at.session_state.stage == "results" and len(at.tabs) > 0):
+            break
+        if at.session_state.stage == "results":
+            # Answers still being scored: the progress fragment checks again after this interval
+            time.sleep(config.EVALUATION_CONFIG["results_poll_interval"])
+        recorder.run_script(at)
+    recorder.record("results_ready", time.perf_counter() - t0)
+
+    # A plain rerun of the finished report, as on any tab click
+    t0 = time.perf_counter()
+    recorder.run_script(at)
+    recorder.record("report_render", time.perf_counter() - t0)
+    recorder.record("session_total", time.perf_counter() - started)
+
+    answers = at.session_state.answers if "answers" in at.session_state else []
+    failed = sum(1 for answer in answers if answer.evaluation.error)
+    if failed:
+        recorder.error("failed_answers")
+    return {"at": at, "answers": len(answers), "failed_answers": failed}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--candidates", type=int, default=10)
+    parser.add_argument("--think-time", type=float, default=0.0, help="seconds between a candidate's actions")
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    parser.add_argument("--llm-jitter", type=float, default=0.2)
+    parser.add_argument("--llm-failure-rate", type=float, default=0.0)
+    parser.add_argument("--stt-latency", type=float, default=0.3)
+    parser.add_argument("--stt-jitter", type=float, default=0.1)
+    parser.add_argument("--stt-failure-rate", type=float, default=0.0)
+    parser.add_argument("--evaluation-mode", choices=["per_answer", "batched", "deferred"],
+                        default=config.EVALUATION_CONFIG["mode"])
+    parser.add_argument("--question-bank", action="store_true", help="serve questions from the question bank")
+    parser.add_argument("--evaluation-cache", action="store_true", help="allow cached evaluations")
+    parser.add_argument("--no-memory", action="store_true", help="skip tracemalloc (it slows the run down)")
+    parser.add_argument("--timeout", type=float, default=120.0, help="per script run")
+    parser.add_argument("--max-steps", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    recorder = Recorder()
+    install_stand_ins(args, recorder, synthetic_clip(np.random.default_rng(args.seed)))
+
+    peak_threads = threading.active_count()
+    stop = threading.Event()
+
+    def sample_threads():
+        nonlocal peak_threads
+        while not stop.wait(0.05):
+            peak_threads = max(peak_threads, threading.active_count())
+
+    sampler = threading.Thread(target=sample_threads, daemon=True)
+    sampler.start()
+    if not args.no_memory:
+        tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0] if not args.no_memory else 0
+
+    # One sequential session first, so the shared runtime exists before the load starts
+    run_candidate(-1, args, recorder)
+    recorder.timings.clear()
+    recorder.errors.clear()
+    recorder.script_busy_seconds = 0.0
+    llm_calls = llm.get_client().backend.calls
+    prescored = prescorer.stats()
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.candidates) as executor:
+        sessions = list(executor.map(lambda i: run_candidate(i, args, recorder), range(args.candidates)))
+    wall = time.perf_counter() - wall_start
+    stop.set()
+
+    memory = {}
+    if not args.no_memory:
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        memory = {
+            "per_session_bytes": (current - baseline) / max(1, args.candidates),
+            "peak_traced_bytes": peak - baseline,
+        }
+
+    results = {
+        "params": vars(args),
+        "wall_seconds": wall,
+        "stages": {stage: summarize(values) for stage, values in sorted(recorder.timings.items())},
+        "threads": {
+            "script_busy_seconds": recorder.script_busy_seconds,
+            "mean_busy_script_threads": recorder.script_busy_seconds / wall if wall else 0.0,
+            "peak_concurrent_scripts": recorder.peak_running_scripts,
+            "peak_process_threads": peak_threads,
+        },
+        "memory": memory,
+        "errors": dict(recorder.errors),
+        "answers": sum(s["answers"] for s in sessions),
+        "failed_answers": sum(s["failed_answers"] for s in sessions),
+        "llm_calls": llm.get_client().backend.calls - llm_calls,
+    }
+    checked = prescorer.stats()["checked"] - prescored["checked"]
+    scored_locally = prescorer.stats()["scored_locally"] - prescored["scored_locally"]
+    results["prescorer"] = {
+        "checked": checked,
+        "scored_locally": scored_locally,
+        "llm_calls_avoided": scored_locally / checked if checked else 0.0,
+    }
+
+    print(f"{args.candidates} candidates in {wall:.1f}s, {results['answers']} answers, "
+          f"{results['failed_answers']} failed, {results['llm_calls']} LLM calls")
+    for stage, summary in results["stages"].items():
+        print(f"  {stage:<26} p50 {summary['p50']:.3f}s  p95 {summary['p95']:.3f}s  "
+              f"p99 {summary['p99']:.3f}s  (n={summary['count']})")
+    print(f"  mean busy script threads {results['threads']['mean_busy_script_threads']:.2f}, "
+          f"peak process threads {peak_threads}")
+    print(f"  prescorer: {scored_locally} of {checked} answers scored locally, "
+          f"{results['prescorer']['llm_calls_avoided']:.1%} of LLM evaluations avoided")
+    if memory:
+        print(f"  memory per session {memory['per_session_bytes'] / 1024:.0f} KiB")
+    write_results(args.output, results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
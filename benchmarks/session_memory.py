@@ -0,0 +1,89 @@
+"""Memory per session for interview state held as plain dicts versus typed slotted records.
+
+Builds N completed sessions (questions, answers and evaluations) in the old
+dict layout and as records.Question/Answer/Evaluation, measures the traced
+memory of each, and reports the size of one session's checkpoint in the
+session store.
+
+    python benchmarks/session_memory.py --sessions 1000 --output session_memory.json
+"""
+import argparse
+import gc
+import json
+import sys
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from common import write_results
+
+from llm import _default_stub_responder
+from records import Answer, Evaluation, Question
+
+ANSWER_TEXT = "You type equals SUM, open a bracket and select the range A1 to A10, then press enter."
+EVALUATION = {"score": 70, "rating": "good", "feedback": "Covers the syntax and the range.", "matches": 2, "total_points": 3}
+
+
+def _question_dicts(session: int) -> List[Dict[str, Any]]:
+    questions = json.loads(_default_stub_responder("", "questions"))
+    for q in questions:
+        # Distinct strings per session, as real generated questions would be
+        q["question"] = f"{q['question']} ({session})"
+    return questions
+
+
+def dict_session(session: int) -> Dict[str, Any]:
+    """Interview state in the layout used before typed records."""
+    questions = _question_dicts(session)
+    answers = [
+        {"question": q["question"], "answer": f"{ANSWER_TEXT} {session}", "evaluation": dict(EVALUATION), "category": q["category"]}
+        for q in questions
+    ]
+    return {"interview_questions": questions, "answers": answers}
+
+
+def record_session(session: int) -> Dict[str, Any]:
+    """The same state as slotted records, with answers referencing their question."""
+    questions = [Question.from_dict(q) for q in _question_dicts(session)]
+    answers = [Answer(q, f"{ANSWER_TEXT} {session}", Evaluation.from_dict(EVALUATION)) for q in questions]
+    return {"interview_questions": questions, "answers": answers}
+
+
+def measure(build: Callable[[int], Dict[str, Any]], sessions: int) -> float:
+    """Traced bytes per session for `sessions` live sessions."""
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    held = [build(i) for i in range(sessions)]
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del held
+    return (current - baseline) / sessions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    dicts = measure(dict_session, args.sessions)
+    records = measure(record_session, args.sessions)
+    session = record_session(0)
+    checkpoint_bytes = len(json.dumps(
+        {"interview_questions": [q.to_dict() for q in session["interview_questions"]]}, separators=(",", ":")
+    )) + sum(len(json.dumps(a.to_dict(), separators=(",", ":"))) for a in session["answers"])
+
+    results = {
+        "params": vars(args),
+        "bytes_per_session": {"dicts": dicts, "records": records},
+        "reduction": 1 - records / dicts if dicts else 0.0,
+        "checkpoint_bytes": checkpoint_bytes,
+    }
+    print(f"Per session: dicts {dicts / 1024:.1f} KiB, records {records / 1024:.1f} KiB "
+          f"({100 * results['reduction']:.0f}% smaller); checkpoint {checkpoint_bytes / 1024:.1f} KiB")
+    write_results(args.output, results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""Prompt size, token usage, latency and parse failures with and without structured output.
+
+Sends the same question generation, evaluation and batch evaluation requests
+in free-form mode (format described in the prompt, response cleaned up before
+parsing) and in structured mode (response MIME type and schema, parsed as is),
+then validates every item with the typed records.
+
+Each mode runs with the schema-sized and the fixed output token limits
+(config.OUTPUT_TOKEN_LIMITS) to show whether the tighter limits truncate
+responses. The stub backend simulates this: every call spends a random number
+of thinking tokens (exponential, mean --thinking-tokens) out of the limit and
+the response is cut off at what is left, so parse failures appear once
+thinking crowds out the answer.
+
+Prompt sizes are exact with any backend. Latency and real token usage need
+--backend gemini, which needs GOOGLE_API_KEY.
+
+    python benchmarks/structured_output.py --backend gemini --calls 20 --output structured.json
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List
+
+from common import summarize, write_results
+
+from config import EVALUATION_CONFIG, GENERATION_PROFILES, OUTPUT_TOKEN_LIMITS
+from llm import GeminiBackend, LLMBackend, StubBackend, _default_stub_responder
+from prompts import BATCH_EVALUATION_PROMPT, EVALUATION_PROMPT, QUESTIONS_PROMPT, render
+from records import Evaluation, Question, ValidationError
+from utils import _clean_json_response
+
+SAMPLE_QUESTION = {
+    "question": "How would you find a product's price in another sheet using its product code?",
+    "category": "Lookup Functions",
+    "expected_points": ["Use VLOOKUP or XLOOKUP", "Exact match lookup", "Reference the other sheet's range"],
+}
+SAMPLE_ANSWERS = [
+    "I would use XLOOKUP with the product code, the code column on the prices sheet and the price column.",
+    "VLOOKUP with FALSE as the last argument so it only returns exact matches.",
+    "I usually copy the prices over by hand.",
+    "INDEX and MATCH, with match type zero, pointing at the Prices sheet.",
+    "I'm not sure, maybe a pivot table?",
+]
+
+
+def prompts(structured: bool) -> Dict[str, str]:
+    batch = [
+        {"id": i, "question": SAMPLE_QUESTION["question"], "expected_points": SAMPLE_QUESTION["expected_points"], "answer": a}
+        for i, a in enumerate(SAMPLE_ANSWERS)
+    ]
+    # Free-form mode keeps the indented batch JSON the prompt used to carry
+    answers = json.dumps(batch, separators=(",", ":")) if structured else json.dumps(batch, indent=2)
+    return {
+        "questions": render("questions", QUESTIONS_PROMPT, structured, count=10, years_of_experience=3, avoid=""),
+        "evaluation": render("evaluation", EVALUATION_PROMPT, structured, question=SAMPLE_QUESTION["question"],
+                             expected_points="; ".join(SAMPLE_QUESTION["expected_points"]), answer=SAMPLE_ANSWERS[0]),
+        "batch_evaluation": render("batch_evaluation", BATCH_EVALUATION_PROMPT, structured, answers=answers),
+    }
+
+
+def parse(profile: str, text: str, structured: bool) -> int:
+    """Number of items that fail to parse or validate (the whole response counts as one if it is not JSON)."""
+    try:
+        data = json.loads(text if structured else _clean_json_response(text))
+    except json.JSONDecodeError:
+        return 1
+    items: List[Any] = [data] if profile == "evaluation" else data if isinstance(data, list) else [None]
+    validate: Callable[[Any], Any] = Question.parse if profile == "questions" else Evaluation.parse
+    failures = 0
+    for item in items:
+        try:
+            validate(item)
+        except ValidationError:
+            failures += 1
+    return failures
+
+
+def thinking_stub(limits: Dict[str, int], mean_thinking: float, seed: int) -> StubBackend:
+    """Stub whose responses are cut off where simulated thinking leaves no more of the output limit."""
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    def responder(prompt: str, profile: str) -> str:
+        with lock:
+            thinking = rng.expovariate(1 / mean_thinking) if mean_thinking > 0 else 0
+        text = _default_stub_responder(prompt, profile)
+        # Roughly four characters per token, as in the stub's usage counts
+        return text[:max(0, int(limits[profile] - thinking)) * 4]
+    return StubBackend(responder)
+
+
+def run(backend: LLMBackend, structured: bool, calls: int, timeout: float, limits: Dict[str, int]) -> Dict[str, Any]:
+    results = {}
+    for profile, prompt in prompts(structured).items():
+        latencies, prompt_tokens, response_tokens, failures, errors, truncated = [], [], [], 0, 0, 0
+        for _ in range(calls):
+            started = time.perf_counter()
+            try:
+                response = backend.generate(prompt, profile, timeout)
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+            prompt_tokens.append(response.usage.get("prompt_tokens", 0))
+            response_tokens.append(response.usage.get("response_tokens", 0))
+            truncated += response.usage.get("truncated", 0)
+            failures += 1 if parse(profile, response.text, structured) else 0
+        results[profile] = {
+            "prompt_chars": len(prompt),
+            "latency": summarize(latencies),
+            "prompt_tokens": summarize(prompt_tokens)["mean"],
+            "response_tokens": summarize(response_tokens)["mean"],
+            "max_output_tokens": limits[profile],
+            "truncated": truncated,
+            "parse_failure_rate": failures / len(latencies) if latencies else 0.0,
+            "errors": errors,
+        }
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=["stub", "gemini"], default="stub")
+    parser.add_argument("--calls", type=int, default=10, help="requests per profile and mode")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--thinking-tokens", type=float, default=512,
+                        help="mean thinking tokens per call spent by the stub backend")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    modes = {}
+    for limit_name, limits in OUTPUT_TOKEN_LIMITS.items():
+        profiles = {name: dict(profile, max_output_tokens=limits[name]) for name, profile in GENERATION_PROFILES.items()}
+        for name, structured in (("free_form", False), ("structured", True)):
+            if args.backend == "gemini":
+                backend = GeminiBackend(profiles=profiles, structured_output=structured)
+            else:
+                backend = thinking_stub(limits, args.thinking_tokens, args.seed)
+            modes[f"{name}/{limit_name}"] = run(backend, structured, args.calls, args.timeout, limits)
+
+    print(f"{'profile':<18}{'mode/limits':<19}{'max out':>8}{'prompt chars':>13}{'prompt tok':>11}{'resp tok':>10}"
+          f"{'p50 s':>8}{'p95 s':>8}{'parse fail':>11}")
+    for profile in GENERATION_PROFILES:
+        for name, results in modes.items():
+            r = results[profile]
+            print(f"{profile:<18}{name:<19}{r['max_output_tokens']:>8}{r['prompt_chars']:>13}{r['prompt_tokens']:>11.0f}"
+                  f"{r['response_tokens']:>10.0f}{r['latency']['p50']:>8.2f}{r['latency']['p95']:>8.2f}"
+                  f"{r['parse_failure_rate']:>10.1%}")
+    write_results(args.output, {"params": vars(args), "max_batch_size": EVALUATION_CONFIG["max_batch_size"], "modes": modes})
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+"""Concurrent-session capacity of the prepare/transition timers, before and after fragment-based timers.
+
+The old interview_screen slept inside the script thread (40 s countdown plus a
+6 s transition), so every waiting candidate held a server thread for the whole
+wait. The fragment timers rerun a tiny render once per second and hold no
+thread in between.
+
+Measured part: real app sessions are driven with Streamlit's AppTest (stub
+backends, as in load_test.py) into the prepare countdown. They are rerun once
+per second on --threads worker threads for --measure-seconds, and the run
+reports the rerun cost and how late reruns started. AppTest cannot trigger a
+fragment on its own, so each tick is a full script rerun of the waiting page,
+an upper bound on the cost of a fragment rerun.
+
+Model part: a discrete-event simulation of one server process with a fixed
+budget of script threads, using the measured rerun cost as the tick cost
+(--tick-cost overrides it; with --no-measure the model runs alone). Candidates
+arrive uniformly over --arrival-window seconds. A configuration "holds" N
+sessions when the p95 delay before a timer render gets a thread stays under
+--max-lateness seconds. These capacities are model estimates, not measurements.
+
+    python benchmarks/timer_capacity.py --threads 64 --measure-sessions 32 --output timer_capacity.json
+"""
+import argparse
+import heapq
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+import numpy as np
+
+from common import percentile, summarize, synthetic_clip, write_results
+
+
+def _simulate(jobs: List[tuple], threads: int) -> List[float]:
+    """Run (ready_time, duration) jobs on `threads` workers and return each job's queueing delay."""
+    free = [0.0] * threads
+    delays = []
+    for ready, duration in sorted(jobs):
+        worker_free = heapq.heappop(free)
+        start = max(ready, worker_free)
+        delays.append(start - ready)
+        heapq.heappush(free, start + duration)
+    return delays
+
+
+def blocking_jobs(sessions: int, args, rng: random.Random) -> List[tuple]:
+    """One job per session holding a thread for the whole prepare + transition wait."""
+    hold = args.prepare_seconds + args.transition_seconds
+    return [(rng.uniform(0, args.arrival_window), hold) for _ in range(sessions)]
+
+
+def fragment_jobs(sessions: int, args, rng: random.Random) -> List[tuple]:
+    """One short render per second of waiting for each session."""
+    jobs = []
+    ticks = args.prepare_seconds + args.transition_seconds
+    for _ in range(sessions):
+        arrival = rng.uniform(0, args.arrival_window)
+        jobs.extend((arrival + tick, args.tick_cost) for tick in range(ticks))
+    return jobs
+
+
+def capacity(model, args) -> Dict[str, float]:
+    """Largest session count whose p95 render delay stays under the limit."""
+    def holds(sessions: int) -> bool:
+        delays = _simulate(model(sessions, args, random.Random(args.seed)), args.threads)
+        return percentile(delays, 95) <= args.max_lateness
+
+    low, high = 0, 1
+    while high <= args.max_sessions and holds(high):
+        low, high = high, high * 2
+    high = min(high, args.max_sessions + 1)
+    while high - low > 1:
+        mid = (low + high) // 2
+        if holds(mid):
+            low = mid
+        else:
+            high = mid
+    return {"max_sessions": low, "capped": low >= args.max_sessions}
+
+
+def _waiting_session(load_test, index: int):
+    """An app session started and left in the prepare countdown of its first question."""
+    at = load_test.AppTest.from_file(load_test.APP_PATH, default_timeout=60)
+    at.run()
+    at.text_input[0].input(f"Candidate {index}")
+    at.button[0].click()
+    at.run()
+    while at.session_state.stage != "interview" and not at.exception:
+        at.run()
+    return at
+
+
+def measure(args) -> Dict[str, Any]:
+    """Rerun real waiting sessions once a second and time the reruns and their lateness."""
+    # Imported here: it selects the stub backends and patches AppTest for concurrent sessions
+    import load_test
+
+    stand_ins = argparse.Namespace(llm_latency=0.0, llm_jitter=0.0, llm_failure_rate=0.0, stt_latency=0.0,
+                                   stt_jitter=0.0, stt_failure_rate=0.0, seed=args.seed, question_bank=False,
+                                   evaluation_cache=False, evaluation_mode="batched")
+    load_test.install_stand_ins(stand_ins, load_test.Recorder(), synthetic_clip(np.random.default_rng(args.seed)))
+    # Keep every session in its countdown for the whole measurement
+    load_test.config.INTERVIEW_CONFIG["prepare_seconds"] = args.measure_seconds + 3600
+    sessions = [_waiting_session(load_test, i) for i in range(args.measure_sessions)]
+
+    costs, lateness = [], []
+
+    def tick(at, due: float):
+        started = time.perf_counter()
+        lateness.append(started - due)
+        at.run()
+        costs.append(time.perf_counter() - started)
+
+    rng = random.Random(args.seed)
+    start = time.perf_counter() + 1.0
+    # Each session ticks once a second from its own random phase, like candidates who started at different times
+    due = sorted((start + rng.random() + second, i) for i in range(len(sessions)) for second in range(int(args.measure_seconds)))
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        for when, i in due:
+            time.sleep(max(0.0, when - time.perf_counter()))
+            executor.submit(tick, sessions[i], when)
+    return {
+        "sessions": len(sessions),
+        "exceptions": sum(1 for at in sessions if at.exception),
+        "rerun_seconds": summarize(costs),
+        "lateness_seconds": summarize(lateness),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=64, help="script threads the server process can run at once")
+    parser.add_argument("--tick-cost", type=float, help="model: seconds of thread time per fragment rerun (default: measured p50)")
+    parser.add_argument("--no-measure", action="store_true", help="only run the model (tick cost defaults to 0.01 s)")
+    parser.add_argument("--measure-sessions", type=int, default=16, help="real sessions driven with AppTest")
+    parser.add_argument("--measure-seconds", type=float, default=10.0)
+    parser.add_argument("--prepare-seconds", type=int, default=40)
+    parser.add_argument("--transition-seconds", type=int, default=6)
+    parser.add_argument("--arrival-window", type=float, default=10.0)
+    parser.add_argument("--max-lateness", type=float, default=0.25)
+    parser.add_argument("--max-sessions", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    results: Dict[str, Any] = {"params": vars(args)}
+    if not args.no_measure:
+        results["measured"] = measure(args)
+        if args.tick_cost is None:
+            args.tick_cost = results["measured"]["rerun_seconds"]["p50"]
+    if args.tick_cost is None:
+        args.tick_cost = 0.01
+    wait = args.prepare_seconds + args.transition_seconds
+    results["model"] = {
+        "tick_cost": args.tick_cost,
+        "thread_seconds_per_question": {
+            "blocking": wait,
+            "fragment": wait * args.tick_cost,
+        },
+        "blocking": capacity(blocking_jobs, args),
+        "fragment": capacity(fragment_jobs, args),
+    }
+    results["elapsed_seconds"] = time.perf_counter() - started
+
+    print(f"Thread budget: {args.threads}")
+    if "measured" in results:
+        m = results["measured"]
+        print(f"Measured: {m['sessions']} real waiting sessions rerun once a second: rerun p50 {m['rerun_seconds']['p50'] * 1000:.1f} ms, "
+              f"p95 {m['rerun_seconds']['p95'] * 1000:.1f} ms; start lateness p95 {m['lateness_seconds']['p95'] * 1000:.1f} ms")
+    model = results["model"]
+    print(f"Model (simulated, tick cost {args.tick_cost * 1000:.1f} ms):")
+    print(f"  Blocking sleep timers: {model['blocking']['max_sessions']} concurrent sessions")
+    print(f"  Fragment timers:       {model['fragment']['max_sessions']} concurrent sessions"
+          + (" (capped)" if model["fragment"]["capped"] else ""))
+    write_results(args.output, results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""Latency and throughput of the speech-to-text backends on a set of recorded answers.
+
+Every WAV file in the clips directory is transcribed with each backend at the
+given concurrency, the same way the app's answer workers call
+speech.transcribe. Backend start-up (model load, process pool spawn) is timed
+separately from steady-state latency.
+
+    python benchmarks/transcription_backends.py recordings/ --backends google vosk --concurrency 4 --output stt.json
+"""
+import argparse
+import glob
+import io
+import os
+import sys
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+from common import summarize, write_results
+
+import speech
+
+
+def _duration(audio_bytes: bytes) -> float:
+    with wave.open(io.BytesIO(audio_bytes)) as wav:
+        return wav.getnframes() / wav.getframerate()
+
+
+def run_backend(name: str, clips: List[bytes], concurrency: int, repeat: int) -> Dict[str, Any]:
+    """Transcribe every clip `repeat` times and collect timings."""
+    started = time.perf_counter()
+    try:
+        # Warm up: loads the model / spawns the pool outside the timed section
+        speech.transcribe(clips[0], name)
+    except Exception:
+        pass
+    startup = time.perf_counter() - started
+
+    latencies: List[float] = []
+    errors: List[str] = []
+
+    def one(audio_bytes: bytes):
+        t0 = time.perf_counter()
+        try:
+            speech.transcribe(audio_bytes, name)
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}")
+        latencies.append(time.perf_counter() - t0)
+
+    work = clips * repeat
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one, work))
+    wall = time.perf_counter() - wall_start
+    audio_seconds = sum(_duration(c) for c in work)
+    return {
+        "startup_seconds": startup,
+        "latency_seconds": summarize(latencies),
+        "errors": len(errors),
+        "error_samples": errors[:5],
+        "clips_per_minute": len(work) / wall * 60 if wall else 0.0,
+        "audio_seconds_per_second": audio_seconds / wall if wall else 0.0,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("clips", help="directory of .wav recordings")
+    parser.add_argument("--backends", nargs="+", default=list(speech.BACKENDS))
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    paths = sorted(glob.glob(os.path.join(args.clips, "*.wav")))
+    if not paths:
+        print(f"No .wav files found in {args.clips}")
+        return 1
+    clips = []
+    for path in paths:
+        with open(path, "rb") as f:
+            clips.append(f.read())
+
+    results = {"params": vars(args), "backends": {}}
+    for name in args.backends:
+        result = run_backend(name, clips, args.concurrency, args.repeat)
+        results["backends"][name] = result
+        latency = result["latency_seconds"]
+        print(f"{name:>8}: p50 {latency['p50']:.2f}s  p95 {latency['p95']:.2f}s  "
+              f"{result['clips_per_minute']:.1f} clips/min  startup {result['startup_seconds']:.2f}s  "
+              f"errors {result['errors']}")
+        if result["error_samples"]:
+            print(f"          first error: {result['error_samples'][0]}")
+    write_results(args.output, results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,6 +14,189 @@ GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY", "")
 # Speech Recognition Settings
 SPEECH_CONFIG = {
     "language": "en-US",
-    "timeout": 5,
-    "phrase_time_limit": 30
+    "timeout": 5,  # seconds per recognition request
+    "phrase_time_limit": 30,  # longest stretch of audio sent in one request
+    "backend": os.getenv("SPEECH_BACKEND", "google"),  # "google" (online), "vosk" (offline) or "stub"
+    "vosk_model_path": os.getenv("VOSK_MODEL_PATH", "models/vosk-model-small-en-us-0.15"),
+    "workers": int(os.getenv("SPEECH_WORKERS", "2")),  # processes for CPU-bound offline decoding
+    # Long answers are split at pauses and the segments transcribed in parallel
+    "segment_seconds": 15,  # maximum segment length
+    "min_segment_seconds": 5,
+    "segment_overlap_ms": 250,
+    "segment_workers": 4,  # threads for online backends; offline backends use the process pool
+}
+
+# Gemini Client Settings
+GEMINI_CONFIG = {
+    "backend": os.getenv("LLM_BACKEND", "gemini"),  # "gemini" or "stub"
+    "model": "gemini-2.5-flash",
+    "timeout": 60,
+    "max_retries": 2,
+    "backoff_base": 1.0,
+    "backoff_max": 8.0,
+    # Process-wide request scheduler, tuned to the project's Gemini quota
+    "requests_per_minute": int(os.getenv("GEMINI_RPM", "1000")),
+    "tokens_per_minute": int(os.getenv("GEMINI_TPM", "1000000")),  # 0 to only limit requests
+    "burst_seconds": 5,  # unused quota that may accumulate for bursts
+    "max_concurrent": int(os.getenv("GEMINI_MAX_CONCURRENT", "32")),
+    "coalesce": True,  # identical in-flight requests share one response
+    # Ask for JSON constrained to the response schemas in prompts.py instead of describing the format in the prompt
+    "structured_output": os.getenv("GEMINI_STRUCTURED_OUTPUT", "1") == "1",
+}
+
+# Output token limits per kind of LLM call. "schema" sizes them from the response schemas
+# (about 128 tokens per generated question, 192 per evaluation, 10 questions per interview and
+# at most 10 answers per batch) plus room for the model's thinking, which Gemini 2.5 models
+# count against max_output_tokens and this SDK cannot cap. "fixed" keeps the earlier generous limits.
+OUTPUT_LIMITS = os.getenv("GEMINI_OUTPUT_LIMITS", "schema")  # "schema" or "fixed"
+THINKING_TOKEN_BUDGET = int(os.getenv("GEMINI_THINKING_BUDGET", "1536"))
+OUTPUT_TOKEN_LIMITS = {
+    "schema": {
+        "questions": 10 * 128 + THINKING_TOKEN_BUDGET,
+        "evaluation": 192 + THINKING_TOKEN_BUDGET,
+        "batch_evaluation": 10 * 192 + THINKING_TOKEN_BUDGET,
+    },
+    "fixed": {
+        "questions": 8192,
+        "evaluation": 2048,
+        "batch_evaluation": 8192,
+    },
+}
+
+# Generation parameters per kind of LLM call
+GENERATION_PROFILES = {
+    "questions": {
+        "temperature": 0.7,
+        "top_p": 0.95,
+        "top_k": 40,
+        "max_output_tokens": OUTPUT_TOKEN_LIMITS[OUTPUT_LIMITS]["questions"],
+    },
+    "evaluation": {
+        "temperature": 0.7,
+        "top_p": 0.95,
+        "top_k": 40,
+        "max_output_tokens": OUTPUT_TOKEN_LIMITS[OUTPUT_LIMITS]["evaluation"],
+    },
+    "batch_evaluation": {
+        "temperature": 0.7,
+        "top_p": 0.95,
+        "top_k": 40,
+        "max_output_tokens": OUTPUT_TOKEN_LIMITS[OUTPUT_LIMITS]["batch_evaluation"],
+    },
+}
+
+# Experience bands used to share pre-generated questions between candidates
+EXPERIENCE_BANDS = [
+    {"name": "beginner", "min_years": 0, "max_years": 1},
+    {"name": "intermediate", "min_years": 2, "max_years": 4},
+    {"name": "advanced", "min_years": 5, "max_years": 9},
+    {"name": "expert", "min_years": 10, "max_years": 50},
+]
+
+# Question Bank Settings
+QUESTION_BANK_CONFIG = {
+    "enabled": os.getenv("QUESTION_BANK_ENABLED", "1") == "1",
+    "path": os.getenv("QUESTION_BANK_PATH", "question_bank.db"),
+    "questions_per_interview": 10,
+    "max_uses": 25,  # retire a question after it has been served this many times
+    "min_available": 40,  # refill a band when fewer usable questions remain
+    "refill_interval": 60,  # seconds between refill checks
+}
+
+# Background Answer Processing
+EVALUATION_CONFIG = {
+    "workers": int(os.getenv("EVALUATION_WORKERS", "8")),
+    # "per_answer": one request per answer; "batched": score every `batch_size` answers;
+    # "deferred": score everything once the interview ends
+    "mode": os.getenv("EVALUATION_MODE", "batched"),
+    "batch_size": 5,
+    "max_batch_size": 10,  # larger batches are split into requests of at most this many answers
+    "results_poll_interval": 1.0,  # seconds between checks of answers still being evaluated on the results screen
+    "pdf_poll_interval": 1.0,  # seconds between checks of a PDF report still rendering
+}
+
+# Per-answer time budgets and hedged LLM requests
+DEADLINE_CONFIG = {
+    "answer_seconds": float(os.getenv("ANSWER_DEADLINE_SECONDS", "45")),  # transcription + evaluation of one answer
+    "transcription_seconds": 20,  # evaluation gets the rest of the answer budget
+    # A duplicate LLM request is sent once a call has run longer than this percentile of recent calls
+    "hedge": os.getenv("LLM_HEDGE", "1") == "1",
+    "hedge_percentile": 95,
+    "hedge_min_delay": 0.5,  # seconds; never hedge sooner
+    "hedge_min_samples": 20,  # latency samples per profile needed before hedging
+    "hedge_window": 200,
+    "hedge_budget": 0.05,  # at most this fraction of calls is hedged
+    "hedge_burst": 10,  # hedges that can be spent at once after a quiet period
+}
+
+# Interview Timing
+INTERVIEW_CONFIG = {
+    "prepare_seconds": 40,
+    "transition_seconds": 6,
+    # Start generating questions once the years of experience on the welcome screen is changed
+    "prefetch_questions": os.getenv("PREFETCH_QUESTIONS", "1") == "1",
+    "prefetch_settle_seconds": 1.0,  # wait this long for the value to stop changing before calling Gemini
+}
+
+# Audio preprocessing before transcription
+AUDIO_CONFIG = {
+    "enabled": True,
+    "target_sample_rate": 16000,  # native rate of the speech recognizers
+    "frame_ms": 30,
+    "energy_floor": 0.01,  # minimum RMS (full scale = 1.0) that can count as speech
+    "noise_factor": 3.0,  # speech must be this many times louder than the noise floor
+    "padding_ms": 200,  # silence kept around speech; longer pauses are shortened to twice this
+    "min_speech_ms": 300,  # recordings with less detected speech are rejected
+}
+
+# Recorded answers, compressed and stored once per distinct recording
+AUDIO_STORE_CONFIG = {
+    "enabled": os.getenv("AUDIO_STORE_ENABLED", "1") == "1",
+    "path": os.getenv("AUDIO_STORE_PATH", "audio_store"),
+    "codec": os.getenv("AUDIO_STORE_CODEC", "opus"),  # "opus", "mp3" or "wav"; compressed codecs need ffmpeg
+    "bitrate": "24k",
+    "sample_rate": 16000,
+}
+
+# Evaluation Cache
+EVALUATION_CACHE_CONFIG = {
+    "enabled": True,
+    "max_entries": 5000,  # in-process LRU size
+    "ttl_seconds": 7 * 24 * 3600,
+    "disk_path": os.getenv("EVALUATION_CACHE_PATH", "evaluation_cache.db"),  # empty to keep the cache in memory only
+}
+
+# Local pre-scoring of transcripts before any LLM call
+PRESCORER_CONFIG = {
+    "enabled": True,
+    "min_words": 1,  # answers with fewer content words (only filler and stopwords) are scored locally
+    "point_match_threshold": 0.5,  # weighted share of a key point's terms needed to count it as covered
+}
+
+# Per-stage tracing and metrics
+METRICS_CONFIG = {
+    "enabled": os.getenv("METRICS_ENABLED", "1") == "1",
+    "window": 2000,  # recent samples kept per stage for percentiles
+    "max_interviews": 500,  # interviews whose token spend is kept
+    "jsonl_path": os.getenv("METRICS_JSONL_PATH", ""),  # append every span as a JSON line; empty to disable
+    "host": os.getenv("METRICS_HOST", "127.0.0.1"),
+    "port": int(os.getenv("METRICS_PORT", "0")),  # Prometheus text endpoint at /metrics; 0 to disable
+    "admin_token": os.getenv("METRICS_ADMIN_TOKEN", ""),  # open ?admin=<token> for the metrics page; empty hides it
+    "token_prices": {"prompt": 0.30, "response": 2.50},  # USD per million tokens, for the spend estimate
+}
+
+# Interview checkpoints, so a session survives a worker restart or reconnect
+SESSION_STORE_CONFIG = {
+    "backend": os.getenv("SESSION_STORE", "sqlite"),  # "sqlite" or "memory"; a shared store implements SessionStore
+    "path": os.getenv("SESSION_STORE_PATH", "sessions.db"),
+    "ttl_seconds": 24 * 3600,  # checkpoints older than this are discarded
+}
+
+# Cohort analytics over completed interviews
+ANALYTICS_CONFIG = {
+    "enabled": os.getenv("ANALYTICS_ENABLED", "1") == "1",
+    "path": os.getenv("ANALYTICS_PATH", "analytics"),  # Parquet dataset, partitioned by completion date
+    "compact_threshold": 64,  # a day's per-interview files are merged into one once there are this many
+    "token": os.getenv("ANALYTICS_TOKEN", ""),  # open ?analytics=<token> for the cohort page; empty hides it
+    "min_attempts": 5,  # questions answered fewer times are left out of difficulty statistics
 }
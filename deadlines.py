@@ -0,0 +1,65 @@
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Optional
+
+_local = threading.local()
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when the time budget of the current answer has run out."""
+
+
+def current_deadline() -> Optional[float]:
+    """Absolute time.monotonic() deadline of the work running in this thread, if any."""
+    return getattr(_local, "deadline", None)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline, or None without one."""
+    deadline = current_deadline()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def expired() -> bool:
+    left = remaining()
+    return left is not None and left <= 0
+
+
+def timeout(default: float) -> float:
+    """A per-call timeout that does not outlast the current deadline."""
+    left = remaining()
+    if left is None:
+        return default
+    if left <= 0:
+        raise DeadlineExceeded("the answer's time budget ran out")
+    return min(default, left)
+
+
+@contextmanager
+def deadline(seconds: Optional[float]):
+    """Give the work in this block at most `seconds`, never extending an enclosing deadline."""
+    previous = current_deadline()
+    if seconds is not None:
+        new = time.monotonic() + seconds
+        _local.deadline = new if previous is None else min(previous, new)
+    try:
+        yield
+    finally:
+        _local.deadline = previous
+
+
+def bind(func: Callable) -> Callable:
+    """Wrap func so it runs under the calling thread's deadline, e.g. on a worker pool."""
+    captured = current_deadline()
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        previous = current_deadline()
+        _local.deadline = captured
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _local.deadline = previous
+    return wrapper
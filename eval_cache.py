@@ -0,0 +1,160 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import EVALUATION_CACHE_CONFIG
+from metrics import register_collector
+from prompts import EVALUATOR_VERSION
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS evaluations (
+    key TEXT PRIMARY KEY,
+    version TEXT NOT NULL,
+    evaluation TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+
+def normalize_answer(answer: str) -> str:
+    """Fold case, punctuation and whitespace so trivially different answers share a key."""
+    return " ".join(re.sub(r"[^\w\s]", " ", answer.lower()).split())
+
+
+def cache_key(question_data: Dict[str, Any], answer: str, version: str = EVALUATOR_VERSION) -> str:
+    payload = json.dumps(
+        [version, question_data["question"], list(question_data.get("expected_points", [])), normalize_answer(answer)]
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class EvaluationCache:
+    """Two-tier cache of evaluations: an in-process LRU with TTL, backed by an optional SQLite store.
+
+    Keys include the evaluator version, so changing the evaluator prompt or
+    model makes every older entry unreachable (and purges it from disk).
+    """
+
+    def __init__(self, max_entries: int = EVALUATION_CACHE_CONFIG["max_entries"],
+                 ttl_seconds: float = EVALUATION_CACHE_CONFIG["ttl_seconds"],
+                 disk_path: str = EVALUATION_CACHE_CONFIG["disk_path"], version: str = EVALUATOR_VERSION):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_path = disk_path
+        self.version = version
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if disk_path:
+            with self._connect() as conn:
+                conn.executescript(_SCHEMA)
+                conn.execute("DELETE FROM evaluations WHERE version != ?", (version,))
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.disk_path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _remember(self, key: str, created_at: float, evaluation: Dict[str, Any]):
+        with self._lock:
+            self._entries[key] = (created_at, evaluation)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get(self, question_data: Dict[str, Any], answer: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached evaluation, or None."""
+        key = cache_key(question_data, answer, self.version)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if now - entry[0] < self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return dict(entry[1])
+                del self._entries[key]
+                self.evictions += 1
+
+        if self.disk_path:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT evaluation, created_at FROM evaluations WHERE key = ? AND created_at > ?",
+                    (key, now - self.ttl_seconds)
+                ).fetchone()
+            if row is not None:
+                evaluation = json.loads(row[0])
+                self._remember(key, row[1], evaluation)
+                with self._lock:
+                    self.disk_hits += 1
+                return dict(evaluation)
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, question_data: Dict[str, Any], answer: str, evaluation: Dict[str, Any]):
+        """Cache a successful evaluation. Failed evaluations are never cached."""
+        if evaluation.get("error"):
+            return
+        key = cache_key(question_data, answer, self.version)
+        now = time.time()
+        self._remember(key, now, dict(evaluation))
+        if self.disk_path:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO evaluations (key, version, evaluation, created_at) VALUES (?, ?, ?, ?)",
+                    (key, self.version, json.dumps(evaluation), now)
+                )
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+            }
+
+    def samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        """Counters for the metrics endpoint."""
+        stats = self.stats()
+        return [
+            ("evaluation_cache_hits_total", {"tier": "memory"}, stats["hits"]),
+            ("evaluation_cache_hits_total", {"tier": "disk"}, stats["disk_hits"]),
+            ("evaluation_cache_misses_total", {}, stats["misses"]),
+            ("evaluation_cache_evictions_total", {}, stats["evictions"]),
+            ("evaluation_cache_entries", {}, stats["entries"]),
+        ]
+
+
+_cache: Optional[EvaluationCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_evaluation_cache() -> Optional[EvaluationCache]:
+    """Return the process-wide evaluation cache, or None when caching is disabled."""
+    global _cache
+    if not EVALUATION_CACHE_CONFIG["enabled"]:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = EvaluationCache()
+                register_collector(_cache.samples)
+    return _cache
@@ -0,0 +1,451 @@
+import json
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, Iterator, Optional, Tuple
+
+import deadlines
+from deadlines import DeadlineExceeded
+from config import GOOGLE_API_KEY, GEMINI_CONFIG, GENERATION_PROFILES, DEADLINE_CONFIG
+from metrics import annotate, bind as bind_interview
+from prompts import RESPONSE_SCHEMAS
+from scheduler import Scheduler, get_scheduler, request_key, bind as bind_priority
+
+# Configure safety settings to be more permissive
+SAFETY_SETTINGS = [
+    {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
+    {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
+    {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
+    {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
+]
+
+
+class LLMError(Exception):
+    """Raised when an LLM call fails after all retries."""
+
+
+class LLMTimeoutError(LLMError):
+    """Raised when a single LLM call exceeds its timeout."""
+
+
+class LLMResponse:
+    """Backend-neutral view of a model response."""
+
+    def __init__(self, text: str, prompt_feedback: Any = None, usage: Optional[Dict[str, int]] = None, raw: Any = None):
+        self.text = text
+        self.prompt_feedback = prompt_feedback
+        self.usage = usage or {}
+        self.raw = raw
+
+
+class LLMBackend:
+    """Interface for anything that can answer a prompt for a generation profile."""
+
+    name = "base"
+
+    def generate(self, prompt: str, profile: str, timeout: float) -> LLMResponse:
+        raise NotImplementedError
+
+    def stream(self, prompt: str, profile: str, timeout: float) -> Iterator[str]:
+        """Yield response text in chunks. Backends without streaming return it in one piece."""
+        yield self.generate(prompt, profile, timeout).text
+
+
+_genai_configured = False
+_genai_lock = threading.Lock()
+
+
+def _configured_genai():
+    """Import google.generativeai on first use and configure it once per process."""
+    global _genai_configured
+    import google.generativeai as genai
+
+    if not _genai_configured:
+        with _genai_lock:
+            if not _genai_configured:
+                if GOOGLE_API_KEY:
+                    genai.configure(api_key=GOOGLE_API_KEY)
+                _genai_configured = True
+    return genai
+
+
+def _usage(metadata: Any) -> Dict[str, int]:
+    """Token counts from a Gemini response's usage metadata."""
+    if metadata is None:
+        return {}
+    return {
+        "prompt_tokens": getattr(metadata, "prompt_token_count", 0),
+        "response_tokens": getattr(metadata, "candidates_token_count", 0),
+        "total_tokens": getattr(metadata, "total_token_count", 0),
+    }
+
+
+def _truncated(response: Any) -> bool:
+    """Whether a Gemini response (or final stream chunk) stopped at max_output_tokens."""
+    candidates = getattr(response, "candidates", None) or []
+    return bool(candidates) and getattr(candidates[0].finish_reason, "name", "") == "MAX_TOKENS"
+
+
+class GeminiBackend(LLMBackend):
+    """Gemini backend that builds one GenerativeModel per profile and reuses it.
+
+    With structured output, responses are JSON constrained to the profile's schema.
+    """
+
+    name = "gemini"
+
+    def __init__(self, model_name: str = GEMINI_CONFIG["model"], profiles: Optional[Dict[str, Dict[str, Any]]] = None,
+                 structured_output: bool = GEMINI_CONFIG["structured_output"]):
+        self._genai = _configured_genai()
+        self._model_name = model_name
+        self._profiles = profiles or GENERATION_PROFILES
+        self._structured_output = structured_output
+        self._models: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _model(self, profile: str):
+        model = self._models.get(profile)
+        if model is None:
+            with self._lock:
+                model = self._models.get(profile)
+                if model is None:
+                    generation_config = dict(self._profiles[profile])
+                    if self._structured_output and profile in RESPONSE_SCHEMAS:
+                        generation_config["response_mime_type"] = "application/json"
+                        generation_config["response_schema"] = RESPONSE_SCHEMAS[profile]
+                    model = self._genai.GenerativeModel(
+                        self._model_name,
+                        safety_settings=SAFETY_SETTINGS,
+                        generation_config=generation_config
+                    )
+                    self._models[profile] = model
+        return model
+
+    def generate(self, prompt: str, profile: str, timeout: float) -> LLMResponse:
+        response = self._model(profile).generate_content(prompt, request_options={"timeout": timeout})
+        try:
+            text = response.text
+        except ValueError:
+            # Raised by the SDK when the candidate was blocked and has no parts
+            text = ""
+        usage = _usage(getattr(response, "usage_metadata", None))
+        usage["truncated"] = int(_truncated(response))
+        return LLMResponse(text, getattr(response, "prompt_feedback", None), usage, response)
+
+    def stream(self, prompt: str, profile: str, timeout: float) -> Iterator[str]:
+        response = self._model(profile).generate_content(prompt, stream=True, request_options={"timeout": timeout})
+        metadata = None
+        truncated = False
+        for chunk in response:
+            # The final chunk carries the usage for the whole response
+            metadata = getattr(chunk, "usage_metadata", None) or metadata
+            truncated = _truncated(chunk) or truncated
+            try:
+                text = chunk.text
+            except ValueError:
+                continue
+            if text:
+                yield text
+        usage = _usage(metadata)
+        annotate(prompt_tokens=usage.get("prompt_tokens", 0), response_tokens=usage.get("response_tokens", 0),
+                 truncated=int(truncated))
+
+
+def _default_stub_responder(prompt: str, profile: str) -> str:
+    """Canned, well-formed responses for each profile."""
+    if profile == "questions":
+        return json.dumps([
+            {
+                "question": f"Stub question {i + 1}: how do you use SUM in Excel?",
+                "category": ["Basic Functions", "Lookup Functions", "Data Analysis"][i % 3],
+                "expected_points": ["Use =SUM(range) syntax", "Specify cell range like A1:A10", "Can add individual cells with commas"],
+                "voice_hints": "Mention the equals sign and cell references",
+            }
+            for i in range(10)
+        ])
+    evaluation = {
+        "score": 70,
+        "rating": "good",
+        "feedback": "Stub evaluation.",
+        "matches": 2,
+        "total_points": 3,
+    }
+    if profile == "batch_evaluation":
+        return json.dumps([dict(evaluation, id=i) for i in range(prompt.count('"id":'))])
+    return json.dumps(evaluation)
+
+
+class StubBackend(LLMBackend):
+    """Local stand-in for Gemini with configurable latency and failure rate."""
+
+    name = "stub"
+
+    def __init__(self, responder: Optional[Callable[[str, str], str]] = None, latency: float = 0.0,
+                 jitter: float = 0.0, failure_rate: float = 0.0, seed: Optional[int] = None,
+                 slow_rate: float = 0.0, slow_latency: float = 0.0):
+        self.responder = responder or _default_stub_responder
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        # A slow_rate fraction of calls take slow_latency extra, like a stalled upstream request
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def generate(self, prompt: str, profile: str, timeout: float) -> LLMResponse:
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            if self._random.random() < self.slow_rate:
+                delay += self.slow_latency
+            fail = self._random.random() < self.failure_rate
+        if delay > timeout:
+            time.sleep(timeout)
+            raise LLMTimeoutError(f"Stub call exceeded {timeout}s timeout")
+        time.sleep(delay)
+        if fail:
+            raise LLMError("Injected stub failure")
+        text = self.responder(prompt, profile)
+        return LLMResponse(text, usage=self._usage(prompt, text))
+
+    @staticmethod
+    def _usage(prompt: str, text: str) -> Dict[str, int]:
+        # Roughly four characters per token
+        usage = {"prompt_tokens": len(prompt) // 4, "response_tokens": len(text) // 4}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["response_tokens"]
+        return usage
+
+    def stream(self, prompt: str, profile: str, timeout: float) -> Iterator[str]:
+        # Spread the configured latency over the chunks, like a streamed response
+        chunks = 10
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            fail = self._random.random() < self.failure_rate
+        if fail:
+            raise LLMError("Injected stub failure")
+        text = self.responder(prompt, profile)
+        size = max(1, -(-len(text) // chunks))
+        for start in range(0, len(text), size):
+            time.sleep(delay / chunks)
+            yield text[start:start + size]
+        usage = self._usage(prompt, text)
+        annotate(prompt_tokens=usage["prompt_tokens"], response_tokens=usage["response_tokens"])
+
+
+class LLMClient:
+    """Calls a backend with per-call timeouts and retry with jittered backoff.
+
+    Every attempt is admitted by the scheduler, which enforces the process-wide
+    rate limits and priorities and coalesces identical in-flight requests.
+    Timeouts never outlast the caller's deadline (see deadlines.py), and a
+    blocking call still running after the recent p95 latency of its profile is
+    hedged with a duplicate request; whichever answers first is used. Hedges
+    are limited to a budgeted fraction of calls.
+    """
+
+    def __init__(self, backend: LLMBackend, timeout: float = GEMINI_CONFIG["timeout"],
+                 max_retries: int = GEMINI_CONFIG["max_retries"], backoff_base: float = GEMINI_CONFIG["backoff_base"],
+                 backoff_max: float = GEMINI_CONFIG["backoff_max"], scheduler: Optional[Scheduler] = None,
+                 hedge: bool = DEADLINE_CONFIG["hedge"]):
+        self.backend = backend
+        self.scheduler = scheduler or get_scheduler()
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._hedge_tokens = float(DEADLINE_CONFIG["hedge_burst"])
+        self._lock = threading.Lock()
+        self._hedge_pool: Optional[ThreadPoolExecutor] = None
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff, cut short by the caller's deadline."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        left = deadlines.remaining()
+        return delay if left is None else max(0.0, min(delay, left))
+
+    def _hedge_delay(self, profile: str) -> Optional[float]:
+        """How long to wait before hedging, or None while there are too few samples."""
+        if not self.hedge:
+            return None
+        with self._lock:
+            samples = sorted(self._latencies.get(profile, ()))
+        if len(samples) < DEADLINE_CONFIG["hedge_min_samples"]:
+            return None
+        p = samples[min(len(samples) - 1, int(len(samples) * DEADLINE_CONFIG["hedge_percentile"] / 100))]
+        return max(DEADLINE_CONFIG["hedge_min_delay"], p)
+
+    def _take_hedge(self) -> bool:
+        """Spend one hedge from the budget, if any is left."""
+        with self._lock:
+            if self._hedge_tokens < 1:
+                return False
+            self._hedge_tokens -= 1
+            return True
+
+    def _send(self, prompt: str, profile: str, timeout: float,
+              admitted: Optional[threading.Event] = None) -> Tuple[LLMResponse, float]:
+        """One request to the backend, admitted by the scheduler, with its own duration."""
+        with self.scheduler.slot(len(prompt) // 4, timeout=deadlines.remaining()):
+            if admitted is not None:
+                admitted.set()
+            started = time.monotonic()
+            response = self.backend.generate(prompt, profile, timeout)
+            return response, time.monotonic() - started
+
+    def _call(self, prompt: str, profile: str, timeout: float) -> LLMResponse:
+        """One attempt, hedged with a duplicate request if it runs past the recent p95 latency.
+
+        Only the duration of the request whose response is used is sampled: a
+        stall cut short by a hedge never enters the window, and the time spent
+        before hedging does not either, so the delay cannot ratchet upwards.
+        """
+        with self._lock:
+            # Every call earns a fraction of a hedge
+            self._hedge_tokens = min(DEADLINE_CONFIG["hedge_burst"], self._hedge_tokens + DEADLINE_CONFIG["hedge_budget"])
+        response, seconds = self._hedged(prompt, profile, timeout)
+        with self._lock:
+            samples = self._latencies.get(profile)
+            if samples is None:
+                samples = self._latencies[profile] = deque(maxlen=DEADLINE_CONFIG["hedge_window"])
+            samples.append(seconds)
+        return response
+
+    def _hedged(self, prompt: str, profile: str, timeout: float) -> Tuple[LLMResponse, float]:
+        delay = self._hedge_delay(profile)
+        if delay is None or delay >= timeout:
+            return self._send(prompt, profile, timeout)
+        if self._hedge_pool is None:
+            with self._lock:
+                if self._hedge_pool is None:
+                    self._hedge_pool = ThreadPoolExecutor(max_workers=2 * self.scheduler.max_concurrent,
+                                                          thread_name_prefix="llm-hedge")
+        # Requests run on the pool under the caller's interview, priority and deadline
+        send = bind_interview(bind_priority(deadlines.bind(self._send)))
+        admitted = threading.Event()
+        primary = self._hedge_pool.submit(send, prompt, profile, timeout, admitted)
+        # A request that fails before it is admitted ends the wait as well
+        primary.add_done_callback(lambda _: admitted.set())
+        # Time spent queueing in the scheduler is not upstream latency: start the hedge timer on admission
+        admitted.wait(deadlines.remaining())
+        started = time.monotonic()
+        futures = [primary]
+        done, _ = wait(futures, timeout=delay)
+        if not done and self._take_hedge():
+            annotate(hedged=1)
+            futures.append(self._hedge_pool.submit(send, prompt, profile, timeout - delay))
+        error: Optional[BaseException] = None
+        while futures:
+            done, _ = wait(futures, timeout=max(0.0, started + timeout - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                futures.remove(future)
+                if future.exception() is None:
+                    # The SDK cannot abort a request in flight: the other one is abandoned and its result dropped
+                    for other in futures:
+                        other.cancel()
+                    if future is not primary:
+                        annotate(hedge_wins=1)
+                    return future.result()
+                error = future.exception()
+        if error is not None:
+            raise error
+        raise LLMTimeoutError(f"No response within {timeout}s")
+
+    def generate(self, prompt: str, profile: str, timeout: Optional[float] = None) -> LLMResponse:
+        timeout = timeout or self.timeout
+        return self.scheduler.run(request_key(prompt, profile), lambda: self._generate(prompt, profile, timeout))
+
+    def _generate(self, prompt: str, profile: str, timeout: float) -> LLMResponse:
+        last_error: Optional[Exception] = None
+        for attempt in range(self.max_retries + 1):
+            # Raises DeadlineExceeded, without retrying, once the caller's budget is spent
+            attempt_timeout = deadlines.timeout(timeout)
+            try:
+                response = self._call(prompt, profile, attempt_timeout)
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                last_error = e
+                if attempt < self.max_retries:
+                    annotate(retries=1)
+                    time.sleep(self._backoff(attempt))
+                continue
+            self.scheduler.charge(response.usage.get("response_tokens", 0))
+            annotate(
+                llm_calls=1,
+                prompt_tokens=response.usage.get("prompt_tokens", 0),
+                response_tokens=response.usage.get("response_tokens", 0),
+                truncated=response.usage.get("truncated", 0),
+                request_bytes=len(prompt.encode()),
+                response_bytes=len(response.text.encode())
+            )
+            return response
+        raise LLMError(f"{type(last_error).__name__}: {last_error}") from last_error
+
+    def stream(self, prompt: str, profile: str, timeout: Optional[float] = None) -> Iterator[str]:
+        """Stream response text. Only failures before the first chunk are retried."""
+        timeout = timeout or self.timeout
+        return self.scheduler.run_stream(request_key(prompt, profile), lambda: self._stream(prompt, profile, timeout))
+
+    def _stream(self, prompt: str, profile: str, timeout: float) -> Iterator[str]:
+        last_error: Optional[Exception] = None
+        for attempt in range(self.max_retries + 1):
+            started = False
+            received = 0
+            attempt_timeout = deadlines.timeout(timeout)
+            try:
+                with self.scheduler.slot(len(prompt) // 4, timeout=deadlines.remaining()):
+                    for chunk in self.backend.stream(prompt, profile, attempt_timeout):
+                        started = True
+                        received += len(chunk.encode())
+                        yield chunk
+                # Roughly four bytes per token, as with the prompt estimate
+                self.scheduler.charge(received // 4)
+                annotate(llm_calls=1, request_bytes=len(prompt.encode()), response_bytes=received)
+                return
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                if started:
+                    raise LLMError(f"{type(e).__name__}: {e}") from e
+                last_error = e
+                if attempt < self.max_retries:
+                    annotate(retries=1)
+                    time.sleep(self._backoff(attempt))
+        raise LLMError(f"{type(last_error).__name__}: {last_error}") from last_error
+
+
+_client: Optional[LLMClient] = None
+_client_lock = threading.Lock()
+
+
+def _default_backend() -> LLMBackend:
+    if GEMINI_CONFIG["backend"] == "stub":
+        return StubBackend()
+    return GeminiBackend()
+
+
+def get_client() -> LLMClient:
+    """Return the process-wide LLM client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = LLMClient(_default_backend())
+    return _client
+
+
+def set_backend(backend: LLMBackend) -> LLMClient:
+    """Swap the backend used by the process-wide client (tests, load runs)."""
+    global _client
+    with _client_lock:
+        _client = LLMClient(backend)
+    return _client
@@ -0,0 +1,293 @@
+import json
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config import METRICS_CONFIG
+
+# Counts that are summed per stage and, for LLM calls, per interview
+TOKEN_COUNTS = ("prompt_tokens", "response_tokens")
+
+_local = threading.local()
+# Functions returning (name, labels, value) gauges from other components, e.g. the LLM scheduler
+_collectors: List[Callable[[], List[Tuple[str, Dict[str, str], float]]]] = []
+
+
+class Span:
+    """One timed stage execution with the counts recorded while it ran."""
+
+    __slots__ = ("stage", "interview_id", "counts", "status")
+
+    def __init__(self, stage: str, interview_id: Optional[str]):
+        self.stage = stage
+        self.interview_id = interview_id
+        self.counts: Dict[str, float] = {}
+        self.status = "ok"
+
+    def add(self, **counts: float):
+        for name, value in counts.items():
+            self.counts[name] = self.counts.get(name, 0) + value
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+class Metrics:
+    """Process-wide store of span timings, summed counts and token spend per interview."""
+
+    def __init__(self, window: int = METRICS_CONFIG["window"], max_interviews: int = METRICS_CONFIG["max_interviews"],
+                 jsonl_path: str = METRICS_CONFIG["jsonl_path"]):
+        self.window = window
+        self.max_interviews = max_interviews
+        self._lock = threading.Lock()
+        self._samples: Dict[str, deque] = {}
+        self._totals: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        self._interviews: "OrderedDict[str, Dict[str, float]]" = OrderedDict()
+        self._sink = open(jsonl_path, "a", buffering=1) if jsonl_path else None
+
+    def record(self, span: Span, seconds: float):
+        with self._lock:
+            samples = self._samples.get(span.stage)
+            if samples is None:
+                samples = self._samples[span.stage] = deque(maxlen=self.window)
+            samples.append(seconds)
+            totals = self._totals[span.stage]
+            totals["count"] += 1
+            totals["seconds"] += seconds
+            if span.status != "ok":
+                totals["errors"] += 1
+            for name, value in span.counts.items():
+                totals[name] += value
+
+            if span.interview_id and any(name in span.counts for name in TOKEN_COUNTS + ("llm_calls",)):
+                interview = self._interviews.get(span.interview_id)
+                if interview is None:
+                    interview = self._interviews[span.interview_id] = defaultdict(float)
+                    while len(self._interviews) > self.max_interviews:
+                        self._interviews.popitem(last=False)
+                else:
+                    # Evict the least recently active interview, not the one that started first
+                    self._interviews.move_to_end(span.interview_id)
+                interview["last_seen"] = time.time()
+                for name in TOKEN_COUNTS + ("llm_calls",):
+                    interview[name] += span.counts.get(name, 0)
+
+            if self._sink:
+                event = {"ts": time.time(), "stage": span.stage, "interview_id": span.interview_id,
+                         "seconds": round(seconds, 6), "status": span.status, **span.counts}
+                self._sink.write(json.dumps(event) + "\n")
+
+    def stages(self) -> Dict[str, Dict[str, float]]:
+        """Percentiles over the recent window plus all-time totals for each stage."""
+        with self._lock:
+            samples = {stage: sorted(values) for stage, values in self._samples.items()}
+            totals = {stage: dict(values) for stage, values in self._totals.items()}
+        return {
+            stage: {
+                "p50": _percentile(samples[stage], 50),
+                "p95": _percentile(samples[stage], 95),
+                "p99": _percentile(samples[stage], 99),
+                **totals[stage],
+            }
+            for stage in sorted(samples)
+        }
+
+    def interviews(self) -> Dict[str, Dict[str, float]]:
+        """Token spend per interview, most recent last."""
+        with self._lock:
+            return {interview_id: dict(values) for interview_id, values in self._interviews.items()}
+
+    def prometheus(self) -> str:
+        """Render every stage in the Prometheus text exposition format."""
+        lines = [
+            "# HELP interview_stage_seconds Wall time per pipeline stage.",
+            "# TYPE interview_stage_seconds summary",
+        ]
+        stages = self.stages()
+        counters = sorted({name for values in stages.values() for name in values} -
+                          {"p50", "p95", "p99", "count", "seconds"})
+        for stage, values in stages.items():
+            for q in ("0.5", "0.95", "0.99"):
+                p = values["p" + str(round(float(q) * 100))]
+                lines.append(f'interview_stage_seconds{{stage="{stage}",quantile="{q}"}} {p:.6f}')
+            lines.append(f'interview_stage_seconds_sum{{stage="{stage}"}} {values["seconds"]:.6f}')
+            lines.append(f'interview_stage_seconds_count{{stage="{stage}"}} {int(values["count"])}')
+        for name in counters:
+            lines.append(f"# TYPE interview_stage_{name}_total counter")
+            for stage, values in stages.items():
+                if name in values:
+                    lines.append(f'interview_stage_{name}_total{{stage="{stage}"}} {values[name]:g}')
+        for collector in list(_collectors):
+            for name, labels, value in collector():
+                label_text = ",".join(f'{key}="{val}"' for key, val in labels.items())
+                lines.append(f"interview_{name}{{{label_text}}} {value:g}" if label_text else f"interview_{name} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+_metrics: Optional[Metrics] = None
+_server: Optional[ThreadingHTTPServer] = None
+_lock = threading.Lock()
+
+
+def get_metrics() -> Metrics:
+    """Return the process-wide metrics store, creating it on first use."""
+    global _metrics
+    if _metrics is None:
+        with _lock:
+            if _metrics is None:
+                _metrics = Metrics()
+    return _metrics
+
+
+def register_collector(collector: Callable[[], List[Tuple[str, Dict[str, str], float]]]):
+    """Add gauges computed on demand to the metrics endpoint."""
+    _collectors.append(collector)
+
+
+def current_interview() -> Optional[str]:
+    return getattr(_local, "interview_id", None)
+
+
+@contextmanager
+def interview(interview_id: Optional[str]):
+    """Attribute spans opened in this thread to an interview."""
+    previous = current_interview()
+    _local.interview_id = interview_id
+    try:
+        yield
+    finally:
+        _local.interview_id = previous
+
+
+def bind(func: Callable) -> Callable:
+    """Wrap func so it runs under the calling thread's interview, e.g. on a worker pool."""
+    interview_id = current_interview()
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with interview(interview_id):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def _stack() -> List[Span]:
+    stack = getattr(_local, "spans", None)
+    if stack is None:
+        stack = _local.spans = []
+    return stack
+
+
+@contextmanager
+def trace(stage: str, **counts: float):
+    """Time a stage. Counts added with annotate() while it runs are recorded with it."""
+    span = Span(stage, current_interview())
+    span.add(**counts)
+    if not METRICS_CONFIG["enabled"]:
+        yield span
+        return
+    stack = _stack()
+    stack.append(span)
+    started = time.perf_counter()
+    try:
+        yield span
+    except Exception:
+        span.status = "error"
+        raise
+    finally:
+        # Streamlit's rerun/stop signals are BaseExceptions and count as normal completion
+        stack.remove(span)
+        get_metrics().record(span, time.perf_counter() - started)
+
+
+@contextmanager
+def detached_trace(stage: str, **counts: float):
+    """Time a stage whose span is only current inside resume() blocks.
+
+    For generators: the span can stay open across yields, which may resume on
+    another thread, without touching any thread's span stack.
+    """
+    span = Span(stage, current_interview())
+    span.add(**counts)
+    started = time.perf_counter()
+    try:
+        yield span
+    except Exception:
+        span.status = "error"
+        raise
+    finally:
+        if METRICS_CONFIG["enabled"]:
+            get_metrics().record(span, time.perf_counter() - started)
+
+
+@contextmanager
+def resume(span: Span):
+    """Make a detached span current in this thread, so annotate() counts go to it."""
+    if not METRICS_CONFIG["enabled"]:
+        yield span
+        return
+    stack = _stack()
+    stack.append(span)
+    try:
+        yield span
+    finally:
+        stack.remove(span)
+
+
+def traced(stage: str) -> Callable:
+    """Decorator form of trace()."""
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with trace(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def annotate(**counts: float):
+    """Add counts (tokens, bytes, retries...) to the innermost span open in this thread."""
+    stack = getattr(_local, "spans", None)
+    if stack:
+        stack[-1].add(**counts)
+
+
+def mark_failed():
+    """Record the innermost span as failed even though it returned normally."""
+    stack = getattr(_local, "spans", None)
+    if stack:
+        stack[-1].status = "error"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = get_metrics().prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server() -> Optional[ThreadingHTTPServer]:
+    """Serve /metrics for Prometheus once per process, if a port is configured."""
+    global _server
+    if not METRICS_CONFIG["enabled"] or not METRICS_CONFIG["port"]:
+        return None
+    with _lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((METRICS_CONFIG["host"], METRICS_CONFIG["port"]), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+    return _server
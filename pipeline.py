@@ -0,0 +1,253 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from audio_store import audio_digest, get_audio_store
+from config import ANALYTICS_CONFIG, DEADLINE_CONFIG, EVALUATION_CONFIG, QUESTION_BANK_CONFIG
+from deadlines import deadline
+from utils import (
+    transcribe_audio, evaluate_answer_with_gemini, evaluate_answers_batch_with_gemini, failed_evaluation,
+    stream_questions_with_gemini
+)
+from question_bank import get_question_bank
+from metrics import annotate, bind, mark_failed, trace
+from scheduler import get_scheduler, priority
+from records import Answer, Evaluation, Question
+
+_executor: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the process-wide worker pool shared by all sessions."""
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=EVALUATION_CONFIG["workers"],
+                    thread_name_prefix="answer-worker"
+                )
+    return _executor
+
+
+def _answer_record(question: Question, answer_text: str, evaluation: Dict[str, Any], audio: Optional[str] = None) -> Answer:
+    return Answer(question, answer_text, Evaluation.from_dict(evaluation), audio)
+
+
+def _store_audio(audio_bytes: bytes, digest: str):
+    """Keep the recording for replay and re-transcription; failing to store it never fails the answer."""
+    with trace("audio_store"):
+        try:
+            get_audio_store().put(audio_bytes, digest)
+        except Exception:
+            annotate(store_failures=1)
+            mark_failed()
+
+
+def _transcribe(audio_bytes: bytes, digest: Optional[str] = None) -> str:
+    """Transcribe within the transcription share of the answer's time budget, then store the recording."""
+    try:
+        with deadline(DEADLINE_CONFIG["transcription_seconds"]):
+            return transcribe_audio(audio_bytes)
+    finally:
+        # Stored even if transcription failed, so the answer can be replayed and transcribed again
+        if digest is not None:
+            _store_audio(audio_bytes, digest)
+
+
+def process_answer(question: Question, audio_bytes: bytes, audio: Optional[str] = None) -> Answer:
+    """Transcribe and evaluate one recorded answer.
+
+    Evaluation gets whatever transcription left of the answer's time budget.
+    If `audio` is given the recording is stored under that digest.
+    """
+    with deadline(DEADLINE_CONFIG["answer_seconds"]):
+        answer_text = _transcribe(audio_bytes, audio)
+        evaluation = evaluate_answer_with_gemini(question.to_dict(), answer_text)
+    return _answer_record(question, answer_text, evaluation, audio)
+
+
+def submit_answer(question: Question, audio_bytes: bytes) -> Dict[str, Any]:
+    """Queue an answer for background processing and return its job record.
+
+    Work is attributed to the calling thread's interview in the metrics.
+    The recording is stored once transcribed; the answer record keeps its digest.
+
+    In batched and deferred modes only transcription starts here; scoring is
+    scheduled by flush_batches and resolves the job's future when done.
+    """
+    audio = audio_digest(audio_bytes) if get_audio_store() is not None else None
+    if EVALUATION_CONFIG["mode"] == "per_answer":
+        future = get_executor().submit(bind(process_answer), question, audio_bytes, audio)
+        return {"question": question, "audio": audio, "future": future}
+    return {
+        "question": question,
+        "audio": audio,
+        "transcript": get_executor().submit(bind(_transcribe), audio_bytes, audio),
+        "future": Future(),
+        "scheduled": False
+    }
+
+
+def _evaluate_batch(batch: List[Dict[str, Any]]):
+    """Score a batch of transcribed jobs in one request and resolve their futures."""
+    ready = []
+    for job in batch:
+        try:
+            ready.append((job, job["transcript"].result()))
+        except Exception as e:
+            job["future"].set_exception(e)
+    try:
+        # Batches are scored when sent, so they get the evaluation share of the budget from then on
+        with deadline(DEADLINE_CONFIG["answer_seconds"] - DEADLINE_CONFIG["transcription_seconds"]):
+            evaluations = evaluate_answers_batch_with_gemini([(job["question"].to_dict(), text) for job, text in ready])
+        for (job, text), evaluation in zip(ready, evaluations):
+            job["future"].set_result(_answer_record(job["question"], text, evaluation, job["audio"]))
+    except Exception as e:
+        for job, _ in ready:
+            if not job["future"].done():
+                job["future"].set_exception(e)
+
+
+def flush_batches(jobs: List[Dict[str, Any]], final: bool = False):
+    """Schedule batched scoring for queued answers.
+
+    Full batches are scheduled as soon as they fill up (batched mode only);
+    with final=True everything still unscheduled is sent.
+    """
+    if EVALUATION_CONFIG["mode"] == "deferred" and not final:
+        return
+    unscheduled = [job for job in jobs if "transcript" in job and not job["scheduled"]]
+    batch_size = EVALUATION_CONFIG["batch_size"] if EVALUATION_CONFIG["mode"] == "batched" else len(unscheduled)
+    while unscheduled and (final or len(unscheduled) >= batch_size):
+        batch, unscheduled = unscheduled[:batch_size], unscheduled[batch_size:]
+        for job in batch:
+            job["scheduled"] = True
+        get_executor().submit(bind(_evaluate_batch), batch)
+
+
+def job_transcript(job: Dict[str, Any]) -> Optional[str]:
+    """Transcribed answer for a finished job, or None while it is still running."""
+    if "transcript" in job:
+        future: Future = job["transcript"]
+        if not future.done() or future.exception() is not None:
+            return None
+        return future.result()
+    future = job["future"]
+    if not future.done() or future.exception() is not None:
+        return None
+    return future.result().answer
+
+
+def collect_answers(jobs: List[Dict[str, Any]]) -> Tuple[List[Answer], int]:
+    """Gather finished answers in question order.
+
+    Returns the answer records that are ready (failed jobs included, with the
+    failure recorded on the evaluation) and the number still pending.
+    """
+    answers = []
+    pending = 0
+    for job in jobs:
+        future: Future = job["future"]
+        if not future.done():
+            pending += 1
+            continue
+        error = future.exception()
+        if error is None:
+            answers.append(future.result())
+            continue
+        question = job["question"]
+        evaluation = failed_evaluation(question.to_dict(), "Could not process this answer.", f"{type(error).__name__}: {error}")
+        answers.append(_answer_record(question, "", evaluation, job.get("audio")))
+    return answers, pending
+
+
+def archive_interview(interview_id: str, candidate: str, years_of_experience: int, answers: List[Answer]) -> Optional[Future]:
+    """Append a finished interview to the cohort analytics dataset in the background."""
+    if not ANALYTICS_CONFIG["enabled"] or not interview_id:
+        return None
+
+    def run():
+        # pandas is only loaded by the worker that writes the dataset
+        from analytics import record_interview
+        record_interview(interview_id, candidate, years_of_experience, answers)
+    return get_executor().submit(run)
+
+
+class QuestionStream:
+    """Interview questions generated in the background and exposed as they arrive.
+
+    A speculative stream (started before the candidate submits) waits `delay`
+    seconds before calling Gemini, runs at prefetch priority until claim(), and
+    can be cancelled; questions it generated but never served go to the bank.
+    A stream can continue an interview that already has some `questions`
+    (e.g. one restored from a checkpoint) and only generates the rest.
+    """
+
+    def __init__(self, years_of_experience: int, expected: int = QUESTION_BANK_CONFIG["questions_per_interview"],
+                 delay: float = 0.0, speculative: bool = False, questions: Sequence[Question] = ()):
+        self.years_of_experience = years_of_experience
+        self.expected = expected
+        self.questions: List[Question] = list(questions)
+        self._initial = len(self.questions)
+        self.done = False
+        self.error: Optional[str] = None
+        self.speculative = speculative
+        self._delay = delay
+        self._wake = threading.Event()
+        self._cancelled = threading.Event()
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=bind(self._run), name="question-stream", daemon=True)
+        self._thread.start()
+
+    @property
+    def total(self) -> int:
+        """Number of questions the interview will have."""
+        return len(self.questions) if self.done else self.expected
+
+    def claim(self):
+        """The candidate is waiting for these questions: skip the remaining delay and run at live priority."""
+        self.speculative = False
+        self._wake.set()
+        # Requests already queued at prefetch priority move up too
+        get_scheduler().reprioritize()
+
+    def cancel(self):
+        """Stop a stream whose questions are no longer wanted.
+
+        Only this stream stops reading: a request it shares with other streams
+        (see Scheduler.run_stream) keeps going for them.
+        """
+        self._cancelled.set()
+        self._wake.set()
+
+    def _run(self):
+        self._wake.wait(self._delay)
+        try:
+            if not self._cancelled.is_set():
+                with priority(lambda: "prefetch" if self.speculative else "live"):
+                    questions = stream_questions_with_gemini(self.years_of_experience, self.expected - self._initial,
+                                                             exclude=[q.question for q in self.questions])
+                    for question in questions:
+                        if self._cancelled.is_set():
+                            questions.close()
+                            break
+                        with self._condition:
+                            self.questions.append(Question.from_dict(question))
+                            self._condition.notify_all()
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+        finally:
+            with self._condition:
+                self.done = True
+                self._condition.notify_all()
+        generated = self.questions[self._initial:]
+        if generated and QUESTION_BANK_CONFIG["enabled"]:
+            served = not (self.speculative or self._cancelled.is_set())
+            get_question_bank().add(self.years_of_experience, [q.to_dict() for q in generated], uses=int(served))
+
+    def wait_for(self, count: int, timeout: Optional[float] = None) -> bool:
+        """Block until `count` questions are available or generation ended."""
+        with self._condition:
+            return self._condition.wait_for(lambda: len(self.questions) >= count or self.done, timeout)
@@ -0,0 +1,130 @@
+import re
+import threading
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from config import PRESCORER_CONFIG
+
+# Transcripts produced by transcribe_audio when there is no usable answer
+UNINTELLIGIBLE_MESSAGE = "Could not understand the audio. Please try speaking more clearly."
+NO_SPEECH_MESSAGE = "No speech was detected in the recording. Please check your microphone and try again."
+SERVICE_ERROR_PREFIX = "Error with speech recognition service:"
+AUDIO_ERROR_PREFIX = "Error processing audio:"
+
+if TYPE_CHECKING:
+    import numpy as np
+
+_STOPWORDS = frozenset("""
+a an and are as at be but by can do for from has have how i if in into is it its of on or so that the
+then there this to use used using was we what when which will with you your
+um uh er erm hmm mm ok okay yeah well
+""".split())
+
+_lock = threading.Lock()
+_stats = {"checked": 0, "scored_locally": 0}
+
+
+def _stem(word: str) -> str:
+    for suffix in ("ing", "es", "ed", "s"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+
+def content_terms(text: str) -> List[str]:
+    """Lower-cased, lightly stemmed words with stopwords removed."""
+    return [_stem(word) for word in re.findall(r"[a-z0-9]+", text.lower()) if word not in _STOPWORDS]
+
+
+def transcript_problem(answer: str) -> Optional[str]:
+    """Why a transcript cannot be graded, or None if it looks like a real answer."""
+    text = (answer or "").strip()
+    if text in (UNINTELLIGIBLE_MESSAGE, NO_SPEECH_MESSAGE) or text.startswith((SERVICE_ERROR_PREFIX, AUDIO_ERROR_PREFIX)):
+        return "transcription_error"
+    if not text:
+        return "empty"
+    if len(content_terms(text)) < PRESCORER_CONFIG["min_words"]:
+        return "too_short"
+    return None
+
+
+def point_coverage(answer: str, expected_points: List[str]) -> "np.ndarray":
+    """Share of each expected point's terms found in the answer, IDF-weighted across the points."""
+    import numpy as np
+
+    points = [set(content_terms(point)) for point in expected_points]
+    if not points:
+        return np.zeros(0)
+    vocabulary = {term: i for i, term in enumerate(sorted(set().union(*points)))}
+    if not vocabulary:
+        return np.zeros(len(points))
+
+    matrix = np.zeros((len(points), len(vocabulary)), dtype=np.float32)
+    for row, terms in enumerate(points):
+        matrix[row, [vocabulary[term] for term in terms]] = 1.0
+    answer_vector = np.zeros(len(vocabulary), dtype=np.float32)
+    present = [vocabulary[term] for term in set(content_terms(answer)) if term in vocabulary]
+    answer_vector[present] = 1.0
+
+    # Terms shared by many points say little about which point was covered
+    idf = np.log((1 + len(points)) / (1 + matrix.sum(axis=0))) + 1.0
+    weighted = matrix * idf
+    totals = weighted.sum(axis=1)
+    return np.divide(weighted @ answer_vector, totals, out=np.zeros(len(points), dtype=np.float32), where=totals > 0)
+
+
+def _rating(score: int) -> str:
+    return "excellent" if score >= 90 else "good" if score >= 75 else "fair" if score >= 50 else "poor"
+
+
+def provisional_evaluation(question_data: Dict[str, Any], answer: str) -> Dict[str, Any]:
+    """Instant lexical estimate of how many expected points an answer covers."""
+    expected_points = question_data.get("expected_points", [])
+    coverage = point_coverage(answer, expected_points)
+    matches = int((coverage >= PRESCORER_CONFIG["point_match_threshold"]).sum())
+    score = int(round(100 * float(coverage.mean()))) if len(coverage) else 0
+    return {
+        "score": score,
+        "rating": _rating(score),
+        "feedback": f"Provisional estimate: your answer mentions {matches} of {len(expected_points)} key points.",
+        "matches": matches,
+        "total_points": len(expected_points),
+        "provisional": True
+    }
+
+
+_FEEDBACK = {
+    "transcription_error": "Your answer could not be transcribed, so it could not be evaluated. Please check your microphone and speak clearly.",
+    "empty": "No answer was recorded for this question.",
+    "too_short": "Your answer was too short to evaluate. Try to explain your reasoning and cover the key points.",
+}
+
+
+def prescore(question_data: Dict[str, Any], answer: str) -> Optional[Dict[str, Any]]:
+    """Score unusable transcripts locally. Returns None when the answer needs the LLM."""
+    if not PRESCORER_CONFIG["enabled"]:
+        return None
+    problem = transcript_problem(answer)
+    with _lock:
+        _stats["checked"] += 1
+        if problem:
+            _stats["scored_locally"] += 1
+    if problem is None:
+        return None
+    evaluation = {
+        "score": 0,
+        "rating": "poor",
+        "feedback": _FEEDBACK[problem],
+        "matches": 0,
+        "total_points": len(question_data.get("expected_points", [])),
+        "scored_locally": problem
+    }
+    if problem == "transcription_error":
+        evaluation["error"] = answer
+    return evaluation
+
+
+def stats() -> Dict[str, float]:
+    """How many answers were checked and what share never reached the LLM."""
+    with _lock:
+        checked, local = _stats["checked"], _stats["scored_locally"]
+    return {"checked": checked, "scored_locally": local, "llm_calls_avoided": local / checked if checked else 0.0}
@@ -0,0 +1,102 @@
+import hashlib
+import json
+from typing import Optional
+
+from config import GEMINI_CONFIG, GENERATION_PROFILES
+from records import RATINGS
+
+# With structured output the response format is enforced by RESPONSE_SCHEMAS,
+# so the prompts only carry the task. JSON_INSTRUCTIONS are appended when
+# structured output is turned off.
+QUESTIONS_PROMPT = """Generate {count} interview questions for an Excel position for a candidate with {years_of_experience} years of experience, from basic to advanced for that level.
+For each question give a category (e.g. "Lookup Functions"), 3-4 key points expected in a good answer and a short hint of what to mention.
+{avoid}"""
+
+EVALUATION_PROMPT = """Evaluate a candidate's answer to an Excel interview question.
+Question: {question}
+Key points expected: {expected_points}
+Answer: {answer}
+Give a 0-100 score, a rating, 1-3 sentences of constructive feedback, the number of key points covered and the total number of key points."""
+
+BATCH_EVALUATION_PROMPT = """Evaluate each candidate answer to an Excel interview question against its expected key points.
+For each answer give its id, a 0-100 score, a rating, 1-3 sentences of constructive feedback, the number of key points covered and the total number of key points.
+Answers:
+{answers}"""
+
+JSON_INSTRUCTIONS = {
+    "questions": """
+Return ONLY a valid JSON array, without markdown or code blocks, of objects with the keys
+"question" (string), "category" (string), "expected_points" (array of strings) and "voice_hints" (string).""",
+    "evaluation": """
+Return ONLY a valid JSON object, without markdown or code blocks, with the keys
+"score" (integer), "rating" ("excellent", "good", "fair" or "poor"), "feedback" (string),
+"matches" (integer) and "total_points" (integer).""",
+    "batch_evaluation": """
+Return ONLY a valid JSON array, without markdown or code blocks, with one object per answer with the keys
+"id" (integer), "score" (integer), "rating" ("excellent", "good", "fair" or "poor"), "feedback" (string),
+"matches" (integer) and "total_points" (integer).""",
+}
+
+QUESTION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "question": {"type": "string"},
+        "category": {"type": "string"},
+        "expected_points": {"type": "array", "items": {"type": "string"}},
+        "voice_hints": {"type": "string"},
+    },
+    "required": ["question", "category", "expected_points", "voice_hints"],
+}
+
+EVALUATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "score": {"type": "integer"},
+        "rating": {"type": "string", "enum": list(RATINGS)},
+        "feedback": {"type": "string"},
+        "matches": {"type": "integer"},
+        "total_points": {"type": "integer"},
+    },
+    "required": ["score", "rating", "feedback", "matches", "total_points"],
+}
+
+BATCH_EVALUATION_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {"id": {"type": "integer"}, **EVALUATION_SCHEMA["properties"]},
+        "required": ["id"] + EVALUATION_SCHEMA["required"],
+    },
+}
+
+# Response schema per generation profile
+RESPONSE_SCHEMAS = {
+    "questions": {"type": "array", "items": QUESTION_SCHEMA},
+    "evaluation": EVALUATION_SCHEMA,
+    "batch_evaluation": BATCH_EVALUATION_SCHEMA,
+}
+
+
+def render(profile: str, template: str, structured: Optional[bool] = None, **fields) -> str:
+    """Fill a prompt template, adding the JSON format description when structured output is off."""
+    if structured is None:
+        structured = GEMINI_CONFIG["structured_output"]
+    prompt = template.format(**fields).strip()
+    return prompt if structured else prompt + "\n" + JSON_INSTRUCTIONS[profile].strip()
+
+
+# Identifies the evaluator: cached evaluations from a different prompt or model are never reused
+EVALUATOR_VERSION = hashlib.sha256(
+    "\n".join([
+        EVALUATION_PROMPT,
+        BATCH_EVALUATION_PROMPT,
+        GEMINI_CONFIG["model"],
+        repr(sorted(GENERATION_PROFILES["evaluation"].items())),
+        repr(sorted(GENERATION_PROFILES["batch_evaluation"].items())),
+        repr(GEMINI_CONFIG["structured_output"]),
+        json.dumps(RESPONSE_SCHEMAS["evaluation"], sort_keys=True),
+        json.dumps(RESPONSE_SCHEMAS["batch_evaluation"], sort_keys=True),
+        JSON_INSTRUCTIONS["evaluation"],
+        JSON_INSTRUCTIONS["batch_evaluation"],
+    ]).encode()
+).hexdigest()[:16]
@@ -0,0 +1,196 @@
+import json
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from config import EXPERIENCE_BANDS, QUESTION_BANK_CONFIG
+from metrics import annotate, mark_failed, trace
+from scheduler import priority
+from utils import generate_questions_with_gemini
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    band TEXT NOT NULL,
+    category TEXT NOT NULL,
+    question TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    uses INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    UNIQUE (band, question)
+);
+CREATE INDEX IF NOT EXISTS idx_questions_band_uses ON questions (band, uses);
+"""
+
+
+def experience_band(years_of_experience: int) -> Dict[str, Any]:
+    """Return the experience band a candidate falls into."""
+    for band in EXPERIENCE_BANDS:
+        if band["min_years"] <= years_of_experience <= band["max_years"]:
+            return band
+    return EXPERIENCE_BANDS[-1]
+
+
+class QuestionBank:
+    """On-disk store of pre-generated questions, keyed by experience band and category."""
+
+    def __init__(self, path: str = QUESTION_BANK_CONFIG["path"], max_uses: int = QUESTION_BANK_CONFIG["max_uses"]):
+        self.path = path
+        self.max_uses = max_uses
+        self._random = random.SystemRandom()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per call keeps the bank safe to share across threads
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def add(self, years_of_experience: int, questions: List[Dict[str, Any]], uses: int = 0) -> int:
+        """Store questions for the candidate's band, skipping duplicates. Returns the number added."""
+        band = experience_band(years_of_experience)["name"]
+        now = time.time()
+        rows = [
+            (band, q["category"], q["question"], json.dumps(q), uses, now)
+            for q in questions
+        ]
+        with self._connect() as conn:
+            conn.execute("BEGIN")
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO questions (band, category, question, payload, uses, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            added = conn.total_changes - before
+            conn.execute("COMMIT")
+        return added
+
+    def available(self, years_of_experience: int) -> int:
+        """Number of questions in the candidate's band that can still be served."""
+        band = experience_band(years_of_experience)["name"]
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT COUNT(*) FROM questions WHERE band = ? AND uses < ?",
+                (band, self.max_uses)
+            ).fetchone()
+        return row[0]
+
+    def draw(self, years_of_experience: int, count: int = QUESTION_BANK_CONFIG["questions_per_interview"]) -> List[Dict[str, Any]]:
+        """Draw a random, non-repeating set of questions spread across categories.
+
+        Returns an empty list when the band does not hold enough usable questions.
+        """
+        band = experience_band(years_of_experience)["name"]
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = conn.execute(
+                    "SELECT id, category, payload FROM questions WHERE band = ? AND uses < ?",
+                    (band, self.max_uses)
+                ).fetchall()
+                if len(rows) < count:
+                    conn.execute("ROLLBACK")
+                    return []
+
+                # Round-robin over shuffled categories so one topic cannot dominate a set
+                by_category: Dict[str, List[tuple]] = {}
+                for row in rows:
+                    by_category.setdefault(row[1], []).append(row)
+                pools = list(by_category.values())
+                for pool in pools:
+                    self._random.shuffle(pool)
+                self._random.shuffle(pools)
+                picked = []
+                while len(picked) < count:
+                    for pool in pools:
+                        if pool and len(picked) < count:
+                            picked.append(pool.pop())
+
+                conn.executemany("UPDATE questions SET uses = uses + 1 WHERE id = ?", [(row[0],) for row in picked])
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        questions = [json.loads(row[2]) for row in picked]
+        self._random.shuffle(questions)
+        return questions
+
+
+class RefillWorker:
+    """Daemon thread that keeps every experience band stocked with fresh questions."""
+
+    def __init__(self, bank: QuestionBank, min_available: int = QUESTION_BANK_CONFIG["min_available"],
+                 interval: float = QUESTION_BANK_CONFIG["refill_interval"]):
+        self.bank = bank
+        self.min_available = min_available
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="question-bank-refill", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def refill_once(self):
+        """Top up each band that has fallen below the minimum."""
+        for band in EXPERIENCE_BANDS:
+            years = (band["min_years"] + band["max_years"]) // 2
+            if self.bank.available(years) >= self.min_available:
+                continue
+            with priority("background"):
+                questions = generate_questions_with_gemini(years)
+            annotate(questions=len(questions))
+            if questions:
+                self.bank.add(years, questions)
+            else:
+                mark_failed()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                # Failures are recorded on the refill stage of the metrics
+                with trace("question_bank_refill"):
+                    self.refill_once()
+            except Exception:
+                pass
+            self._stop.wait(self.interval)
+
+
+_bank: Optional[QuestionBank] = None
+_worker: Optional[RefillWorker] = None
+_lock = threading.Lock()
+
+
+def get_question_bank() -> QuestionBank:
+    """Return the process-wide question bank."""
+    global _bank
+    if _bank is None:
+        with _lock:
+            if _bank is None:
+                _bank = QuestionBank()
+    return _bank
+
+
+def start_refill_worker() -> Optional[RefillWorker]:
+    """Start the background refill worker once per process."""
+    global _worker
+    if not QUESTION_BANK_CONFIG["enabled"]:
+        return None
+    if _worker is None:
+        bank = get_question_bank()
+        with _lock:
+            if _worker is None:
+                _worker = RefillWorker(bank)
+                _worker.start()
+    return _worker
@@ -0,0 +1,131 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+RATINGS = ("excellent", "good", "fair", "poor")
+
+
+class ValidationError(ValueError):
+    """Raised when model output does not match the expected record."""
+
+
+def _field(data: Dict[str, Any], name: str, kind) -> Any:
+    value = data.get(name)
+    # bool is an int subclass but never a valid count or score
+    if not isinstance(value, kind) or isinstance(value, bool):
+        raise ValidationError(f"{name!r} must be {getattr(kind, '__name__', kind)}, got {value!r}")
+    return value
+
+
+@dataclass(slots=True, frozen=True)
+class Question:
+    """One interview question as generated by Gemini or drawn from the bank."""
+
+    question: str
+    category: str
+    expected_points: Tuple[str, ...]
+    voice_hints: str = ""
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Question":
+        return cls(data["question"], data["category"], tuple(data.get("expected_points", ())), data.get("voice_hints", ""))
+
+    @classmethod
+    def parse(cls, data: Any) -> "Question":
+        """Validate a question generated by the model."""
+        if not isinstance(data, dict):
+            raise ValidationError(f"expected an object, got {type(data).__name__}")
+        question = _field(data, "question", str).strip()
+        points = _field(data, "expected_points", list)
+        if not question:
+            raise ValidationError("'question' is empty")
+        if not points or not all(isinstance(p, str) for p in points):
+            raise ValidationError("'expected_points' must be a non-empty list of strings")
+        return cls(question, _field(data, "category", str), tuple(points), _field(data, "voice_hints", str))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "question": self.question,
+            "category": self.category,
+            "expected_points": list(self.expected_points),
+            "voice_hints": self.voice_hints
+        }
+
+
+@dataclass(slots=True, frozen=True)
+class Evaluation:
+    """Score and feedback for one answer."""
+
+    score: float
+    rating: str
+    feedback: str
+    matches: int
+    total_points: int
+    error: Optional[str] = None
+    provisional: bool = False
+    scored_locally: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Evaluation":
+        return cls(
+            data.get("score", 0), data.get("rating", "N/A"), data.get("feedback", ""),
+            data.get("matches", 0), data.get("total_points", 0),
+            data.get("error"), bool(data.get("provisional", False)), data.get("scored_locally")
+        )
+
+    @classmethod
+    def parse(cls, data: Any) -> "Evaluation":
+        """Validate an evaluation returned by the model."""
+        if not isinstance(data, dict):
+            raise ValidationError(f"expected an object, got {type(data).__name__}")
+        score = _field(data, "score", (int, float))
+        if not 0 <= score <= 100:
+            raise ValidationError(f"'score' must be between 0 and 100, got {score}")
+        rating = data.get("rating")
+        if rating not in RATINGS:
+            raise ValidationError(f"'rating' must be one of {', '.join(RATINGS)}, got {rating!r}")
+        return cls(score, rating, _field(data, "feedback", str), _field(data, "matches", int), _field(data, "total_points", int))
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            "score": self.score,
+            "rating": self.rating,
+            "feedback": self.feedback,
+            "matches": self.matches,
+            "total_points": self.total_points
+        }
+        # Optional fields are only written when set, matching the evaluator's JSON
+        if self.error is not None:
+            data["error"] = self.error
+        if self.provisional:
+            data["provisional"] = True
+        if self.scored_locally is not None:
+            data["scored_locally"] = self.scored_locally
+        return data
+
+
+@dataclass(slots=True, frozen=True)
+class Answer:
+    """A transcribed answer with its evaluation."""
+
+    question: Question
+    answer: str
+    evaluation: Evaluation
+    audio: Optional[str] = None  # digest of the recording in the audio store
+
+    @property
+    def category(self) -> str:
+        return self.question.category
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Answer":
+        return cls(Question.from_dict(data["question"]), data["answer"], Evaluation.from_dict(data["evaluation"]), data.get("audio"))
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {"question": self.question.to_dict(), "answer": self.answer, "evaluation": self.evaluation.to_dict()}
+        if self.audio is not None:
+            data["audio"] = self.audio
+        return data
+
+
+def questions_from_dicts(items: List[Dict[str, Any]]) -> List[Question]:
+    return [Question.from_dict(item) for item in items]
@@ -0,0 +1,200 @@
+import hashlib
+import json
+from dataclasses import dataclass
+from concurrent.futures import Future
+from typing import Any, Sequence, Tuple
+
+import streamlit as st
+
+from records import Answer
+
+
+@dataclass(slots=True, frozen=True)
+class CategoryScore:
+    category: str
+    average: float
+    questions: int
+
+
+@dataclass(slots=True, frozen=True)
+class ReportModel:
+    """Everything the results screen shows, computed once per finished interview."""
+
+    overall_score: float
+    skill_level: str
+    categories: Tuple[CategoryScore, ...]
+    answers: Tuple[Answer, ...]
+    errors: Tuple[Tuple[int, str], ...]  # (question number, error) for answers that were not fully evaluated
+
+
+def answers_fingerprint(answers: Sequence[Answer]) -> str:
+    """Stable hash of a set of answers and their evaluations."""
+    payload = json.dumps([answer.to_dict() for answer in answers], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+# (minimum overall score, Streamlit message kind, text), best first
+RECOMMENDATIONS = (
+    (90, "success", "**Excellent Excel Skills!** You demonstrate expert-level knowledge. Consider exploring advanced topics like Power Query, VBA automation, or integrating Excel with other data analysis tools."),
+    (75, "info", "**Strong Excel Skills!** You have a solid intermediate-to-advanced knowledge base. To advance, focus on mastering complex functions, advanced PivotTable techniques, and robust data modeling."),
+    (60, "warning", "**Good Foundation!** You have a good grasp of the basics. Concentrate on intermediate functions like VLOOKUP/XLOOKUP, conditional formatting, and creating more complex charts and dashboards."),
+    (0, "error", "**Keep Learning!** Focus on mastering fundamental functions, cell references, and core Excel operations. A structured beginner's course could be very beneficial."),
+)
+
+
+def skill_level(score: float) -> str:
+    return "Expert" if score >= 90 else "Advanced" if score >= 75 else "Intermediate" if score >= 60 else "Beginner"
+
+
+def recommendation(score: float) -> Tuple[str, str]:
+    """Message kind and text of the recommendation for an overall score."""
+    return next((kind, text) for minimum, kind, text in RECOMMENDATIONS if score >= minimum)
+
+
+def build_report(answers: Sequence[Answer]) -> ReportModel:
+    """Aggregate scores overall and per category (in order of first appearance)."""
+    import numpy as np
+
+    scores = np.fromiter((answer.evaluation.score for answer in answers), dtype=np.float64, count=len(answers))
+    order = list(dict.fromkeys(answer.category for answer in answers))
+    index = {category: i for i, category in enumerate(order)}
+    groups = np.fromiter((index[answer.category] for answer in answers), dtype=np.intp, count=len(answers))
+    counts = np.bincount(groups, minlength=len(order))
+    sums = np.bincount(groups, weights=scores, minlength=len(order))
+    overall = float(scores.mean()) if len(scores) else 0.0
+    return ReportModel(
+        overall_score=overall,
+        skill_level=skill_level(overall),
+        categories=tuple(
+            CategoryScore(category, float(sums[i] / counts[i]), int(counts[i])) for i, category in enumerate(order)
+        ),
+        answers=tuple(answers),
+        errors=tuple(
+            (i + 1, answer.evaluation.error) for i, answer in enumerate(answers) if answer.evaluation.error
+        )
+    )
+
+
+def category_figure(report: ReportModel) -> Any:
+    """Bar chart of the average score per category."""
+    import plotly.express as px
+
+    names = [c.category for c in report.categories]
+    averages = [c.average for c in report.categories]
+    fig = px.bar(
+        x=names,
+        y=averages,
+        labels={"x": "Category", "y": "Average Score (%)"},
+        color=averages,
+        color_continuous_scale="viridis"
+    )
+    fig.update_layout(showlegend=False, height=400, paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font_color='white')
+    return fig
+
+
+@st.cache_resource(max_entries=256, show_spinner=False)
+def get_report(fingerprint: str, _answers: Tuple[Answer, ...]) -> Tuple[ReportModel, Any]:
+    """Report model and chart for a finished interview, cached by its answers fingerprint.
+
+    The figure object is reused as is; rebuilding it with plotly express
+    costs far more than Streamlit serializing an existing one.
+    """
+    report = build_report(_answers)
+    return report, category_figure(report)
+
+
+# Viridis stops, for bar colours matching the on-screen chart
+_VIRIDIS = ((68, 1, 84), (59, 82, 139), (33, 145, 140), (94, 201, 98), (253, 231, 37))
+# Typographic characters the PDF core fonts cannot encode
+_PDF_TEXT = str.maketrans({"\u2018": "'", "\u2019": "'", "\u201c": '"', "\u201d": '"', "\u2013": "-", "\u2014": "-",
+                           "\u2026": "...", "\u2022": "-", "\u00a0": " "})
+
+
+def _viridis(fraction: float) -> Tuple[int, int, int]:
+    position = min(max(fraction, 0.0), 1.0) * (len(_VIRIDIS) - 1)
+    low = min(int(position), len(_VIRIDIS) - 2)
+    weight = position - low
+    return tuple(round(a + (b - a) * weight) for a, b in zip(_VIRIDIS[low], _VIRIDIS[low + 1]))
+
+
+def _pdf_text(text: Any) -> str:
+    return str(text).translate(_PDF_TEXT).encode("latin-1", "replace").decode("latin-1")
+
+
+def _draw_category_chart(pdf, report: ReportModel, height: float = 60.0):
+    """Average score per category as a static bar chart drawn straight onto the page."""
+    left, top, width = pdf.l_margin + 10, pdf.get_y() + 4, pdf.epw - 10
+    pdf.set_font("Helvetica", size=7)
+    pdf.set_draw_color(200, 200, 200)
+    for tick in range(0, 101, 25):
+        y = top + height * (1 - tick / 100)
+        pdf.line(left, y, left + width, y)
+        pdf.text(left - 8, y + 1, f"{tick}%")
+    averages = [c.average for c in report.categories]
+    low, high = min(averages, default=0.0), max(averages, default=0.0)
+    slot = width / max(len(averages), 1)
+    for i, category in enumerate(report.categories):
+        bar = category.average / 100 * height
+        x = left + i * slot + slot * 0.15
+        pdf.set_fill_color(*_viridis((category.average - low) / (high - low) if high > low else 1.0))
+        pdf.rect(x, top + height - bar, slot * 0.7, bar, style="F")
+        pdf.text(x, top + height - bar - 1, f"{category.average:.0f}%")
+        pdf.set_xy(left + i * slot, top + height + 1)
+        pdf.multi_cell(slot, 3, _pdf_text(category.category), align="C")
+    pdf.set_y(top + height + 12)
+
+
+def render_pdf(report: ReportModel, candidate: str, years_of_experience: int) -> bytes:
+    """The full report as a PDF document."""
+    from fpdf import FPDF
+
+    pdf = FPDF()
+    pdf.set_title("Excel Skills Assessment Report")
+    pdf.set_auto_page_break(True, margin=15)
+    pdf.add_page()
+    pdf.set_font("Helvetica", "B", 18)
+    pdf.cell(0, 10, "Excel Skills Assessment Report", new_x="LMARGIN", new_y="NEXT")
+    pdf.set_font("Helvetica", size=10)
+    pdf.cell(0, 6, _pdf_text(f"{candidate} - {years_of_experience} years of experience"), new_x="LMARGIN", new_y="NEXT")
+    pdf.ln(4)
+    pdf.set_font("Helvetica", "B", 12)
+    pdf.cell(0, 7, f"Overall Score: {report.overall_score:.0f}%    Assessed Skill Level: {report.skill_level}    "
+                   f"Questions Answered: {len(report.answers)}", new_x="LMARGIN", new_y="NEXT")
+    pdf.ln(2)
+    pdf.cell(0, 7, "Performance by Category", new_x="LMARGIN", new_y="NEXT")
+    _draw_category_chart(pdf, report)
+
+    pdf.set_font("Helvetica", "B", 12)
+    pdf.cell(0, 7, "Detailed Question Analysis", new_x="LMARGIN", new_y="NEXT")
+    for i, answer in enumerate(report.answers):
+        evaluation = answer.evaluation
+        pdf.ln(2)
+        pdf.set_font("Helvetica", "B", 10)
+        pdf.multi_cell(0, 5, _pdf_text(f"Question {i + 1}: {answer.question.question}"), new_x="LMARGIN", new_y="NEXT")
+        pdf.set_font("Helvetica", size=9)
+        pdf.multi_cell(0, 5, _pdf_text(f"Score: {evaluation.score:.0f}% ({evaluation.matches}/{evaluation.total_points} points covered)"),
+                       new_x="LMARGIN", new_y="NEXT")
+        pdf.multi_cell(0, 5, _pdf_text(f"Your Answer: {answer.answer}"), new_x="LMARGIN", new_y="NEXT")
+        pdf.multi_cell(0, 5, _pdf_text(f"Feedback: {evaluation.feedback}"), new_x="LMARGIN", new_y="NEXT")
+        if evaluation.error:
+            pdf.multi_cell(0, 5, _pdf_text(f"Could not be fully evaluated: {evaluation.error}"), new_x="LMARGIN", new_y="NEXT")
+
+    pdf.ln(4)
+    pdf.set_font("Helvetica", "B", 12)
+    pdf.cell(0, 7, "Personalized Recommendations", new_x="LMARGIN", new_y="NEXT")
+    pdf.set_font("Helvetica", size=10)
+    pdf.multi_cell(0, 5, _pdf_text(recommendation(report.overall_score)[1].replace("**", "")), new_x="LMARGIN", new_y="NEXT")
+    return bytes(pdf.output())
+
+
+@st.cache_resource(max_entries=256, show_spinner=False)
+def get_report_pdf(fingerprint: str, candidate: str, years_of_experience: int, _report: ReportModel) -> Future:
+    """PDF of a finished interview, rendered once in the background and cached by its answers fingerprint.
+
+    Returns the rendering job; reruns and repeated downloads reuse its result.
+    A failed job stays cached until it is cleared with the same arguments
+    (get_report_pdf.clear(...)), which the results screen offers as a retry.
+    """
+    from pipeline import get_executor
+
+    return get_executor().submit(render_pdf, _report, candidate, years_of_experience)
@@ -0,0 +1,219 @@
+"""Re-score archived interview answers without the Streamlit app.
+
+Reads recorded answers from a directory (every WAV file with a JSON sidecar of
+the same name holding its question data) or from a JSON-lines manifest with
+one {"id", "audio", "question", ...} object per answer, audio paths relative
+to the manifest (or an "audio_hash" of a recording in the audio store instead
+of "audio"). Each answer is preprocessed, transcribed and evaluated on a
+bounded worker pool and its result appended to a JSON-lines file as soon as it
+is ready. The output doubles as the checkpoint: a rerun skips answers already
+scored successfully by the current evaluator version.
+
+    python rescore.py recordings/ --output rescored.jsonl --parquet rescored.parquet
+    python rescore.py manifest.jsonl --output rescored.jsonl --workers 16
+    python rescore.py recordings/ --output trial.jsonl --offline --limit 100
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
+
+
+def _item(item_id: str, audio: Optional[str], data: Dict[str, Any]) -> Dict[str, Any]:
+    # A sidecar either nests the question data under "question" or is the question data itself
+    question = data["question"] if isinstance(data.get("question"), dict) else data
+    meta = {k: v for k, v in data.items() if k not in ("id", "audio", "audio_hash", "question")} if question is not data else {}
+    return {"id": item_id, "audio": audio, "audio_hash": data.get("audio_hash"), "question": question, "meta": meta}
+
+
+def load_items(source: str) -> List[Dict[str, Any]]:
+    """Answers to re-score from a recordings directory or a JSON-lines manifest."""
+    items = []
+    if os.path.isdir(source):
+        for audio in sorted(glob.glob(os.path.join(source, "**", "*.wav"), recursive=True)):
+            sidecar = os.path.splitext(audio)[0] + ".json"
+            if not os.path.exists(sidecar):
+                print(f"Skipping {audio}: no question data in {sidecar}", file=sys.stderr)
+                continue
+            with open(sidecar) as f:
+                items.append(_item(os.path.relpath(audio, source), audio, json.load(f)))
+        return items
+    base = os.path.dirname(os.path.abspath(source))
+    with open(source) as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            data = json.loads(line)
+            audio = os.path.join(base, data["audio"]) if data.get("audio") else None
+            items.append(_item(str(data.get("id", line_number)), audio, data))
+    return items
+
+
+def completed_ids(output: str, evaluator_version: str) -> Set[str]:
+    """Ids already fully scored by this evaluator version."""
+    done: Set[str] = set()
+    if not os.path.exists(output):
+        return done
+    with open(output) as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut short by an interrupted run
+                continue
+            # Provisional rows ran out of time and fell back to a local estimate; score them again
+            if row.get("evaluator_version") == evaluator_version and not row.get("error") and not row.get("provisional"):
+                done.add(row["id"])
+    return done
+
+
+@contextmanager
+def _recording(item: Dict[str, Any]):
+    """The answer's WAV bytes, from its file or, memory-mapped where possible, from the audio store."""
+    if item["audio_hash"]:
+        from audio_store import AudioStore
+        with AudioStore().wav(item["audio_hash"]) as data:
+            yield data
+        return
+    with open(item["audio"], "rb") as f:
+        yield f.read()
+
+
+def rescore_one(item: Dict[str, Any], process_answer: Callable, evaluator_version: str) -> Dict[str, Any]:
+    """Transcribe and evaluate one recorded answer into an output row."""
+    from records import Question
+
+    row = {"id": item["id"], **item["meta"]}
+    started = time.perf_counter()
+    try:
+        question = Question.from_dict(item["question"])
+        row.update(question=question.question, category=question.category)
+        with _recording(item) as audio_bytes:
+            answer = process_answer(question, audio_bytes)
+        row.update(transcript=answer.answer, **answer.evaluation.to_dict())
+    except Exception as e:
+        row.update(transcript=None, error=f"{type(e).__name__}: {e}")
+    row.update(evaluator_version=evaluator_version, seconds=round(time.perf_counter() - started, 3))
+    return row
+
+
+def run(items: List[Dict[str, Any]], output: str, workers: int, work: Callable[[Dict[str, Any]], Dict[str, Any]],
+        progress_every: float = 10.0) -> Dict[str, Any]:
+    """Score items on `workers` threads, keeping at most twice that many in flight, appending rows to `output`."""
+    started = last_report = time.perf_counter()
+    done = failed = 0
+
+    def report():
+        elapsed = time.perf_counter() - started
+        rate = done / elapsed * 60 if elapsed else 0.0
+        print(f"{done}/{len(items)} answers, {rate:.1f} answers/min, {failed} failed", file=sys.stderr)
+
+    pending = set()
+    remaining: Iterator[Dict[str, Any]] = iter(items)
+    with open(output, "a", buffering=1) as sink, ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rescore") as executor:
+        while True:
+            for item in remaining:
+                pending.add(executor.submit(work, item))
+                if len(pending) >= workers * 2:
+                    break
+            if not pending:
+                break
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                row = future.result()
+                sink.write(json.dumps(row) + "\n")
+                done += 1
+                failed += bool(row.get("error"))
+            if time.perf_counter() - last_report >= progress_every:
+                report()
+                last_report = time.perf_counter()
+    elapsed = time.perf_counter() - started
+    report()
+    return {"answers": done, "failed": failed, "seconds": elapsed, "answers_per_minute": done / elapsed * 60 if elapsed else 0.0}
+
+
+def write_parquet(output: str, path: str, evaluator_version: str) -> int:
+    """Latest row per answer for this evaluator version, as Parquet."""
+    import pandas as pd
+
+    frame = pd.read_json(output, lines=True, dtype={"id": str})
+    if frame.empty:
+        # Nothing scored yet: still write the file, with the columns every row has
+        frame = pd.DataFrame({"id": pd.Series(dtype=str), "evaluator_version": pd.Series(dtype=str)})
+    frame = frame[frame["evaluator_version"] == evaluator_version].drop_duplicates("id", keep="last")
+    frame.to_parquet(path, index=False)
+    return len(frame)
+
+
+def _count_thread_errors() -> List[BaseException]:
+    """Record exceptions that escape worker threads (still printed as usual), so they fail the run."""
+    errors: List[BaseException] = []
+    default = threading.excepthook
+
+    def hook(args):
+        errors.append(args.exc_value)
+        default(args)
+    threading.excepthook = hook
+    return errors
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", help="recordings directory or JSON-lines manifest")
+    parser.add_argument("--output", required=True, help="JSON-lines results file, appended to and used to resume")
+    parser.add_argument("--parquet", help="also write the results of this evaluator version to this Parquet file")
+    parser.add_argument("--workers", type=int, default=8, help="answers processed concurrently")
+    parser.add_argument("--limit", type=int, help="only score the first N answers still to do")
+    parser.add_argument("--llm-backend", choices=["gemini", "stub"])
+    parser.add_argument("--speech-backend", choices=["google", "vosk", "stub"])
+    parser.add_argument("--offline", action="store_true", help="use the local stub LLM and speech backends")
+    parser.add_argument("--audio-store", help="audio store directory holding manifest entries given by audio_hash")
+    parser.add_argument("--progress-every", type=float, default=10.0, help="seconds between progress lines")
+    args = parser.parse_args(argv)
+
+    # Backends are chosen from the environment when the app modules are first imported
+    if args.offline:
+        args.llm_backend = args.llm_backend or "stub"
+        args.speech_backend = args.speech_backend or "stub"
+    if args.llm_backend:
+        os.environ["LLM_BACKEND"] = args.llm_backend
+    if args.speech_backend:
+        os.environ["SPEECH_BACKEND"] = args.speech_backend
+    if args.audio_store:
+        os.environ["AUDIO_STORE_PATH"] = args.audio_store
+    thread_errors = _count_thread_errors()
+    from metrics import get_metrics
+    from pipeline import process_answer
+    from prompts import EVALUATOR_VERSION
+
+    items = load_items(args.source)
+    done = completed_ids(args.output, EVALUATOR_VERSION)
+    todo = [item for item in items if item["id"] not in done]
+    if args.limit is not None:
+        todo = todo[:args.limit]
+    print(f"{len(items)} answers, {len(done)} already scored by evaluator {EVALUATOR_VERSION}, {len(todo)} to do", file=sys.stderr)
+
+    summary = run(todo, args.output, args.workers, lambda item: rescore_one(item, process_answer, EVALUATOR_VERSION),
+                  args.progress_every)
+    stages = get_metrics().stages()
+    for stage in ("transcription", "evaluation"):
+        if stage in stages:
+            print(f"  {stage:<14} p50 {stages[stage]['p50']:.3f}s  p95 {stages[stage]['p95']:.3f}s", file=sys.stderr)
+    print(f"Scored {summary['answers']} answers in {summary['seconds']:.1f}s "
+          f"({summary['answers_per_minute']:.1f} answers/min), {summary['failed']} failed", file=sys.stderr)
+    if args.parquet:
+        rows = write_parquet(args.output, args.parquet, EVALUATOR_VERSION)
+        print(f"Wrote {rows} rows to {args.parquet}", file=sys.stderr)
+    if thread_errors:
+        print(f"{len(thread_errors)} background thread(s) failed, see the tracebacks above", file=sys.stderr)
+    return 1 if summary["failed"] or thread_errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,406 @@
+import hashlib
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+import deadlines
+from config import GEMINI_CONFIG
+from deadlines import DeadlineExceeded
+from metrics import annotate, register_collector
+
+# Lower rank is served first: a candidate waiting on a score outranks stocking the question bank
+PRIORITIES = {"live": 0, "prefetch": 1, "background": 2}
+
+_local = threading.local()
+
+
+def _priority_source() -> Union[str, Callable[[], str]]:
+    return getattr(_local, "priority", "live")
+
+
+def current_priority() -> str:
+    source = _priority_source()
+    return source() if callable(source) else source
+
+
+@contextmanager
+def priority(name: Union[str, Callable[[], str]]):
+    """Run LLM calls made by this thread under a priority class.
+
+    `name` may be a callable, read again while a request waits for admission,
+    for work whose urgency can change (see Scheduler.reprioritize).
+    """
+    previous = _priority_source()
+    _local.priority = name
+    try:
+        yield
+    finally:
+        _local.priority = previous
+
+
+def bind(func: Callable) -> Callable:
+    """Wrap func so it runs under the calling thread's priority, e.g. on a worker pool."""
+    name = _priority_source()
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with priority(name):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def request_key(prompt: str, profile: str) -> str:
+    return hashlib.sha256(f"{profile}\0{prompt}".encode()).hexdigest()
+
+
+class TokenBucket:
+    """Classic token bucket. Not thread-safe on its own; the scheduler holds its lock."""
+
+    def __init__(self, rate_per_second: float, capacity: float):
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self.level = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, cost: float, now: float) -> float:
+        """Seconds until `cost` can be taken (costs above capacity only need a full bucket)."""
+        self._refill(now)
+        cost = min(cost, self.capacity)
+        return 0.0 if self.level >= cost else (cost - self.level) / self.rate
+
+    def take(self, cost: float):
+        # May go negative when actual usage is charged after the fact
+        self.level -= cost
+
+
+class _SharedCall(Future):
+    """Result of one blocking request, shared by every caller that joined it."""
+
+    def __init__(self, rank: int):
+        super().__init__()
+        self.rank = rank
+
+
+class _SharedStream:
+    """One streamed response, shared by every caller that joined it.
+
+    There is no fixed leader: whichever consumer needs a chunk nobody has
+    received yet pulls it from the upstream iterator and publishes it to the
+    others. The upstream is closed early only when the last consumer detaches.
+    """
+
+    def __init__(self, source: Iterator[str], on_finish: Callable[["_SharedStream"], None], rank: int):
+        self.rank = rank
+        self.chunks: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.consumers = 0
+        self._source = source
+        self._on_finish = on_finish
+        self._pulling = False
+        self._condition = threading.Condition()
+
+    def _finish(self, error: Optional[BaseException] = None):
+        with self._condition:
+            self.done = True
+            self.error = error
+            self._condition.notify_all()
+        self._on_finish(self)
+
+    def _pull(self):
+        """Fetch the next upstream chunk on behalf of every consumer."""
+        try:
+            chunk = next(self._source)
+        except StopIteration:
+            self._finish()
+        except BaseException as e:
+            self._finish(e)
+        else:
+            with self._condition:
+                self.chunks.append(chunk)
+        finally:
+            with self._condition:
+                self._pulling = False
+                self._condition.notify_all()
+
+    def consume(self) -> Iterator[str]:
+        i = 0
+        while True:
+            with self._condition:
+                ready = lambda: len(self.chunks) > i or self.done or not self._pulling  # noqa: E731
+                if not self._condition.wait_for(ready, deadlines.remaining()):
+                    raise DeadlineExceeded("the shared stream did not finish before the deadline")
+                chunks = self.chunks[i:]
+                done, error = self.done, self.error
+                pull = not chunks and not done
+                if pull:
+                    self._pulling = True
+            if pull:
+                self._pull()
+                continue
+            for chunk in chunks:
+                yield chunk
+            i += len(chunks)
+            if done and i >= len(self.chunks):
+                if error is not None:
+                    raise error
+                return
+
+    def close(self):
+        """Stop the upstream after its last consumer went away (no one is pulling by then)."""
+        with self._condition:
+            if self.done:
+                return
+            self.done = True
+            self.error = RuntimeError("The shared stream was abandoned before it finished")
+        self._source.close()
+
+
+class Scheduler:
+    """Admits LLM requests in priority order under request/token rate limits and a concurrency cap.
+
+    Identical requests already in flight are coalesced: later callers wait for
+    and share the first caller's response instead of sending their own, as
+    long as that request runs at their priority or a more urgent one. A
+    caller only inherits another's DeadlineExceeded once its own deadline
+    has passed too.
+    """
+
+    def __init__(self, requests_per_minute: float = GEMINI_CONFIG["requests_per_minute"],
+                 tokens_per_minute: float = GEMINI_CONFIG["tokens_per_minute"],
+                 burst_seconds: float = GEMINI_CONFIG["burst_seconds"],
+                 max_concurrent: int = GEMINI_CONFIG["max_concurrent"],
+                 coalesce: bool = GEMINI_CONFIG["coalesce"], window: int = 1000):
+        self.max_concurrent = max_concurrent
+        self.coalesce_enabled = coalesce
+        self._requests = TokenBucket(requests_per_minute / 60, max(1.0, requests_per_minute / 60 * burst_seconds))
+        self._tokens = TokenBucket(tokens_per_minute / 60, tokens_per_minute / 60 * burst_seconds) if tokens_per_minute else None
+        self._condition = threading.Condition()
+        self._waiting: List[Tuple[int, int]] = []
+        self._waiting_by_priority = {name: 0 for name in PRIORITIES}
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._calls: Dict[str, Union[_SharedCall, _SharedStream]] = {}
+        self._waits = {name: deque(maxlen=window) for name in PRIORITIES}
+        self.admitted = 0
+        self.coalesced = 0
+
+    def _delay(self, cost: float) -> float:
+        now = time.monotonic()
+        delay = self._requests.wait_time(1, now)
+        if self._tokens is not None:
+            delay = max(delay, self._tokens.wait_time(cost, now))
+        return delay
+
+    @contextmanager
+    def slot(self, estimated_tokens: float = 0, priority_name: Optional[str] = None, timeout: Optional[float] = None):
+        """Block until this request may be sent, and hold a concurrency slot while it runs.
+
+        Raises DeadlineExceeded, leaving the queue, if it is not admitted within `timeout` seconds.
+        """
+        resolve = (lambda: priority_name) if priority_name else current_priority
+        name = resolve()
+        ticket = (PRIORITIES[name], next(self._seq))
+        started = time.monotonic()
+        give_up = None if timeout is None else started + timeout
+        with self._condition:
+            heapq.heappush(self._waiting, ticket)
+            self._waiting_by_priority[name] += 1
+            while True:
+                left = None if give_up is None else give_up - time.monotonic()
+                if left is not None and left <= 0:
+                    self._waiting.remove(ticket)
+                    heapq.heapify(self._waiting)
+                    self._waiting_by_priority[name] -= 1
+                    # The next ticket in line may be admissible now
+                    self._condition.notify_all()
+                    raise DeadlineExceeded("the request was not admitted before the deadline")
+                latest = resolve()
+                if latest != name:
+                    # Requeue at the new rank, keeping the place in line within it
+                    self._waiting.remove(ticket)
+                    self._waiting_by_priority[name] -= 1
+                    ticket = (PRIORITIES[latest], ticket[1])
+                    self._waiting.append(ticket)
+                    heapq.heapify(self._waiting)
+                    self._waiting_by_priority[latest] += 1
+                    name = latest
+                if self._waiting[0] == ticket and self._in_flight < self.max_concurrent:
+                    delay = self._delay(estimated_tokens)
+                    if delay <= 0:
+                        break
+                    self._condition.wait(delay if left is None else min(delay, left))
+                else:
+                    self._condition.wait(left)
+            heapq.heappop(self._waiting)
+            self._waiting_by_priority[name] -= 1
+            self._requests.take(1)
+            if self._tokens is not None:
+                self._tokens.take(estimated_tokens)
+            self._in_flight += 1
+            self.admitted += 1
+            waited = time.monotonic() - started
+            self._waits[name].append(waited)
+            # The next ticket in line may be admissible now
+            self._condition.notify_all()
+        annotate(scheduler_wait_seconds=waited)
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._in_flight -= 1
+                self._condition.notify_all()
+
+    def reprioritize(self):
+        """Have waiting requests read their priority again (after a callable priority changed)."""
+        with self._condition:
+            self._condition.notify_all()
+
+    def charge(self, tokens: float):
+        """Debit tokens that were not known when the request was admitted (e.g. the response)."""
+        if self._tokens is not None and tokens > 0:
+            with self._condition:
+                self._tokens.take(tokens)
+
+    def _join(self, key: str, rank: int) -> Optional[Union[_SharedCall, _SharedStream]]:
+        """The in-flight call for key if it runs at least as urgently as `rank`. Hold the lock."""
+        call = self._calls.get(key)
+        if call is None or call.rank > rank:
+            # A live caller never waits behind background work: it sends its own request instead
+            return None
+        self.coalesced += 1
+        annotate(coalesced=1)
+        return call
+
+    def run(self, key: str, func: Callable):
+        """Call func, or wait for the identical call already in flight and share its result."""
+        if not self.coalesce_enabled:
+            return func()
+        rank = PRIORITIES[current_priority()]
+        while True:
+            with self._condition:
+                future = self._join(key, rank)
+                leader = future is None
+                if leader:
+                    future = self._calls[key] = _SharedCall(rank)
+            if leader:
+                break
+            try:
+                return future.result(timeout=deadlines.remaining())
+            except DeadlineExceeded:
+                # The leader ran out of its own time; send the request again if this caller has some left
+                if deadlines.expired():
+                    raise
+            except FutureTimeout:
+                # Checked second: DeadlineExceeded is a TimeoutError too
+                raise DeadlineExceeded("the shared request did not finish before the deadline") from None
+        try:
+            result = func()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self._forget(key, future)
+
+    def run_stream(self, key: str, func: Callable[[], Iterator[str]]) -> Iterator[str]:
+        """Stream from func, or join the identical stream already in flight.
+
+        A caller that stops reading only detaches: the others keep receiving
+        the response, and the upstream request is closed when none are left.
+        """
+        if not self.coalesce_enabled:
+            yield from func()
+            return
+        rank = PRIORITIES[current_priority()]
+        received = 0
+        while True:
+            with self._condition:
+                shared = self._join(key, rank)
+                if shared is None:
+                    shared = self._calls[key] = _SharedStream(func(), lambda call: self._forget(key, call), rank)
+                shared.consumers += 1
+            try:
+                for chunk in shared.consume():
+                    received += 1
+                    yield chunk
+                return
+            except DeadlineExceeded:
+                # Another caller's deadline ended the shared request; start over if nothing was read yet
+                if received or deadlines.expired():
+                    raise
+            finally:
+                with self._condition:
+                    shared.consumers -= 1
+                    last = shared.consumers == 0
+                    if last and self._calls.get(key) is shared:
+                        del self._calls[key]
+                if last:
+                    shared.close()
+
+    def _forget(self, key: str, call: object):
+        """Stop offering a finished or abandoned call to new callers."""
+        with self._condition:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+
+    def stats(self) -> Dict[str, object]:
+        """Queue depth, in-flight requests and admission wait percentiles per priority."""
+        with self._condition:
+            waits = {name: sorted(values) for name, values in self._waits.items()}
+            stats = {
+                "queue_depth": dict(self._waiting_by_priority),
+                "in_flight": self._in_flight,
+                "admitted": self.admitted,
+                "coalesced": self.coalesced,
+            }
+        stats["wait_seconds"] = {
+            name: {
+                "p50": values[len(values) // 2] if values else 0.0,
+                "p95": values[min(len(values) - 1, int(0.95 * len(values)))] if values else 0.0,
+                "max": values[-1] if values else 0.0,
+            }
+            for name, values in waits.items()
+        }
+        return stats
+
+    def samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        """Gauges for the metrics endpoint."""
+        stats = self.stats()
+        samples = [
+            ("llm_in_flight", {}, stats["in_flight"]),
+            ("llm_admitted_total", {}, stats["admitted"]),
+            ("llm_coalesced_total", {}, stats["coalesced"]),
+        ]
+        for name, depth in stats["queue_depth"].items():
+            samples.append(("llm_queue_depth", {"priority": name}, depth))
+        for name, waits in stats["wait_seconds"].items():
+            samples.append(("llm_queue_wait_seconds", {"priority": name, "quantile": "0.5"}, waits["p50"]))
+            samples.append(("llm_queue_wait_seconds", {"priority": name, "quantile": "0.95"}, waits["p95"]))
+        return samples
+
+
+_scheduler: Optional[Scheduler] = None
+_lock = threading.Lock()
+
+
+def get_scheduler() -> Scheduler:
+    """Return the process-wide scheduler shared by every LLM client."""
+    global _scheduler
+    if _scheduler is None:
+        with _lock:
+            if _scheduler is None:
+                _scheduler = Scheduler()
+                register_collector(lambda: get_scheduler().samples())
+    return _scheduler
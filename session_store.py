@@ -0,0 +1,269 @@
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Dict, MutableMapping, Optional, Tuple, Type
+
+from config import SESSION_STORE_CONFIG
+from records import Answer, Question
+
+# Session state that is checkpointed; everything else is rebuilt on restore
+PERSISTED_KEYS = (
+    "stage", "user_name", "years_of_experience", "interview_id", "current_question",
+    "show_transition", "transition_deadline", "prepare_deadline", "start_recording",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS answers (
+    session_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    answer TEXT NOT NULL,
+    PRIMARY KEY (session_id, idx)
+);
+CREATE TABLE IF NOT EXISTS transcripts (
+    session_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    transcript TEXT NOT NULL,
+    audio TEXT,
+    PRIMARY KEY (session_id, idx)
+);
+"""
+
+
+class SessionStore:
+    """Interface for interview checkpoints.
+
+    A state is a JSON-serializable dict; answers are stored separately by
+    question index so each can be written as soon as it is evaluated, and
+    transcripts as soon as they are ready, before the answer is scored. A
+    store shared between server processes (Redis, Postgres...) implements
+    the same methods.
+    """
+
+    name = "base"
+
+    def save(self, session_id: str, state: Dict[str, Any]):
+        raise NotImplementedError
+
+    def save_answer(self, session_id: str, index: int, answer: Answer):
+        raise NotImplementedError
+
+    def save_transcript(self, session_id: str, index: int, transcript: str, audio: Optional[str]):
+        raise NotImplementedError
+
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Return the saved state with an "answers" dict of index -> Answer and a
+        "transcripts" dict of index -> (transcript, audio digest), or None."""
+        raise NotImplementedError
+
+    def delete(self, session_id: str):
+        raise NotImplementedError
+
+
+class MemorySessionStore(SessionStore):
+    """Per-process store: survives reconnects, not restarts."""
+
+    name = "memory"
+
+    def __init__(self):
+        self._states: Dict[str, Dict[str, Any]] = {}
+        self._answers: Dict[str, Dict[int, Answer]] = {}
+        self._transcripts: Dict[str, Dict[int, Tuple[str, Optional[str]]]] = {}
+        self._lock = threading.Lock()
+
+    def save(self, session_id: str, state: Dict[str, Any]):
+        with self._lock:
+            self._states[session_id] = state
+
+    def save_answer(self, session_id: str, index: int, answer: Answer):
+        with self._lock:
+            self._answers.setdefault(session_id, {})[index] = answer
+
+    def save_transcript(self, session_id: str, index: int, transcript: str, audio: Optional[str]):
+        with self._lock:
+            self._transcripts.setdefault(session_id, {})[index] = (transcript, audio)
+
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            state = self._states.get(session_id)
+            if state is None:
+                return None
+            return dict(state, answers=dict(self._answers.get(session_id, {})),
+                        transcripts=dict(self._transcripts.get(session_id, {})))
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._states.pop(session_id, None)
+            self._answers.pop(session_id, None)
+            self._transcripts.pop(session_id, None)
+
+
+class SQLiteSessionStore(SessionStore):
+    """Checkpoints in a local SQLite file, shared by every worker on the host."""
+
+    name = "sqlite"
+
+    def __init__(self, path: str = SESSION_STORE_CONFIG["path"], ttl_seconds: float = SESSION_STORE_CONFIG["ttl_seconds"]):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            expired = time.time() - ttl_seconds
+            conn.execute("DELETE FROM answers WHERE session_id IN (SELECT id FROM sessions WHERE updated_at < ?)", (expired,))
+            conn.execute("DELETE FROM transcripts WHERE session_id IN (SELECT id FROM sessions WHERE updated_at < ?)", (expired,))
+            conn.execute("DELETE FROM sessions WHERE updated_at < ?", (expired,))
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def save(self, session_id: str, state: Dict[str, Any]):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (id, state, updated_at) VALUES (?, ?, ?)",
+                (session_id, json.dumps(state, separators=(",", ":")), time.time())
+            )
+
+    def save_answer(self, session_id: str, index: int, answer: Answer):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO answers (session_id, idx, answer) VALUES (?, ?, ?)",
+                (session_id, index, json.dumps(answer.to_dict(), separators=(",", ":")))
+            )
+
+    def save_transcript(self, session_id: str, index: int, transcript: str, audio: Optional[str]):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO transcripts (session_id, idx, transcript, audio) VALUES (?, ?, ?, ?)",
+                (session_id, index, transcript, audio)
+            )
+
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT state FROM sessions WHERE id = ? AND updated_at > ?",
+                (session_id, time.time() - self.ttl_seconds)
+            ).fetchone()
+            if row is None:
+                return None
+            answers = conn.execute("SELECT idx, answer FROM answers WHERE session_id = ?", (session_id,)).fetchall()
+            transcripts = conn.execute(
+                "SELECT idx, transcript, audio FROM transcripts WHERE session_id = ?", (session_id,)
+            ).fetchall()
+        state = json.loads(row[0])
+        state["answers"] = {idx: Answer.from_dict(json.loads(answer)) for idx, answer in answers}
+        state["transcripts"] = {idx: (transcript, audio) for idx, transcript, audio in transcripts}
+        return state
+
+    def delete(self, session_id: str):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM answers WHERE session_id = ?", (session_id,))
+            conn.execute("DELETE FROM transcripts WHERE session_id = ?", (session_id,))
+            conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+
+STORES: Dict[str, Type[SessionStore]] = {
+    MemorySessionStore.name: MemorySessionStore,
+    SQLiteSessionStore.name: SQLiteSessionStore,
+}
+
+_store: Optional[SessionStore] = None
+_lock = threading.Lock()
+
+
+def get_session_store() -> SessionStore:
+    """Return the process-wide session store, creating it on first use."""
+    global _store
+    if _store is None:
+        with _lock:
+            if _store is None:
+                _store = STORES[SESSION_STORE_CONFIG["backend"]]()
+    return _store
+
+
+def checkpoint(state: MutableMapping[str, Any]):
+    """Save the persisted keys and the interview questions of a session."""
+    if not state.get("interview_id"):
+        return
+    snapshot = {key: state.get(key) for key in PERSISTED_KEYS}
+    questions = state.get("interview_questions", [])
+    snapshot["interview_questions"] = [question.to_dict() for question in questions]
+    # Questions may still be streaming in; keep the planned total so a restore can fetch the rest
+    stream = state.get("question_stream")
+    snapshot["total_questions"] = stream.total if stream is not None else len(questions)
+    get_session_store().save(state["interview_id"], snapshot)
+
+
+def persist_answer(session_id: str, index: int, job: Dict[str, Any]):
+    """Save an answer job to the store as it progresses.
+
+    A job scored in batches saves its transcript as soon as it is ready, so a
+    restore can score it again instead of losing it; every job saves the
+    answer once it is evaluated.
+    """
+    store = get_session_store()
+
+    def transcribed(f: Future):
+        if f.exception() is None:
+            store.save_transcript(session_id, index, f.result(), job.get("audio"))
+
+    def done(f: Future):
+        if f.exception() is None:
+            store.save_answer(session_id, index, f.result())
+    if "transcript" in job:
+        job["transcript"].add_done_callback(transcribed)
+    job["future"].add_done_callback(done)
+
+
+def restore(state: MutableMapping[str, Any], session_id: str) -> bool:
+    """Load a checkpoint into session state. Returns False if there is none.
+
+    Answers that were transcribed but not yet scored come back as batched jobs
+    waiting to be scheduled (see pipeline.flush_batches). Answers lost before
+    their transcript was saved come back as failed jobs, so the report marks
+    them instead of waiting forever.
+    No question stream is restored: state["total_questions"] tells the caller
+    how many questions the interview should have.
+    """
+    saved = get_session_store().load(session_id)
+    if saved is None:
+        return False
+    answers = saved.pop("answers")
+    transcripts = saved.pop("transcripts", {})
+    questions = [Question.from_dict(q) for q in saved.pop("interview_questions")]
+    state["total_questions"] = saved.pop("total_questions", None) or len(questions)
+    for key in PERSISTED_KEYS:
+        state[key] = saved.get(key)
+    state["interview_questions"] = questions
+    state["question_stream"] = None
+    jobs = []
+    for index in range(min(state["current_question"], len(questions))):
+        future: Future = Future()
+        if index in answers:
+            future.set_result(answers[index])
+        elif index in transcripts:
+            text, audio = transcripts[index]
+            transcript: Future = Future()
+            transcript.set_result(text)
+            job = {"question": questions[index], "audio": audio, "transcript": transcript, "future": future, "scheduled": False}
+            persist_answer(session_id, index, job)
+            jobs.append(job)
+            continue
+        else:
+            future.set_exception(RuntimeError("the answer was lost when the interview was interrupted"))
+        jobs.append({"question": questions[index], "future": future})
+    state["answer_jobs"] = jobs
+    return True
@@ -0,0 +1,306 @@
+import io
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+import wave
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Type
+
+import speech_recognition as sr
+
+import deadlines
+from config import SPEECH_CONFIG
+from audio_processing import split_at_pauses
+
+
+class TranscriptionBackend:
+    """Interface for speech-to-text engines.
+
+    Backends raise sr.UnknownValueError when nothing intelligible was said and
+    sr.RequestError when the engine itself failed.
+    """
+
+    name = "base"
+    cpu_bound = False  # CPU-bound backends run on the process pool
+
+    @classmethod
+    def check(cls):
+        """Raise sr.RequestError if the backend cannot start in this environment."""
+
+    def transcribe(self, audio_bytes: bytes) -> str:
+        raise NotImplementedError
+
+
+class GoogleBackend(TranscriptionBackend):
+    """Online recognition through the Google Web Speech API."""
+
+    name = "google"
+
+    def transcribe(self, audio_bytes: bytes) -> str:
+        r = sr.Recognizer()
+        # Bounds the HTTP request; a timeout surfaces as sr.RequestError
+        r.operation_timeout = deadlines.timeout(SPEECH_CONFIG["timeout"])
+        with sr.AudioFile(io.BytesIO(audio_bytes)) as source:
+            audio = r.record(source, duration=SPEECH_CONFIG["phrase_time_limit"])
+        return r.recognize_google(audio, language=SPEECH_CONFIG["language"])
+
+
+class VoskBackend(TranscriptionBackend):
+    """Offline CPU recognition with a Vosk (Kaldi) model loaded once per process."""
+
+    name = "vosk"
+    cpu_bound = True
+
+    def __init__(self, model_path: str = SPEECH_CONFIG["vosk_model_path"]):
+        self.check(model_path)
+        import vosk
+        vosk.SetLogLevel(-1)
+        self._vosk = vosk
+        try:
+            self._model = vosk.Model(model_path)
+        except Exception as e:
+            raise sr.RequestError(f"could not load the Vosk model from {model_path}: {e}") from e
+
+    @classmethod
+    def check(cls, model_path: str = SPEECH_CONFIG["vosk_model_path"]):
+        try:
+            import vosk  # noqa: F401
+        except ImportError as e:
+            raise sr.RequestError("the 'vosk' package is required for the offline speech backend") from e
+        if not os.path.isdir(model_path):
+            raise sr.RequestError(f"no Vosk model at {model_path}; download one from https://alphacephei.com/vosk/models")
+
+    def transcribe(self, audio_bytes: bytes) -> str:
+        with wave.open(io.BytesIO(audio_bytes)) as wav:
+            needs_conversion = wav.getnchannels() != 1 or wav.getsampwidth() != 2
+        if needs_conversion:
+            # Kaldi expects 16-bit mono PCM
+            from pydub import AudioSegment
+            segment = AudioSegment.from_wav(io.BytesIO(audio_bytes)).set_channels(1).set_sample_width(2)
+            audio_bytes = segment.export(format="wav").read()
+        with wave.open(io.BytesIO(audio_bytes)) as wav:
+            recognizer = self._vosk.KaldiRecognizer(self._model, wav.getframerate())
+            while True:
+                frames = wav.readframes(4000)
+                if not frames:
+                    break
+                recognizer.AcceptWaveform(frames)
+        text = json.loads(recognizer.FinalResult()).get("text", "").strip()
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+
+class StubBackend(TranscriptionBackend):
+    """Local stand-in recognizer with configurable latency and failure rate (tests, load runs)."""
+
+    name = "stub"
+
+    def __init__(self, text: str = "You type equals SUM, open a bracket and select the range A1 to A10, then press enter.",
+                 latency: float = 0.0, jitter: float = 0.0, failure_rate: float = 0.0, seed: Optional[int] = None):
+        self.text = text
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def transcribe(self, audio_bytes: bytes) -> str:
+        with self._lock:
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            fail = self._random.random() < self.failure_rate
+        limit = deadlines.timeout(SPEECH_CONFIG["timeout"])
+        if delay > limit:
+            time.sleep(limit)
+            raise sr.RequestError("recognition request timed out")
+        time.sleep(delay)
+        if fail:
+            raise sr.RequestError("Injected stub failure")
+        return self.text
+
+
+BACKENDS: Dict[str, Type[TranscriptionBackend]] = {
+    GoogleBackend.name: GoogleBackend,
+    VoskBackend.name: VoskBackend,
+    StubBackend.name: StubBackend,
+}
+
+# Backend instance for the current process (the Streamlit server or a pool worker)
+_backend: Optional[TranscriptionBackend] = None
+_pools: Dict[str, ProcessPoolExecutor] = {}
+_segment_executor: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+
+
+def _init_worker(name: str):
+    """Load the backend once when a pool worker process starts."""
+    global _backend
+    _backend = BACKENDS[name]()
+
+
+def _transcribe_in_worker(audio_bytes: bytes) -> str:
+    return _backend.transcribe(audio_bytes)
+
+
+def get_backend(name: str = SPEECH_CONFIG["backend"]) -> TranscriptionBackend:
+    """Return the in-process backend, creating it on first use."""
+    global _backend
+    if _backend is None or _backend.name != name:
+        with _lock:
+            if _backend is None or _backend.name != name:
+                _backend = BACKENDS[name]()
+    return _backend
+
+
+def set_backend(backend: TranscriptionBackend) -> TranscriptionBackend:
+    """Replace the in-process backend, e.g. with a configured StubBackend."""
+    global _backend
+    with _lock:
+        _backend = backend
+    return backend
+
+
+def get_pool(name: str = SPEECH_CONFIG["backend"]) -> ProcessPoolExecutor:
+    """Return the bounded process pool used for CPU-bound decoding with a backend.
+
+    The backend is checked here first, so a missing model fails this call with
+    sr.RequestError instead of breaking the pool's workers.
+    """
+    pool = _pools.get(name)
+    if pool is None:
+        with _lock:
+            pool = _pools.get(name)
+            if pool is None:
+                BACKENDS[name].check()
+                pool = ProcessPoolExecutor(
+                    max_workers=SPEECH_CONFIG["workers"],
+                    initializer=_init_worker,
+                    initargs=(name,)
+                )
+                _pools[name] = pool
+    return pool
+
+
+def _discard_pool(name: str, pool: ProcessPoolExecutor):
+    """Forget a broken pool so the next call starts a fresh one."""
+    with _lock:
+        if _pools.get(name) is pool:
+            del _pools[name]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _submit_to_pool(name: str, audio_bytes: bytes) -> Future:
+    pool = get_pool(name)
+    try:
+        future = pool.submit(_transcribe_in_worker, audio_bytes)
+    except BrokenProcessPool as e:
+        _discard_pool(name, pool)
+        raise sr.RequestError(f"speech worker processes failed: {e}") from e
+
+    def discard_if_broken(done: Future):
+        if not done.cancelled() and isinstance(done.exception(), BrokenProcessPool):
+            _discard_pool(name, pool)
+    future.add_done_callback(discard_if_broken)
+    return future
+
+
+def get_segment_executor() -> ThreadPoolExecutor:
+    """Return the thread pool used to send segments to online backends in parallel."""
+    global _segment_executor
+    if _segment_executor is None:
+        with _lock:
+            if _segment_executor is None:
+                _segment_executor = ThreadPoolExecutor(
+                    max_workers=SPEECH_CONFIG["segment_workers"],
+                    thread_name_prefix="speech-segment"
+                )
+    return _segment_executor
+
+
+def _words(text: str) -> List[str]:
+    return [re.sub(r"[^\w']", "", word.lower()) for word in text.split()]
+
+
+# Conversational speech runs at about three words per second
+_WORDS_PER_SECOND = 3.0
+
+
+def overlap_words(overlap_ms: int = SPEECH_CONFIG["segment_overlap_ms"]) -> int:
+    """Most words two adjacent segments can both contain: those inside the overlap plus one straddling its edge."""
+    return math.ceil(overlap_ms / 1000 * _WORDS_PER_SECOND) + 1
+
+
+def stitch_transcripts(parts: List[str], max_overlap_words: Optional[int] = None) -> str:
+    """Join segment transcripts in order, dropping words repeated across a segment overlap.
+
+    Only up to max_overlap_words (by default derived from the segment overlap)
+    are compared, so a phrase the candidate really repeated at a cut is kept.
+    """
+    max_overlap_words = overlap_words() if max_overlap_words is None else max_overlap_words
+    words: List[str] = []
+    for part in parts:
+        new_words = part.split()
+        if words and new_words:
+            tail, head = _words(" ".join(words[-max_overlap_words:])), _words(" ".join(new_words[:max_overlap_words]))
+            for size in range(min(len(tail), len(head)), 0, -1):
+                if tail[-size:] == head[:size]:
+                    new_words = new_words[size:]
+                    break
+        words.extend(new_words)
+    return " ".join(words)
+
+
+def _result(future: Future) -> str:
+    """Wait for a transcription no longer than the current deadline allows."""
+    try:
+        return future.result(timeout=deadlines.remaining())
+    except FutureTimeoutError:
+        future.cancel()
+        raise deadlines.DeadlineExceeded("transcription ran past the answer's time budget")
+    except BrokenProcessPool as e:
+        raise sr.RequestError(f"speech worker processes failed: {e}") from e
+
+
+def _transcribe_segments(segments: List[bytes], name: str) -> str:
+    """Transcribe segments concurrently and stitch the results back together in order."""
+    if BACKENDS[name].cpu_bound:
+        futures = [_submit_to_pool(name, segment) for segment in segments]
+    else:
+        backend = get_backend(name)
+        futures = [get_segment_executor().submit(deadlines.bind(backend.transcribe), segment) for segment in segments]
+    parts = []
+    for future in futures:
+        try:
+            parts.append(_result(future))
+        except sr.UnknownValueError:
+            # A segment with nothing intelligible (a long pause) should not sink the whole answer
+            parts.append("")
+    text = stitch_transcripts(parts)
+    if not text:
+        raise sr.UnknownValueError()
+    return text
+
+
+def transcribe(audio_bytes: bytes, name: str = SPEECH_CONFIG["backend"]) -> str:
+    """Transcribe WAV bytes with the configured backend.
+
+    Recordings longer than SPEECH_CONFIG['segment_seconds'] are split at pauses
+    and the segments transcribed in parallel.
+    """
+    segments = split_at_pauses(
+        audio_bytes,
+        SPEECH_CONFIG["segment_seconds"],
+        SPEECH_CONFIG["min_segment_seconds"],
+        SPEECH_CONFIG["segment_overlap_ms"]
+    )
+    if len(segments) > 1:
+        return _transcribe_segments(segments, name)
+    if BACKENDS[name].cpu_bound:
+        # Decoding runs in worker processes so it never holds the server's GIL
+        return _result(_submit_to_pool(name, audio_bytes))
+    return get_backend(name).transcribe(audio_bytes)
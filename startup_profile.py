@@ -0,0 +1,117 @@
+"""Startup profiler: import time per module and time to the first rendered screen.
+
+Enabled with STARTUP_PROFILE=1 (read here rather than in config.py so that
+config itself is timed). app.py calls start() before its other imports
+and finish() after the first screen has rendered; the report is printed to the
+server console and, with STARTUP_PROFILE_PATH, written as JSON.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from importlib.abc import MetaPathFinder
+from typing import Dict, List, Optional
+
+ENABLED = os.getenv("STARTUP_PROFILE", "0") == "1"
+REPORT_PATH = os.getenv("STARTUP_PROFILE_PATH", "")
+TOP_MODULES = 25
+
+_lock = threading.Lock()
+_started: Optional[float] = None
+_finished = False
+_timings: Dict[str, Dict[str, float]] = {}
+_local = threading.local()
+
+
+class _TimedLoader:
+    """Wraps a module loader to time its exec_module, excluding nested imports from self time."""
+
+    def __init__(self, loader):
+        self._loader = loader
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        stack.append(0.0)
+        started = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            total = time.perf_counter() - started
+            nested = stack.pop()
+            if stack:
+                stack[-1] += total
+            _timings[module.__name__] = {"self": total - nested, "total": total, "outermost": not stack}
+
+
+class _TimingFinder(MetaPathFinder):
+    """Meta path hook that lets the regular finders locate modules and times their loading."""
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimedLoader(spec.loader)
+                return spec
+        return None
+
+
+_finder = _TimingFinder()
+
+
+def start():
+    """Begin timing imports. Only the first call in a process has any effect."""
+    global _started
+    if not ENABLED:
+        return
+    with _lock:
+        if _started is None:
+            _started = time.perf_counter()
+            sys.meta_path.insert(0, _finder)
+
+
+def report(top: int = TOP_MODULES) -> Dict[str, object]:
+    """Elapsed time since start() and the slowest imports so far."""
+    modules: List[Dict[str, object]] = [
+        {"module": name, "self_ms": round(t["self"] * 1000, 2), "total_ms": round(t["total"] * 1000, 2)}
+        for name, t in _timings.items()
+    ]
+    modules.sort(key=lambda m: m["self_ms"], reverse=True)
+    return {
+        "elapsed_ms": round((time.perf_counter() - _started) * 1000, 2) if _started is not None else None,
+        "modules_imported": len(_timings),
+        "import_ms": round(sum(t["total"] for t in _timings.values() if t["outermost"]) * 1000, 2),
+        "slowest": modules[:top],
+    }
+
+
+def finish(stage: str):
+    """Stop timing and report once the first screen has rendered."""
+    global _finished
+    if not ENABLED or _started is None:
+        return
+    with _lock:
+        if _finished:
+            return
+        _finished = True
+        if _finder in sys.meta_path:
+            sys.meta_path.remove(_finder)
+    result = dict(report(), first_screen=stage)
+    print(f"[startup] first '{stage}' render after {result['elapsed_ms']:.0f} ms, "
+          f"{result['modules_imported']} modules imported in {result['import_ms']:.0f} ms")
+    for m in result["slowest"]:
+        print(f"[startup]   {m['module']:<50} self {m['self_ms']:>8.1f} ms  total {m['total_ms']:>8.1f} ms")
+    if REPORT_PATH:
+        with open(REPORT_PATH, "w") as f:
+            json.dump(result, f, indent=2)
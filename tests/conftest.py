@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The app is a set of flat modules in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("LLM_BACKEND", "stub")
+os.environ.setdefault("SPEECH_BACKEND", "stub")
+os.environ.setdefault("EVALUATION_CACHE_PATH", "")
@@ -0,0 +1,25 @@
+import analytics
+from records import Answer, Evaluation, Question
+
+QUESTION = Question("How do you freeze the top row?", "Basic Functions", ("View tab", "Freeze Panes"))
+
+
+def answers(score: float):
+    return [Answer(QUESTION, "answer", Evaluation(score, "fair", "", 1, 2))]
+
+
+def test_rerecorded_interview_wins_over_its_compacted_copy(tmp_path):
+    path = str(tmp_path)
+    partition = analytics.record_interview("a", "Ann", 3, answers(40), path=path, completed_at=1.8e9)
+    analytics.record_interview("b", "Bob", 3, answers(60), path=path, completed_at=1.8e9)
+    compacted = analytics.compact(analytics._partition(path, 1.8e9))
+    assert compacted is not None and partition != compacted
+    # The new file sorts before the compacted "part-" file, but it was written later
+    analytics.record_interview("a", "Ann", 3, answers(90), path=path, completed_at=1.8e9)
+
+    loaded = analytics.load_answers(path).set_index("interview_id")["score"]
+    assert loaded.to_dict() == {"a": 90, "b": 60}
+
+    analytics.compact(analytics._partition(path, 1.8e9))
+    loaded = analytics.load_answers(path).set_index("interview_id")["score"]
+    assert loaded.to_dict() == {"a": 90, "b": 60}
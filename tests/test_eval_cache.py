@@ -0,0 +1,72 @@
+import pytest
+
+import eval_cache
+from eval_cache import EvaluationCache
+
+QUESTION = {"question": "How do you freeze the top row?", "expected_points": ["View tab", "Freeze Panes"]}
+EVALUATION = {"score": 80, "rating": "good", "feedback": "Good.", "matches": 2, "total_points": 2}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = {"time": 1000.0}
+    monkeypatch.setattr(eval_cache.time, "time", lambda: now["time"])
+    return now
+
+
+def test_hit_after_put_and_trivial_differences_share_an_entry(clock):
+    cache = EvaluationCache(max_entries=10, ttl_seconds=60, disk_path="", version="v1")
+    assert cache.get(QUESTION, "View tab, then Freeze Panes.") is None
+    cache.put(QUESTION, "View tab, then Freeze Panes.", EVALUATION)
+    assert cache.get(QUESTION, "view tab then freeze panes") == EVALUATION
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = EvaluationCache(max_entries=10, ttl_seconds=60, disk_path="", version="v1")
+    cache.put(QUESTION, "answer", EVALUATION)
+    clock["time"] += 59
+    assert cache.get(QUESTION, "answer") == EVALUATION
+    clock["time"] += 2
+    assert cache.get(QUESTION, "answer") is None
+    assert cache.stats()["evictions"] == 1 and cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = EvaluationCache(max_entries=2, ttl_seconds=60, disk_path="", version="v1")
+    cache.put(QUESTION, "first", EVALUATION)
+    cache.put(QUESTION, "second", EVALUATION)
+    # Reading "first" makes "second" the least recently used
+    assert cache.get(QUESTION, "first") is not None
+    cache.put(QUESTION, "third", EVALUATION)
+    assert cache.get(QUESTION, "second") is None
+    assert cache.get(QUESTION, "first") is not None
+    assert cache.get(QUESTION, "third") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_failed_evaluations_are_not_cached(clock):
+    cache = EvaluationCache(max_entries=10, ttl_seconds=60, disk_path="", version="v1")
+    cache.put(QUESTION, "answer", dict(EVALUATION, error="timeout"))
+    assert cache.get(QUESTION, "answer") is None
+
+
+def test_disk_tier_survives_a_new_process_but_not_a_new_evaluator(clock, tmp_path):
+    path = str(tmp_path / "cache.db")
+    EvaluationCache(disk_path=path, version="v1").put(QUESTION, "answer", EVALUATION)
+    restarted = EvaluationCache(disk_path=path, version="v1")
+    assert restarted.get(QUESTION, "answer") == EVALUATION
+    assert restarted.stats()["disk_hits"] == 1
+    assert EvaluationCache(disk_path=path, version="v2").get(QUESTION, "answer") is None
+
+
+def test_samples_report_the_counters_to_the_metrics_endpoint(clock):
+    cache = EvaluationCache(max_entries=1, ttl_seconds=60, disk_path="", version="v1")
+    cache.put(QUESTION, "first", EVALUATION)
+    cache.put(QUESTION, "second", EVALUATION)
+    cache.get(QUESTION, "second")
+    cache.get(QUESTION, "first")
+    samples = {(name, tuple(labels.items())): value for name, labels, value in cache.samples()}
+    assert samples[("evaluation_cache_hits_total", (("tier", "memory"),))] == 1
+    assert samples[("evaluation_cache_misses_total", ())] == 1
+    assert samples[("evaluation_cache_evictions_total", ())] == 1
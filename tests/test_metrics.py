@@ -0,0 +1,18 @@
+from metrics import Metrics, Span
+
+
+def spend(metrics: Metrics, interview_id: str):
+    span = Span("evaluation", interview_id)
+    span.add(llm_calls=1, prompt_tokens=100, response_tokens=20)
+    metrics.record(span, 0.1)
+
+
+def test_per_interview_spend_evicts_the_least_recently_active_interview():
+    metrics = Metrics(max_interviews=2, jsonl_path="")
+    spend(metrics, "a")
+    spend(metrics, "b")
+    spend(metrics, "a")
+    spend(metrics, "c")
+    interviews = metrics.interviews()
+    assert list(interviews) == ["a", "c"]
+    assert interviews["a"]["llm_calls"] == 2
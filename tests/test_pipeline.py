@@ -0,0 +1,27 @@
+import pytest
+
+import llm
+from config import QUESTION_BANK_CONFIG
+from pipeline import QuestionStream
+from scheduler import get_scheduler
+
+
+@pytest.fixture(autouse=True)
+def stub_llm(monkeypatch):
+    monkeypatch.setitem(QUESTION_BANK_CONFIG, "enabled", False)
+    llm.set_backend(llm.StubBackend(latency=0.3))
+
+
+@pytest.mark.parametrize("cancel_first", [True, False])
+def test_cancelling_a_speculative_stream_does_not_cut_short_one_sharing_its_request(cancel_first):
+    # Two candidates entered the same years: their speculative streams send identical prompts
+    streams = [QuestionStream(3, 10, speculative=True), QuestionStream(3, 10, speculative=True)]
+    streams[0].wait_for(1, timeout=5)
+    assert get_scheduler().coalesced >= 1
+    cancelled, claimed = streams if cancel_first else streams[::-1]
+    cancelled.cancel()
+    claimed.claim()
+    assert claimed.wait_for(10, timeout=10)
+    claimed._thread.join(5)
+    assert claimed.error is None
+    assert len(claimed.questions) == claimed.total == 10
@@ -0,0 +1,219 @@
+import threading
+import time
+
+import pytest
+
+from deadlines import DeadlineExceeded, deadline
+from scheduler import Scheduler, TokenBucket, priority
+
+
+def _scheduler(**kwargs) -> Scheduler:
+    options = dict(requests_per_minute=1e6, tokens_per_minute=0, max_concurrent=1)
+    options.update(kwargs)
+    return Scheduler(**options)
+
+
+def _wait_until(condition, timeout: float = 5.0):
+    end = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < end, "timed out"
+        time.sleep(0.005)
+
+
+def _occupy(scheduler: Scheduler) -> threading.Event:
+    """Hold the only concurrency slot until the returned event is set."""
+    release, admitted = threading.Event(), threading.Event()
+
+    def hold():
+        with scheduler.slot(priority_name="live"):
+            admitted.set()
+            release.wait()
+    threading.Thread(target=hold, daemon=True).start()
+    admitted.wait()
+    return release
+
+
+def _queue(scheduler: Scheduler, name, order: list) -> threading.Thread:
+    def request():
+        with priority(name):
+            with scheduler.slot():
+                order.append(name() if callable(name) else name)
+    thread = threading.Thread(target=request, daemon=True)
+    thread.start()
+    return thread
+
+
+def _queued(scheduler: Scheduler) -> int:
+    return sum(scheduler.stats()["queue_depth"].values())
+
+
+def test_token_bucket_refills_at_its_rate():
+    bucket = TokenBucket(rate_per_second=2, capacity=4)
+    bucket._updated = 0.0
+    assert bucket.wait_time(4, now=0.0) == 0.0
+    bucket.take(4)
+    assert bucket.wait_time(1, now=0.0) == pytest.approx(0.5)
+    assert bucket.wait_time(1, now=0.5) == 0.0
+    # Never above capacity, however long it sat idle
+    assert bucket.wait_time(4, now=100.0) == 0.0
+    assert bucket.level == 4
+
+
+def test_token_bucket_costs_above_capacity_need_a_full_bucket():
+    bucket = TokenBucket(rate_per_second=1, capacity=2)
+    bucket._updated = 0.0
+    bucket.take(2)
+    assert bucket.wait_time(10, now=0.0) == pytest.approx(2.0)
+
+
+def test_requests_are_admitted_in_priority_order():
+    scheduler = _scheduler()
+    release = _occupy(scheduler)
+    order, threads = [], []
+    for name in ("background", "prefetch", "live"):
+        threads.append(_queue(scheduler, name, order))
+        _wait_until(lambda: _queued(scheduler) == len(threads))
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert order == ["live", "prefetch", "background"]
+
+
+def test_callable_priority_is_read_again_while_queued():
+    scheduler = _scheduler()
+    release = _occupy(scheduler)
+    urgency = {"name": "background"}
+    order = []
+    first = _queue(scheduler, lambda: urgency["name"], order)
+    _wait_until(lambda: _queued(scheduler) == 1)
+    second = _queue(scheduler, "prefetch", order)
+    _wait_until(lambda: _queued(scheduler) == 2)
+    urgency["name"] = "live"
+    scheduler.reprioritize()
+    _wait_until(lambda: scheduler.stats()["queue_depth"]["live"] == 1)
+    release.set()
+    first.join(5)
+    second.join(5)
+    assert order == ["live", "prefetch"]
+
+
+def test_slot_gives_up_at_the_deadline_and_leaves_the_queue():
+    scheduler = _scheduler()
+    release = _occupy(scheduler)
+    with pytest.raises(DeadlineExceeded):
+        with scheduler.slot(timeout=0.05):
+            pass
+    assert _queued(scheduler) == 0
+    release.set()
+
+
+def _chunks(closed: list, count: int = 10, pause: float = 0.01):
+    try:
+        for i in range(count):
+            time.sleep(pause)
+            yield str(i)
+    finally:
+        closed.append(True)
+
+
+def test_shared_stream_survives_the_first_caller_abandoning_it():
+    scheduler = _scheduler()
+    closed = []
+    first = scheduler.run_stream("key", lambda: _chunks(closed))
+    assert next(first) == "0"
+    received = []
+    follower = threading.Thread(target=lambda: received.extend(scheduler.run_stream("key", lambda: _chunks(closed))))
+    follower.start()
+    _wait_until(lambda: scheduler.coalesced == 1)
+    first.close()
+    follower.join(5)
+    assert received == [str(i) for i in range(10)]
+    # One upstream request, run to completion rather than closed early
+    assert closed == [True]
+
+
+def test_shared_stream_is_closed_when_every_caller_abandons_it():
+    scheduler = _scheduler()
+    closed = []
+    stream = scheduler.run_stream("key", lambda: _chunks(closed))
+    next(stream)
+    stream.close()
+    assert closed == [True]
+    # A later identical request starts afresh
+    assert list(scheduler.run_stream("key", lambda: iter(["new"]))) == ["new"]
+
+
+def test_identical_calls_share_one_result():
+    scheduler = _scheduler()
+    started, finish = threading.Event(), threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        finish.wait(5)
+        return "shared"
+    leader = threading.Thread(target=lambda: scheduler.run("key", slow))
+    leader.start()
+    started.wait()
+    results = []
+    follower = threading.Thread(target=lambda: results.append(scheduler.run("key", slow)))
+    follower.start()
+    _wait_until(lambda: scheduler.coalesced == 1)
+    finish.set()
+    leader.join(5)
+    follower.join(5)
+    assert results == ["shared"] and len(calls) == 1
+
+
+def test_live_callers_do_not_wait_behind_background_requests():
+    scheduler = _scheduler()
+    finish = threading.Event()
+
+    def background():
+        with priority("background"):
+            scheduler.run("key", lambda: finish.wait(5))
+    thread = threading.Thread(target=background)
+    thread.start()
+    _wait_until(lambda: "key" in scheduler._calls)
+    assert scheduler.run("key", lambda: "own") == "own"
+    assert scheduler.coalesced == 0
+    finish.set()
+    thread.join(5)
+
+
+def test_follower_with_time_left_retries_after_the_leaders_deadline():
+    scheduler = _scheduler()
+    started = threading.Event()
+
+    def leader():
+        def expire():
+            started.set()
+            time.sleep(0.1)
+            raise DeadlineExceeded("leader out of time")
+        with deadline(0.05):
+            with pytest.raises(DeadlineExceeded):
+                scheduler.run("key", expire)
+    thread = threading.Thread(target=leader)
+    thread.start()
+    started.wait()
+    with deadline(5):
+        assert scheduler.run("key", lambda: "retried") == "retried"
+    thread.join(5)
+
+
+def test_follower_gets_deadline_exceeded_once_its_own_deadline_passed():
+    scheduler = _scheduler()
+    started, finish = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        finish.wait(5)
+    thread = threading.Thread(target=lambda: scheduler.run("key", slow))
+    thread.start()
+    started.wait()
+    with deadline(0.05):
+        with pytest.raises(DeadlineExceeded):
+            scheduler.run("key", lambda: None)
+    finish.set()
+    thread.join(5)
@@ -0,0 +1,60 @@
+from concurrent.futures import Future
+
+import pytest
+
+import session_store
+from records import Answer, Evaluation, Question
+from session_store import MemorySessionStore, SQLiteSessionStore, checkpoint, persist_answer, restore
+
+QUESTION = Question.parse({"question": "What does VLOOKUP do?", "expected_points": ["lookup", "column"],
+                           "category": "Lookup", "voice_hints": ""})
+EVALUATION = Evaluation.parse({"score": 70, "rating": "good", "feedback": "Fine.", "matches": 1, "total_points": 2})
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, monkeypatch, tmp_path):
+    store = MemorySessionStore() if request.param == "memory" else SQLiteSessionStore(path=str(tmp_path / "sessions.db"))
+    monkeypatch.setattr(session_store, "_store", store)
+    return store
+
+
+def _batched_job() -> dict:
+    return {"question": QUESTION, "audio": "digest", "transcript": Future(), "future": Future(), "scheduled": False}
+
+
+def _checkpoint(current_question: int):
+    checkpoint({"interview_id": "s1", "stage": "interview", "current_question": current_question,
+                "interview_questions": [QUESTION] * 5, "years_of_experience": 3})
+
+
+def test_transcribed_answers_waiting_for_their_batch_are_restored_for_scoring(store):
+    jobs = [_batched_job() for _ in range(3)]
+    for index, job in enumerate(jobs):
+        persist_answer("s1", index, job)
+        job["transcript"].set_result(f"answer {index}")
+    jobs[0]["future"].set_result(Answer(QUESTION, "answer 0", EVALUATION))
+    _checkpoint(current_question=4)
+
+    state = {}
+    assert restore(state, "s1")
+    restored = state["answer_jobs"]
+    assert restored[0]["future"].result().evaluation.score == 70
+    for index in (1, 2):
+        assert restored[index]["transcript"].result() == f"answer {index}"
+        assert restored[index]["audio"] == "digest"
+        assert not restored[index]["future"].done() and not restored[index]["scheduled"]
+    # Nothing at all was saved for the fourth answer
+    assert "lost" in str(restored[3]["future"].exception())
+
+    # A re-queued answer is checkpointed once it is scored
+    restored[1]["future"].set_result(Answer(QUESTION, "answer 1", EVALUATION))
+    again = {}
+    restore(again, "s1")
+    assert again["answer_jobs"][1]["future"].result().answer == "answer 1"
+
+
+def test_restore_keeps_the_planned_number_of_questions(store):
+    _checkpoint(current_question=0)
+    state = {}
+    restore(state, "s1")
+    assert state["total_questions"] == 5 and state["question_stream"] is None
@@ -0,0 +1,46 @@
+import json
+
+from utils import JSONArrayStreamParser
+
+ITEMS = [
+    {"question": "What does {A1} mean in \"R1C1\" style?", "category": "References", "expected_points": ["a", "b}"]},
+    {"question": "Nested {\"objects\": [1, 2]}?", "category": "Data", "expected_points": [{"point": "c"}]},
+]
+
+
+def _feed(parser: JSONArrayStreamParser, text: str, size: int):
+    items = []
+    for start in range(0, len(text), size):
+        items.extend(parser.feed(text[start:start + size]))
+    return items
+
+
+def test_objects_are_emitted_however_the_text_is_chunked():
+    text = json.dumps(ITEMS)
+    for size in (1, 2, 7, len(text)):
+        assert _feed(JSONArrayStreamParser(), text, size) == ITEMS
+
+
+def test_each_object_is_emitted_as_soon_as_it_closes():
+    parser = JSONArrayStreamParser()
+    first = json.dumps(ITEMS[0])
+    assert parser.feed("[" + first[:-1]) == []
+    assert parser.feed("}, ") == [ITEMS[0]]
+
+
+def test_preamble_and_code_fences_are_skipped():
+    text = "Here are the questions:\n```json\n" + json.dumps(ITEMS) + "\n```\nGood luck!"
+    assert _feed(JSONArrayStreamParser(), text, 5) == ITEMS
+
+
+def test_malformed_objects_are_dropped_and_counted():
+    text = "[" + json.dumps(ITEMS[0]) + ", {\"question\": oops}, " + json.dumps(ITEMS[1]) + "]"
+    parser = JSONArrayStreamParser()
+    assert _feed(parser, text, 3) == ITEMS
+    assert parser.errors == 1
+
+
+def test_text_after_the_array_is_ignored():
+    parser = JSONArrayStreamParser()
+    assert parser.feed(json.dumps(ITEMS[:1]) + " {\"trailing\": 1}") == ITEMS[:1]
+    assert parser.feed("{\"more\": 2}") == []
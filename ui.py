@@ -1,9 +1,16 @@
 import streamlit as st
+import math
 import time
-import numpy as np
-import plotly.express as px
-from audio_recorder_streamlit import audio_recorder
-from utils import generate_questions_with_gemini, transcribe_audio, evaluate_answer_with_gemini
+import uuid
+from config import QUESTION_BANK_CONFIG, EVALUATION_CONFIG, INTERVIEW_CONFIG
+from pipeline import submit_answer, flush_batches, collect_answers, job_transcript, archive_interview, QuestionStream
+from question_bank import get_question_bank
+from prescorer import provisional_evaluation, transcript_problem
+from records import questions_from_dicts
+from session_store import checkpoint, persist_answer, get_session_store
+from report import answers_fingerprint, get_report, get_report_pdf, recommendation
+from metrics import annotate
+from audio_store import get_audio_store
 
 def welcome_screen():
     """Welcome screen with user introduction"""
@@ -21,15 +28,41 @@ def welcome_screen():
         st.markdown("---")
         user_name = st.text_input("Enter your name:", placeholder="Your full name")
         years_experience = st.number_input("Enter your years of experience with Excel:", min_value=0, max_value=50, step=1)
+        _prefetch_questions(years_experience)
         if st.button("Start Interview", type="primary", use_container_width=True):
             if user_name:
                 st.session_state.user_name = user_name
                 st.session_state.years_of_experience = years_experience
+                st.session_state.interview_id = uuid.uuid4().hex
+                # The id in the URL lets a reconnecting browser restore the interview
+                st.query_params["session"] = st.session_state.interview_id
                 st.session_state.stage = 'loading_questions'
                 st.rerun()
             else:
                 st.warning("Please enter your name to continue.")
 
+def _prefetch_questions(years: int):
+    """Speculatively generate questions for `years` while the candidate finishes the form.
+
+    The stream is keyed by the value: a changed value cancels it and starts a new
+    one. Nothing is fetched for the untouched default or when the bank can serve the band.
+    """
+    if not INTERVIEW_CONFIG["prefetch_questions"]:
+        return
+    previous = st.session_state.get("prefetch")
+    if previous is None:
+        st.session_state.prefetch = (years, None)
+        return
+    if previous[0] == years:
+        return
+    if previous[1]:
+        previous[1].cancel()
+    stream = None
+    count = QUESTION_BANK_CONFIG["questions_per_interview"]
+    if not QUESTION_BANK_CONFIG["enabled"] or get_question_bank().available(years) < count:
+        stream = QuestionStream(years, delay=INTERVIEW_CONFIG["prefetch_settle_seconds"], speculative=True)
+    st.session_state.prefetch = (years, stream)
+
 def loading_screen():
     """Display instructions while generating questions."""
     st.markdown('<div class="main-header"><h2>Preparing Your Interview</h2></div>', unsafe_allow_html=True)
@@ -40,53 +73,133 @@ def loading_screen():
     - For each question, you will have a moment to prepare before recording your answer.
     - Please aim to be clear and concise in your responses. Good luck!
     """)
-    with st.spinner(f"Generating questions for a candidate with {st.session_state.years_of_experience} years of experience..."):
-        st.session_state.interview_questions = generate_questions_with_gemini(st.session_state.years_of_experience)
+    years = st.session_state.years_of_experience
+    prefetched_years, prefetched = st.session_state.pop("prefetch", None) or (None, None)
+    if prefetched and (prefetched_years != years or (prefetched.done and not prefetched.questions)):
+        prefetched.cancel()
+        prefetched = None
+    questions = []
+    st.session_state.question_stream = None
+    if QUESTION_BANK_CONFIG["enabled"]:
+        questions = questions_from_dicts(get_question_bank().draw(years))
+    if questions and prefetched:
+        prefetched.cancel()
+    if not questions:
+        # Band exhausted or bank disabled: stream live questions and start as soon as the first arrives,
+        # reusing the stream prefetched from the welcome screen when it is for the same experience
+        stream = prefetched or QuestionStream(years)
+        stream.claim()
+        annotate(prefetch_hits=int(prefetched is not None), prefetched_questions=len(stream.questions))
+        with st.spinner(f"Generating questions for a candidate with {years} years of experience..."):
+            stream.wait_for(1)
+        st.session_state.question_stream = stream
+        questions = stream.questions
+    st.session_state.interview_questions = questions
     st.session_state.stage = 'interview'
+    checkpoint(st.session_state)
     st.rerun()
 
+def resume_interview():
+    """Pick up the work a restored interview had in progress when it was interrupted.
+
+    Transcribed answers that were not scored yet are queued again, and the
+    questions it had not received are generated.
+    """
+    flush_batches(st.session_state.answer_jobs, final=st.session_state.stage == "results")
+    questions = st.session_state.interview_questions
+    if st.session_state.stage != "interview" or len(questions) >= st.session_state.total_questions:
+        return
+    stream = QuestionStream(st.session_state.years_of_experience, st.session_state.total_questions, questions=questions)
+    stream.claim()
+    st.session_state.question_stream = stream
+    st.session_state.interview_questions = stream.questions
+
+# Timers rerun only their fragment once a second, so no script thread is held while a candidate waits.
+@st.fragment(run_every=1)
+def _prepare_timer():
+    """Countdown shown while the candidate prepares an answer."""
+    remaining = st.session_state.prepare_deadline - time.time()
+    if remaining <= 0:
+        st.rerun()
+    st.info(f"Time to prepare your answer: {math.ceil(remaining)} seconds remaining.")
+
+@st.fragment(run_every=1)
+def _transition_notice():
+    """Message shown between questions until the transition delay has passed."""
+    if time.time() >= st.session_state.transition_deadline:
+        st.rerun()
+    job = st.session_state.answer_jobs[-1]
+    transcript = job_transcript(job)
+    if transcript:
+        st.success(f"Your Transcribed Answer: \"{transcript}\"")
+        if transcript_problem(transcript) is None:
+            estimate = provisional_evaluation(job["question"].to_dict(), transcript)
+            st.caption(f"Provisional estimate: {estimate['matches']} of {estimate['total_points']} key points mentioned.")
+    st.info("Your answer has been submitted and is being evaluated in the background. We will now proceed to the next question.")
+
+@st.fragment(run_every=1)
+def _next_question_wait():
+    """Reruns the page once the next question has streamed in or generation ended."""
+    stream = st.session_state.question_stream
+    if st.session_state.current_question < len(stream.questions) or stream.done:
+        st.rerun()
+
 def interview_screen():
     """Main interview with voice recording"""
     st.markdown('<div class="main-header"><h2>Excel Skills Interview</h2></div>', unsafe_allow_html=True)
     
     questions = st.session_state.interview_questions
+    stream = st.session_state.question_stream
+    total = stream.total if stream else len(questions)
     if not questions:
         st.error("Could not load interview questions. Please try restarting the assessment.")
+        if stream and stream.error:
+            st.error(f"Failed to generate questions using Gemini: {stream.error}")
         if st.button("Restart"):
             for key in st.session_state.keys():
                 del st.session_state[key]
+            st.query_params.clear()
             st.rerun()
         return
-    if st.session_state.current_question < len(questions):
-        progress = st.session_state.current_question / len(questions)
+    if st.session_state.current_question < total:
+        if st.session_state.current_question >= len(questions):
+            # The next question is still streaming in
+            st.info("Preparing your next question...")
+            _next_question_wait()
+            return
+        progress = st.session_state.current_question / total
         st.progress(progress)
         col1, col2, col3 = st.columns([1, 2, 1])
         with col2:
-            st.write(f"**Question {st.session_state.current_question + 1} of {len(questions)}**")
-            st.write(f"**Category:** {questions[st.session_state.current_question]['category']}")
+            st.write(f"**Question {st.session_state.current_question + 1} of {total}**")
+            st.write(f"**Category:** {questions[st.session_state.current_question].category}")
             st.write(f"**Experience Level:** {st.session_state.years_of_experience} years")
         current_q = questions[st.session_state.current_question]
-        st.markdown(f'<div class="question-card"><h3>{current_q["question"]}</h3></div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="question-card"><h3>{current_q.question}</h3></div>', unsafe_allow_html=True)
         
         # Check if we should show transition message from previous answer - BELOW the question
         if st.session_state.show_transition:
-            st.success(f"Your Transcribed Answer: \"{st.session_state.transition_answer}\"")
-            st.info("Your answer has been processed. We will now proceed to the next question.")
-            time.sleep(6)
+            if st.session_state.transition_deadline is None:
+                st.session_state.transition_deadline = time.time() + INTERVIEW_CONFIG["transition_seconds"]
+            if time.time() < st.session_state.transition_deadline:
+                _transition_notice()
+                return  # Exit to prevent showing recording interface during transition
             st.session_state.show_transition = False
-            st.session_state.transition_answer = ""
-            st.rerun()
-            return  # Exit to prevent showing recording interface during transition
+            st.session_state.transition_deadline = None
         
         if not st.session_state.start_recording:
-            timer_placeholder = st.empty()
-            for i in range(40, 0, -1):
-                timer_placeholder.info(f"Time to prepare your answer: {i} seconds remaining.")
-                time.sleep(1)
+            if st.session_state.prepare_deadline is None:
+                st.session_state.prepare_deadline = time.time() + INTERVIEW_CONFIG["prepare_seconds"]
+            if time.time() < st.session_state.prepare_deadline:
+                _prepare_timer()
+                return
             st.session_state.start_recording = True
+            st.session_state.prepare_deadline = None
             st.rerun()
         else:
-            
+            # Imported here so the component only loads once an interview reaches recording
+            from audio_recorder_streamlit import audio_recorder
+
             st.markdown('<div class="recording-status">Voice Recording Mode</div>', unsafe_allow_html=True)
             st.info("Click the microphone to start recording, and click it again when you are finished. Please aim to keep your answer under 60 seconds.")
             audio_bytes = audio_recorder(
@@ -99,111 +212,149 @@ def interview_screen():
                 key=f"recorder_{st.session_state.current_question}"
             )
             if audio_bytes:
-                answer_text = ""
-                with st.spinner("Processing your answer..."):
-                    answer_text = transcribe_audio(audio_bytes)
-                    evaluation = evaluate_answer_with_gemini(current_q, answer_text)
-                    st.session_state.answers.append({
-                        "question": current_q["question"],
-                        "answer": answer_text,
-                        "evaluation": evaluation,
-                        "category": current_q["category"]
-                    })
+                # Transcription and evaluation run on the shared worker pool
+                job = submit_answer(current_q, audio_bytes)
+                persist_answer(st.session_state.interview_id, st.session_state.current_question, job)
+                st.session_state.answer_jobs.append(job)
                 
-                is_last_question = st.session_state.current_question == len(questions) - 1
+                is_last_question = st.session_state.current_question == total - 1
+                flush_batches(st.session_state.answer_jobs, final=is_last_question)
 
                 if not is_last_question:
                     # Set flag to show transition on next render
                     st.session_state.show_transition = True
-                    st.session_state.transition_answer = answer_text
-                else:
-                    st.session_state.last_answer = answer_text
 
                 st.session_state.current_question += 1
                 st.session_state.start_recording = False
+                checkpoint(st.session_state)
                 st.rerun()
     else:
         # Interview complete
-        if st.session_state.last_answer:
-            st.success(f"Your Transcribed Answer: \"{st.session_state.last_answer}\"")
+        last_transcript = job_transcript(st.session_state.answer_jobs[-1]) if st.session_state.answer_jobs else None
+        if last_transcript:
+            st.success(f"Your Transcribed Answer: \"{last_transcript}\"")
         st.info("Assessment completed. Please check your report.")
         
         col1, col2, col3 = st.columns([2, 1, 2])
         with col2:
             if st.button("View Results", type="primary", use_container_width=True):
-                st.session_state.last_answer = ""  # Clean up state
                 st.session_state.stage = 'results'
+                checkpoint(st.session_state)
                 st.rerun()
 
+def _replay(digest, index: int):
+    """Player for a stored answer recording, put on the page only when asked for.
+
+    st.audio copies the whole file into Streamlit's in-memory media store on
+    every run that renders it, so a report does not load its recordings until
+    the reviewer turns one on.
+    """
+    store = get_audio_store()
+    path = store.locate(digest) if store is not None and digest else None
+    if path and st.toggle("Play recording", key=f"replay_{index}"):
+        st.audio(path, format=store.mime_type(digest))
+
+
+def _pdf_download(pdf, polling: bool, forget):
+    if not pdf.done():
+        st.button("Preparing PDF report...", use_container_width=True, disabled=True)
+    elif polling:
+        # Rerun the page so the finished button stops polling
+        st.rerun()
+    elif pdf.exception() is not None:
+        st.warning(f"The PDF report could not be generated: {pdf.exception()}")
+        if st.button("Retry PDF Report", use_container_width=True):
+            # Drop the failed job from the cache so the whole page starts a new one
+            forget()
+            st.rerun()
+    else:
+        st.download_button("Download Report (PDF)", pdf.result(), file_name="excel-assessment-report.pdf",
+                           mime="application/pdf", use_container_width=True, on_click="ignore")
+
+
+@st.fragment(run_every=EVALUATION_CONFIG["results_poll_interval"])
+def _evaluation_progress():
+    """Progress of the answers still being evaluated; reruns the page once they all are."""
+    jobs = st.session_state.answer_jobs
+    ready = sum(job["future"].done() for job in jobs)
+    if ready == len(jobs):
+        st.rerun()
+    st.progress(ready / len(jobs), text=f"Evaluating your answers: {ready} of {len(jobs)} ready...")
+
+
 def results_screen():
     """Results and comprehensive report"""
     st.markdown('<div class="main-header"><h2>Your Excel Skills Assessment Report</h2></div>', unsafe_allow_html=True)
+    finished_now = not st.session_state.get("report_fingerprint")
+    if finished_now:
+        jobs = st.session_state.answer_jobs
+        flush_batches(jobs, final=True)
+        answers, pending = collect_answers(jobs)
+        if pending:
+            _evaluation_progress()
+            return
+        # Answers are final from here on, so later reruns reuse the cached report
+        st.session_state.answers = answers
+        st.session_state.report_fingerprint = answers_fingerprint(answers)
     if not st.session_state.answers:
         st.warning("No interview data found. Please complete the assessment first.")
         return
+    report, fig = get_report(st.session_state.report_fingerprint, tuple(st.session_state.answers))
+    if finished_now:
+        # Archived after the report so pandas is fully imported (via plotly) before a worker thread uses it
+        archive_interview(st.session_state.interview_id, st.session_state.user_name,
+                          st.session_state.years_of_experience, report.answers)
+        # Start rendering the PDF now so it is ready by the time it is asked for
+        get_report_pdf(st.session_state.report_fingerprint, st.session_state.user_name,
+                       st.session_state.years_of_experience, report)
+    for number, error in report.errors:
+        st.warning(f"Question {number} could not be fully evaluated: {error}")
     tab1, tab2, tab3 = st.tabs(["Summary Report", "Detailed Analysis", "Recommendations"])
     with tab1:
         st.header("Overall Performance")
-        scores = [answer["evaluation"]["score"] for answer in st.session_state.answers]
-        avg_score = np.mean(scores)
+        avg_score = report.overall_score
         col1, col2, col3 = st.columns(3)
         with col1:
             st.markdown(f'<div class="score-card"><h3>{avg_score:.0f}%</h3><p>Overall Score</p></div>', unsafe_allow_html=True)
         with col2:
-            skill_level = "Expert" if avg_score >= 90 else "Advanced" if avg_score >= 75 else "Intermediate" if avg_score >= 60 else "Beginner"
-            st.markdown(f'<div class="score-card"><h3>{skill_level}</h3><p>Assessed Skill Level</p></div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="score-card"><h3>{report.skill_level}</h3><p>Assessed Skill Level</p></div>', unsafe_allow_html=True)
         with col3:
-            st.markdown(f'<div class="score-card"><h3>{len(st.session_state.answers)}</h3><p>Questions Answered</p></div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="score-card"><h3>{len(report.answers)}</h3><p>Questions Answered</p></div>', unsafe_allow_html=True)
         st.header("Performance by Category")
-        category_scores = {}
-        for answer in st.session_state.answers:
-            category = answer["category"]
-            score = answer["evaluation"]["score"]
-            if category not in category_scores:
-                category_scores[category] = []
-            category_scores[category].append(score)
-        category_avg = {cat: np.mean(scores) for cat, scores in category_scores.items()}
-        fig = px.bar(
-            x=list(category_avg.keys()),
-            y=list(category_avg.values()),
-            labels={"x": "Category", "y": "Average Score (%)"},
-            color=list(category_avg.values()),
-            color_continuous_scale="viridis"
-        )
-        fig.update_layout(showlegend=False, height=400, paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font_color='white')
         st.plotly_chart(fig, use_container_width=True)
     with tab2:
         st.header("Detailed Question Analysis")
-        for i, answer in enumerate(st.session_state.answers):
-            with st.expander(f"Question {i+1}: {answer['question'][:60]}..."):
+        for i, answer in enumerate(report.answers):
+            with st.expander(f"Question {i+1}: {answer.question.question[:60]}..."):
                 col1, col2 = st.columns([2, 1])
                 with col1:
-                    st.write(f"**Question:** {answer['question']}")
-                    st.write(f"**Your Answer:** {answer['answer']}")
-                    st.write(f"**Feedback:** {answer['evaluation']['feedback']}")
+                    st.write(f"**Question:** {answer.question.question}")
+                    st.write(f"**Your Answer:** {answer.answer}")
+                    st.write(f"**Feedback:** {answer.evaluation.feedback}")
+                    _replay(answer.audio, i)
                 with col2:
-                    score = answer['evaluation']['score']
-                    st.metric("Score", f"{score:.0f}%", f"{answer['evaluation']['matches']}/{answer['evaluation']['total_points']} points covered")
+                    score = answer.evaluation.score
+                    st.metric("Score", f"{score:.0f}%", f"{answer.evaluation.matches}/{answer.evaluation.total_points} points covered")
     with tab3:
         st.header("Personalized Recommendations")
-        avg_score = np.mean([answer["evaluation"]["score"] for answer in st.session_state.answers])
-        if avg_score >= 90:
-            st.success("**Excellent Excel Skills!** You demonstrate expert-level knowledge. Consider exploring advanced topics like Power Query, VBA automation, or integrating Excel with other data analysis tools.")
-        elif avg_score >= 75:
-            st.info("**Strong Excel Skills!** You have a solid intermediate-to-advanced knowledge base. To advance, focus on mastering complex functions, advanced PivotTable techniques, and robust data modeling.")
-        elif avg_score >= 60:
-            st.warning("**Good Foundation!** You have a good grasp of the basics. Concentrate on intermediate functions like VLOOKUP/XLOOKUP, conditional formatting, and creating more complex charts and dashboards.")
-        else:
-            st.error("**Keep Learning!** Focus on mastering fundamental functions, cell references, and core Excel operations. A structured beginner's course could be very beneficial.")
+        kind, text = recommendation(avg_score)
+        getattr(st, kind)(text)
         st.markdown("---")
         st.header("Next Steps")
         col1, col2 = st.columns(2)
         with col1:
             if st.button("Retake Assessment", use_container_width=True, type="primary"):
-                for key in ['stage', 'current_question', 'answers', 'question_history', 'interview_questions']:
+                get_session_store().delete(st.session_state.interview_id)
+                st.query_params.clear()
+                for key in ['stage', 'current_question', 'answers', 'answer_jobs', 'question_history', 'interview_questions', 'question_stream', 'report_fingerprint']:
                     if key in st.session_state:
                         del st.session_state[key]
                 st.rerun()
         with col2:
-            if st.button("Download Report (PDF)", use_container_width=True):
-                st.info("PDF download feature would be implemented here.")
+            pdf_args = (st.session_state.report_fingerprint, st.session_state.user_name,
+                        st.session_state.years_of_experience, report)
+            pdf = get_report_pdf(*pdf_args)
+            # Poll only while the PDF is still rendering, and only this button
+            st.fragment(run_every=None if pdf.done() else EVALUATION_CONFIG["pdf_poll_interval"])(_pdf_download)(
+                pdf, not pdf.done(), lambda: get_report_pdf.clear(*pdf_args)
+            )
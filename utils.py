@@ -1,28 +1,53 @@
-import streamlit as st
 import json
-import speech_recognition as sr
-import io
-from typing import Dict, List, Any
-import google.generativeai as genai
+from typing import Dict, Iterator, List, Any, Optional, Sequence, Tuple
+from config import AUDIO_CONFIG, EVALUATION_CONFIG, GEMINI_CONFIG
+from llm import get_client
+from prompts import QUESTIONS_PROMPT, EVALUATION_PROMPT, BATCH_EVALUATION_PROMPT, render
+from records import Evaluation, Question, ValidationError
+from eval_cache import get_evaluation_cache
+from deadlines import DeadlineExceeded, expired
+from prescorer import (
+    prescore, provisional_evaluation, UNINTELLIGIBLE_MESSAGE, NO_SPEECH_MESSAGE, SERVICE_ERROR_PREFIX, AUDIO_ERROR_PREFIX
+)
+from metrics import detached_trace, resume, trace, traced, annotate, mark_failed
 
+@traced("transcription")
 def transcribe_audio(audio_bytes):
     """Transcribe audio using speech recognition"""
+    annotate(request_bytes=len(audio_bytes))
     try:
-        r = sr.Recognizer()
-        audio_file = io.BytesIO(audio_bytes)
-        with sr.AudioFile(audio_file) as source:
-            audio = r.record(source)
-            text = r.recognize_google(audio)
-            return text
+        # Audio and speech libraries are loaded with the first answer, not at app start;
+        # a broken install is reported like any other audio error
+        import speech_recognition as sr
+        import speech
+        from audio_processing import preprocess_audio, SilentAudioError
+    except Exception as e:
+        mark_failed()
+        return f"{AUDIO_ERROR_PREFIX} {e}"
+    try:
+        if AUDIO_CONFIG["enabled"]:
+            audio_bytes = preprocess_audio(audio_bytes)
+            annotate(preprocessed_bytes=len(audio_bytes))
+        text = speech.transcribe(audio_bytes)
+        annotate(response_bytes=len(text.encode()))
+        return text
+    except SilentAudioError:
+        return NO_SPEECH_MESSAGE
     except sr.UnknownValueError:
-        return "Could not understand the audio. Please try speaking more clearly."
+        return UNINTELLIGIBLE_MESSAGE
     except sr.RequestError as e:
-        return f"Error with speech recognition service: {e}"
+        mark_failed()
+        return f"{SERVICE_ERROR_PREFIX} {e}"
+    except DeadlineExceeded as e:
+        annotate(deadline_exceeded=1)
+        mark_failed()
+        return f"{SERVICE_ERROR_PREFIX} {e}"
     except Exception as e:
-        return f"Error processing audio: {e}"
+        mark_failed()
+        return f"{AUDIO_ERROR_PREFIX} {e}"
 
 def _clean_json_response(response_text: str) -> str:
-    """Clean the JSON response from Gemini."""
+    """Clean a free-form JSON response from Gemini (only needed without structured output)."""
     text = response_text.strip()
     
     # Remove markdown code blocks
@@ -49,215 +74,265 @@ def _clean_json_response(response_text: str) -> str:
     
     return text.strip()
 
-def generate_questions_with_gemini(years_of_experience: int) -> List[Dict[str, Any]]:
-    """Generate interview questions using Gemini AI"""
-    try:
-        # Configure safety settings to be more permissive
-        safety_settings = [
-            {
-                "category": "HARM_CATEGORY_HARASSMENT",
-                "threshold": "BLOCK_NONE"
-            },
-            {
-                "category": "HARM_CATEGORY_HATE_SPEECH",
-                "threshold": "BLOCK_NONE"
-            },
-            {
-                "category": "HARM_CATEGORY_SEXUALLY_EXPLICIT",
-                "threshold": "BLOCK_NONE"
-            },
-            {
-                "category": "HARM_CATEGORY_DANGEROUS_CONTENT",
-                "threshold": "BLOCK_NONE"
-            }
-        ]
-        
-        # Configure generation parameters
-        generation_config = {
-            "temperature": 0.7,
-            "top_p": 0.95,
-            "top_k": 40,
-            "max_output_tokens": 8192,
-        }
-        
-        model = genai.GenerativeModel(
-            'gemini-2.5-flash',
-            safety_settings=safety_settings,
-            generation_config=generation_config
-        )
-        
-        prompt = f"""
-        Generate 10 interview questions for an Excel position for a candidate with {years_of_experience} years of experience.
-        The questions should cover a range of relevant topics, from basic to advanced, appropriate for that experience level.
-        
-        IMPORTANT: Return ONLY a valid JSON array. Do not include any markdown formatting, code blocks, or explanatory text.
-        
-        Each object in the array should have these exact keys:
-        - "question": The interview question (string)
-        - "category": A relevant category (string, e.g., "Data Analysis", "Lookup Functions")
-        - "expected_points": A list of 3-4 key points expected in a good answer (array of strings)
-        - "voice_hints": A short hint for what to mention (string)
+def _load_json(response_text: str) -> Any:
+    """Parse a model response. Structured output is plain JSON and is parsed as is."""
+    if GEMINI_CONFIG["structured_output"]:
+        return json.loads(response_text)
+    return json.loads(_clean_json_response(response_text))
 
-        Return format (no code blocks, just the JSON):
-        [
-            {{
-                "question": "How do you create a basic SUM formula in Excel?",
-                "category": "Basic Functions",
-                "expected_points": [
-                    "Use =SUM(range) syntax",
-                    "Specify cell range like A1:A10",
-                    "Can add individual cells with commas"
-                ],
-                "voice_hints": "Mention the equals sign, include cell references, explain the syntax"
-            }}
-        ]
-        """
-        
-        response = model.generate_content(prompt)
-        
-        # Check if response was blocked
-        if not response.text:
-            st.error("The Gemini API returned an empty response. This might be due to safety filters or API issues.")
-            if hasattr(response, 'prompt_feedback'):
-                st.error(f"Prompt feedback: {response.prompt_feedback}")
-            return []
-        
-        json_response = _clean_json_response(response.text)
-        
-        questions = json.loads(json_response)
-        
-        # Validate the structure
-        if not isinstance(questions, list) or len(questions) == 0:
-            st.error("Invalid response format: Expected a non-empty list of questions.")
-            return []
-        
-        # Validate each question has required fields
-        required_fields = ["question", "category", "expected_points", "voice_hints"]
-        for i, q in enumerate(questions):
-            for field in required_fields:
-                if field not in q:
-                    st.error(f"Question {i+1} is missing required field: {field}")
-                    return []
-        
-        return questions
-        
-    except json.JSONDecodeError as e:
-        st.error(f"Failed to parse JSON response from Gemini: {e}")
-        st.error(f"Response text was: {response.text[:500]}...")  # Show first 500 chars
-        return []
-    except Exception as e:
-        st.error(f"Failed to generate questions using Gemini: {str(e)}")
-        st.error(f"Error type: {type(e).__name__}")
-        return []
+class JSONArrayStreamParser:
+    """Incrementally parse a streamed JSON array, emitting each top-level object as soon as it closes.
 
-def evaluate_answer_with_gemini(question_data: Dict[str, Any], user_answer: str) -> Dict[str, Any]:
-    """Evaluate the user's answer using Gemini AI"""
-    try:
-        # Configure safety settings to be more permissive
-        safety_settings = [
-            {
-                "category": "HARM_CATEGORY_HARASSMENT",
-                "threshold": "BLOCK_NONE"
-            },
-            {
-                "category": "HARM_CATEGORY_HATE_SPEECH",
-                "threshold": "BLOCK_NONE"
-            },
-            {
-                "category": "HARM_CATEGORY_SEXUALLY_EXPLICIT",
-                "threshold": "BLOCK_NONE"
-            },
-            {
-                "category": "HARM_CATEGORY_DANGEROUS_CONTENT",
-                "threshold": "BLOCK_NONE"
-            }
-        ]
-        
-        # Configure generation parameters
-        generation_config = {
-            "temperature": 0.7,
-            "top_p": 0.95,
-            "top_k": 40,
-            "max_output_tokens": 2048,
-        }
-        
-        model = genai.GenerativeModel(
-            'gemini-2.5-flash',
-            safety_settings=safety_settings,
-            generation_config=generation_config
-        )
-        
-        prompt = f"""
-        You are an expert Excel interview evaluator. Your task is to evaluate a candidate's answer to an interview question.
+    Objects that fail to parse are dropped and counted in `errors` instead of
+    invalidating the rest of the array.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._started = False
+        self._finished = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._object_start: Optional[int] = None
+        self.errors = 0
+
+    def feed(self, chunk: str) -> List[Any]:
+        """Consume the next chunk of text and return the objects it completed."""
+        items = []
+        if self._finished:
+            return items
+        self._buffer += chunk
+        buffer = self._buffer
+        i = self._pos
+        while i < len(buffer):
+            char = buffer[i]
+            if not self._started:
+                # Skip code fences or any text before the array opens
+                self._started = char == '['
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == '{':
+                if self._depth == 0:
+                    self._object_start = i
+                self._depth += 1
+            elif char == '}' and self._depth > 0:
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        items.append(json.loads(buffer[self._object_start:i + 1]))
+                    except json.JSONDecodeError:
+                        self.errors += 1
+                    self._object_start = None
+            elif char == ']' and self._depth == 0:
+                self._finished = True
+                break
+            i += 1
+
+        # Only keep the unfinished object in memory
+        if self._object_start is None:
+            self._buffer, self._pos = "", 0
+        else:
+            self._buffer = buffer[self._object_start:]
+            self._pos = i - self._object_start
+            self._object_start = 0
+        return items
+
+def _questions_prompt(years_of_experience: int, count: int, exclude: List[str]) -> str:
+    avoid = ""
+    if exclude:
+        avoid = "Do not repeat any of these questions:\n" + "\n".join(f"- {q}" for q in exclude)
+    return render("questions", QUESTIONS_PROMPT, count=count, years_of_experience=years_of_experience, avoid=avoid)
+
+def stream_questions_with_gemini(years_of_experience: int, count: int = 10, max_top_ups: int = 2,
+                                 exclude: Sequence[str] = ()) -> Iterator[Dict[str, Any]]:
+    """Yield validated interview questions as soon as each one arrives from Gemini.
+
+    Malformed, incomplete or duplicate items (including repeats of `exclude`)
+    are dropped, and replacements are requested (at most max_top_ups times)
+    until `count` questions were yielded.
+    """
+    seen: List[str] = []
+    # The span is current only while pulling from Gemini, never across a yield
+    with detached_trace("question_generation") as span:
+        for _ in range(max_top_ups + 1):
+            missing = count - len(seen)
+            if missing <= 0:
+                break
+            parser = JSONArrayStreamParser()
+            invalid = 0
+            with resume(span):
+                chunks = get_client().stream(_questions_prompt(years_of_experience, missing, [*exclude, *seen]), "questions")
+            try:
+                while True:
+                    with resume(span):
+                        chunk = next(chunks, None)
+                    if chunk is None:
+                        break
+                    for item in parser.feed(chunk):
+                        try:
+                            question = Question.parse(item)
+                        except ValidationError:
+                            invalid += 1
+                            continue
+                        if len(seen) >= count or question.question in seen or question.question in exclude:
+                            continue
+                        seen.append(question.question)
+                        yield question.to_dict()
+            finally:
+                with resume(span):
+                    chunks.close()
+            span.add(parse_errors=parser.errors, invalid_items=invalid)
+        span.add(questions=len(seen))
+
+def generate_questions_with_gemini(years_of_experience: int) -> List[Dict[str, Any]]:
+    """Generate interview questions using Gemini AI.
 
-        Here is the context:
-        - Interview Question: "{question_data['question']}"
-        - Key points expected in the answer: {question_data['expected_points']}
+    Runs on background threads, so failures are raised rather than shown.
+    """
+    return list(stream_questions_with_gemini(years_of_experience))
 
-        Here is the candidate's answer:
-        - Candidate's Answer: "{user_answer}"
+def failed_evaluation(question_data: Dict[str, Any], feedback: str, error: str) -> Dict[str, Any]:
+    """Zero-score evaluation used when the answer could not be graded."""
+    return {
+        "score": 0,
+        "rating": "poor",
+        "feedback": feedback,
+        "matches": 0,
+        "total_points": len(question_data.get('expected_points', [])),
+        "error": error
+    }
 
-        IMPORTANT: Return ONLY a valid JSON object. Do not include any markdown formatting, code blocks, or explanatory text.
+@traced("evaluation")
+def evaluate_answer_with_gemini(question_data: Dict[str, Any], user_answer: str) -> Dict[str, Any]:
+    """Evaluate the user's answer using Gemini AI.
 
-        Evaluate the answer and provide:
-        1. "score": An integer score from 0 to 100
-        2. "rating": A string rating: "excellent", "good", "fair", or "poor"
-        3. "feedback": A constructive feedback string
-        4. "matches": The number of key points covered (integer)
-        5. "total_points": The total number of key points (integer)
+    Runs on pipeline worker threads: errors are recorded on the returned
+    evaluation and shown by the results screen.
+    """
+    # Error messages, empty and near-empty transcripts are scored without an LLM call
+    local = prescore(question_data, user_answer)
+    if local:
+        annotate(scored_locally=1)
+        return local
+    cache = get_evaluation_cache()
+    cached = cache.get(question_data, user_answer) if cache else None
+    if cached:
+        annotate(cache_hits=1)
+        return cached
+    return _llm_evaluation(question_data, user_answer)
 
-        Return format (no code blocks, just the JSON):
-        {{
-            "score": 85,
-            "rating": "good",
-            "feedback": "Very good! You understand the main concepts well, but you could have explained one of the points in more detail.",
-            "matches": 3,
-            "total_points": 4
-        }}
-        """
+def _llm_evaluation(question_data: Dict[str, Any], user_answer: str) -> Dict[str, Any]:
+    """Score one answer with its own Gemini request (already pre-scored and not in the cache)."""
+    cache = get_evaluation_cache()
+    try:
+        prompt = render(
+            "evaluation", EVALUATION_PROMPT,
+            question=question_data['question'],
+            expected_points="; ".join(question_data['expected_points']),
+            answer=user_answer
+        )
         
-        response = model.generate_content(prompt)
+        response = get_client().generate(prompt, "evaluation")
         
         # Check if response was blocked
         if not response.text:
-            st.warning("The Gemini API returned an empty response during evaluation.")
-            return {
-                "score": 0,
-                "rating": "poor",
-                "feedback": "Could not evaluate the answer due to an API error.",
-                "matches": 0,
-                "total_points": len(question_data.get('expected_points', []))
-            }
-        
-        json_response = _clean_json_response(response.text)
-            
-        evaluation = json.loads(json_response)
-        
-        # Validate required fields
-        required_fields = ["score", "rating", "feedback", "matches", "total_points"]
-        for field in required_fields:
-            if field not in evaluation:
-                st.warning(f"Evaluation response missing field: {field}")
-                evaluation[field] = 0 if field in ["score", "matches", "total_points"] else "N/A"
+            mark_failed()
+            return failed_evaluation(question_data, "Could not evaluate the answer due to an API error.", "empty response")
         
+        evaluation = Evaluation.parse(_load_json(response.text)).to_dict()
+        if cache:
+            cache.put(question_data, user_answer, evaluation)
         return evaluation
         
-    except json.JSONDecodeError as e:
-        st.error(f"Failed to parse evaluation JSON: {e}")
-        return {
-            "score": 0,
-            "rating": "poor",
-            "feedback": "Could not evaluate the answer due to a JSON parsing error.",
-            "matches": 0,
-            "total_points": len(question_data.get('expected_points', []))
-        }
+    except (json.JSONDecodeError, ValidationError) as e:
+        annotate(parse_errors=1)
+        mark_failed()
+        return failed_evaluation(question_data, "Could not evaluate the answer due to a JSON parsing error.", str(e))
     except Exception as e:
-        st.error(f"Failed to evaluate answer using Gemini: {str(e)}")
-        st.error(f"Error type: {type(e).__name__}")
-        return {
-            "score": 0,
-            "rating": "poor",
-            "feedback": "Could not evaluate the answer due to an error.",
-            "matches": 0,
-            "total_points": len(question_data.get('expected_points', []))
+        if isinstance(e, DeadlineExceeded) or expired():
+            # Out of time: fall back to the local key-point estimate rather than leave the answer unscored
+            annotate(deadline_exceeded=1)
+            evaluation = provisional_evaluation(question_data, user_answer)
+            evaluation["feedback"] += " The full evaluation took too long, so this score is a local estimate."
+            return evaluation
+        mark_failed()
+        return failed_evaluation(question_data, "Could not evaluate the answer due to an error.", f"{type(e).__name__}: {e}")
+
+def _evaluate_batch_request(items: List[Tuple[Dict[str, Any], str]]) -> List[Optional[Dict[str, Any]]]:
+    """Score up to one batch of answers in a single request. Items that fail validation come back as None."""
+    results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+    answers = [
+        {
+            "id": i,
+            "question": question_data["question"],
+            "expected_points": question_data["expected_points"],
+            "answer": user_answer
         }
+        for i, (question_data, user_answer) in enumerate(items)
+    ]
+    # Compact separators: indentation only costs prompt tokens
+    prompt = render("batch_evaluation", BATCH_EVALUATION_PROMPT, answers=json.dumps(answers, separators=(",", ":")))
+
+    response = get_client().generate(prompt, "batch_evaluation")
+    if not response.text:
+        return results
+
+    try:
+        evaluations = _load_json(response.text)
+    except json.JSONDecodeError:
+        annotate(parse_errors=1)
+        return results
+    if not isinstance(evaluations, list):
+        annotate(parse_errors=1)
+        return results
+    for evaluation in evaluations:
+        index = evaluation.get("id") if isinstance(evaluation, dict) else None
+        if not isinstance(index, int) or not 0 <= index < len(items):
+            annotate(invalid_items=1)
+            continue
+        try:
+            results[index] = Evaluation.parse(evaluation).to_dict()
+        except ValidationError:
+            annotate(invalid_items=1)
+    return results
+
+@traced("evaluation_batch")
+def evaluate_answers_batch_with_gemini(items: List[Tuple[Dict[str, Any], str]]) -> List[Dict[str, Any]]:
+    """Evaluate several (question_data, answer) pairs with as few Gemini requests as possible"""
+    max_batch_size = EVALUATION_CONFIG["max_batch_size"]
+    cache = get_evaluation_cache()
+    evaluations: List[Optional[Dict[str, Any]]] = [
+        prescore(q, a) or (cache.get(q, a) if cache else None) for q, a in items
+    ]
+    misses = [i for i, evaluation in enumerate(evaluations) if evaluation is None]
+    annotate(answers=len(items), answers_sent=len(misses))
+    for start in range(0, len(misses), max_batch_size):
+        indices = misses[start:start + max_batch_size]
+        chunk = [items[i] for i in indices]
+        try:
+            results = _evaluate_batch_request(chunk)
+        except Exception:
+            # The answers are retried individually below
+            annotate(batch_failures=1)
+            results = [None] * len(chunk)
+
+        # Anything the batch could not score is retried on its own
+        for i, evaluation in zip(indices, results):
+            question_data, user_answer = items[i]
+            if evaluation is None:
+                # Pre-scoring and the cache were already checked for these answers above
+                with trace("evaluation"):
+                    evaluation = _llm_evaluation(question_data, user_answer)
+            elif cache:
+                cache.put(question_data, user_answer, evaluation)
+            evaluations[i] = evaluation
+    return evaluations